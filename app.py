@@ -1,7 +1,7 @@
-from plotly.data import gapminder  # For dataset
 from dash import dcc, html, Dash
-import pandas as pd
 import dash
+import os
+from utils import background, compression, encoding, fastjson, health, metrics, registry, static_figures
 
 # External Bootstrap CSS and JS
 external_css = ["https://cdn.jsdelivr.net/npm/bootswatch@5.3.1/dist/lux/bootstrap.min.css"]
@@ -11,8 +11,22 @@ external_js = [
 ]
 
 # Establishing the main server for our application/dashboard
-app = Dash(__name__, pages_folder='pages', use_pages=True, external_stylesheets=external_css, external_scripts=external_js, suppress_callback_exceptions=True)
+app = Dash(__name__, pages_folder='pages', use_pages=True, external_stylesheets=external_css, external_scripts=external_js, suppress_callback_exceptions=True, background_callback_manager=background.manager)
 server = app.server
+static_figures.init_app(server)
+health.init_app(server)
+compression.init_app(server)
+fastjson.init_app(server)
+encoding.init_app(server)
+metrics.init_app(server)
+
+# Page datasets load on first visit. Once the server is answering requests,
+# the remaining ones are prefetched in the background (PREFETCH_DATASETS=0
+# turns this off).
+if os.environ.get("PREFETCH_DATASETS", "1") != "0":
+    @server.before_request
+    def prefetch_datasets():
+        registry.prefetch()
 
 # Navbar components
 brand_link = dcc.Link("HOME", href="/", className="navbar-brand text-black")
@@ -0,0 +1,14 @@
+// Loads figures pre-rendered by utils/static_figures.py. The server answers
+// with compressed, immutable JSON, so repeat visits come from the browser cache.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    figures: {
+        load: function (url) {
+            if (!url) {
+                return window.dash_clientside.no_update;
+            }
+            return fetch(url).then(function (response) {
+                return response.json();
+            });
+        }
+    }
+});
@@ -0,0 +1,108 @@
+// Draws the per-country line charts in the browser when the server runs with
+// CLIENTSIDE_FILTERING=1. Each chart's spec (utils/clientside.py) holds the
+// page's frame column by column and a sample figure whose first trace and
+// layout serve as templates for any other selection. The fields that name
+// the selection hold %{key} and %{column} placeholders, filled here.
+(function () {
+    function fill(text, key, column) {
+        if (typeof text !== 'string') {
+            return text;
+        }
+        return text.split('%{key}').join(key).split('%{column}').join(column);
+    }
+
+    function fillTrace(template, key, column) {
+        var trace = Object.assign({}, template);
+        ['name', 'legendgroup', 'hovertemplate'].forEach(function (field) {
+            if (field in trace) {
+                trace[field] = fill(trace[field], key, column);
+            }
+        });
+        return trace;
+    }
+
+    function fillLayout(template, key, column) {
+        var layout = Object.assign({}, template);
+        if (layout.title && layout.title.text) {
+            layout.title = Object.assign({}, layout.title, {text: fill(layout.title.text, key, column)});
+        }
+        if (layout.yaxis && layout.yaxis.title && layout.yaxis.title.text) {
+            var title = Object.assign({}, layout.yaxis.title, {text: fill(layout.yaxis.title.text, key, column)});
+            layout.yaxis = Object.assign({}, layout.yaxis, {title: title});
+        }
+        return layout;
+    }
+
+    function draw(spec, value, column) {
+        column = column || spec.column;
+        var overall = value === spec.overall;
+        var keys = overall ? spec.order : [value];
+        var template = overall ? spec.overall_trace : spec.figure.data[0];
+        var values = spec.y[column];
+
+        var data = keys.map(function (key, i) {
+            var code = spec.keys.indexOf(key);
+            var trace = fillTrace(template, key, column);
+            trace.x = [];
+            trace.y = [];
+            for (var row = 0; row < spec.key.length; row++) {
+                if (spec.key[row] === code) {
+                    trace.x.push(spec.x[row]);
+                    trace.y.push(values[row]);
+                }
+            }
+            if (overall && trace.line) {
+                trace.line = Object.assign({}, trace.line, {color: spec.colors[i]});
+            }
+            return trace;
+        });
+
+        return {
+            // One trace per key value draws nothing for a value with no rows.
+            data: spec.grouped ? data.filter(function (trace) { return trace.x.length; }) : data,
+            layout: fillLayout(spec.figure.layout, value, column)
+        };
+    }
+
+    function meanChange(values) {
+        // pandas' Series.diff().mean(): steps next to a missing value are skipped.
+        var total = 0, count = 0;
+        for (var i = 1; i < values.length; i++) {
+            if (values[i] !== null && values[i - 1] !== null) {
+                total += values[i] - values[i - 1];
+                count++;
+            }
+        }
+        return count ? total / count : NaN;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        filters: {
+            line: function (value, spec) {
+                if (!spec || value === null || value === undefined) {
+                    return window.dash_clientside.no_update;
+                }
+                return draw(spec, value);
+            },
+
+            expenditure: function (country, category, spec) {
+                var no_update = window.dash_clientside.no_update;
+                if (!spec || country === null || country === undefined) {
+                    return [no_update, no_update];
+                }
+                var figure = draw(spec, country, category);
+                var change = meanChange(figure.data[0].y);
+
+                var interpretation = 'Analysis of expenditures for ' + country + ':\n';
+                if (change < 0) {
+                    interpretation += ' Average decrease of ' + Math.abs(change).toFixed(2) + ' million USD, possibly due to the reduced sectoral activity during COVID-19.\n';
+                } else if (change > 0) {
+                    interpretation += ' Average increase of ' + change.toFixed(2) + ' million USD, possibly indicating an increase in this sector during the pandemic.\n';
+                } else {
+                    interpretation += ' Expenditures were relatively stable over this period.\n';
+                }
+                return [figure, interpretation];
+            }
+        }
+    });
+})();
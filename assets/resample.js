@@ -0,0 +1,43 @@
+// Reports what a downsampled graph shows: the width of its plot area in
+// pixels and the visible x range (null when zoomed out). The server answers
+// with the series resampled to fit (utils/downsample.py).
+(function () {
+    function plotWidth(graphId) {
+        var graph = document.getElementById(graphId);
+        var plot = graph && graph.querySelector('.js-plotly-plot');
+        if (plot && plot._fullLayout && plot._fullLayout._size) {
+            return Math.round(plot._fullLayout._size.w);
+        }
+        return graph ? Math.round(graph.getBoundingClientRect().width) : 0;
+    }
+
+    function xRange(relayout, previous) {
+        if ('xaxis.range[0]' in relayout) {
+            return [relayout['xaxis.range[0]'], relayout['xaxis.range[1]']];
+        }
+        if ('xaxis.range' in relayout) {
+            return relayout['xaxis.range'];
+        }
+        if (relayout['xaxis.autorange']) {
+            return null;
+        }
+        // Resizes and changes to other axes keep the current window.
+        return previous ? previous.range : null;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        resample: {
+            view: function (relayout, graphId, previous) {
+                var view = {
+                    width: plotWidth(graphId) || (previous && previous.width) || null,
+                    range: xRange(relayout || {}, previous)
+                };
+                if (previous && previous.width === view.width &&
+                        JSON.stringify(previous.range) === JSON.stringify(view.range)) {
+                    return window.dash_clientside.no_update;
+                }
+                return view;
+            }
+        }
+    });
+})();
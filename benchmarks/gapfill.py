@@ -0,0 +1,101 @@
+# Scaling benchmark for utils.gapfill on synthetic OWID-shaped input.
+#
+#   python -m benchmarks.gapfill [--sizes 250000 500000 1000000 2000000 4000000]
+#
+# Rows are spread over ~250 locations, several years and several rows per
+# (location, year) with ~20% missing values. The row-by-row implementation
+# the engine replaced is timed on small, shuffled inputs for comparison;
+# tests/test_gapfill.py checks that both produce the same frame.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.gapfill import coefficient_of_variation, fill_with_evolution
+
+
+CONTINENTS = ['Africa', 'Asia', 'Europe', 'North America', 'Oceania', 'South America']
+COLUMNS = ['total_cases', 'total_deaths']
+
+
+def synthetic_frame(rows, locations=250, years=5, seed=0, shuffle=False):
+    rng = np.random.default_rng(seed)
+    per_key = max(1, rows // (locations * years))
+    location = np.repeat(np.arange(locations), years * per_key)[:rows]
+    year = np.tile(np.repeat(np.arange(2020, 2020 + years), per_key), locations)[:rows]
+
+    data = pd.DataFrame({
+        'location': pd.Series(location).map(lambda i: f'Country {i}'),
+        'year': year,
+        'continent': pd.Series(location % len(CONTINENTS)).map(dict(enumerate(CONTINENTS))),
+    })
+    for column in COLUMNS:
+        values = rng.gamma(2.0, 1000.0, rows)
+        values[rng.random(rows) < 0.2] = np.nan
+        data[column] = values
+    if shuffle:
+        data = data.sample(frac=1, random_state=seed).reset_index(drop=True)
+    return data
+
+
+def legacy_fill(df, factors):
+    # The iterrows/iloc scan formerly inlined in ConsumptionAnalysis.
+    df_copy = df.copy()
+    for column in COLUMNS:
+        for index, row in df_copy.iterrows():
+            if pd.isnull(row[column]) and row['continent'] in factors[column].index:
+                factor = factors[column][row['continent']]
+                previous_value = None
+                for prev_index in range(index - 1, -1, -1):
+                    prev_row = df_copy.iloc[prev_index]
+                    if prev_row['location'] == row['location'] and prev_row['year'] == row['year'] and not pd.isnull(prev_row[column]):
+                        previous_value = prev_row[column]
+                        break
+                if previous_value is not None:
+                    df_copy.loc[index, column] = previous_value * factor
+                else:
+                    for next_index in range(index + 1, len(df_copy)):
+                        next_row = df_copy.iloc[next_index]
+                        if next_row['location'] == row['location'] and next_row['year'] == row['year'] and not pd.isnull(next_row[column]):
+                            df_copy.loc[index, column] = next_row[column] / factor
+                            break
+    return df_copy
+
+
+def factors_for(data):
+    return {column: coefficient_of_variation(data, 'continent', column) for column in COLUMNS}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250_000, 500_000, 1_000_000, 2_000_000, 4_000_000])
+    parser.add_argument('--legacy-sizes', type=int, nargs='+', default=[500, 1_000, 2_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy s':>10} {'engine s':>10}")
+    for rows in args.legacy_sizes:
+        data = synthetic_frame(rows, locations=10, years=5, shuffle=True)
+        factors = factors_for(data)
+        _, legacy_seconds = timed(legacy_fill, data, factors)
+        _, engine_seconds = timed(fill_with_evolution, data, factors, 'continent', ['location', 'year'])
+        print(f"{rows:>10} {legacy_seconds:>10.3f} {engine_seconds:>10.3f}")
+
+    print()
+    print(f"{'rows':>10} {'engine s':>10} {'us/row':>8}")
+    for rows in args.sizes:
+        data = synthetic_frame(rows)
+        factors = factors_for(data)
+        _, seconds = timed(fill_with_evolution, data, factors, 'continent', ['location', 'year'])
+        print(f"{rows:>10} {seconds:>10.3f} {seconds / rows * 1e6:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
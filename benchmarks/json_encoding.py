@@ -0,0 +1,105 @@
+# Serialization time of every figure and page layout the app sends, with
+# plotly's encoder (Dash's default) and with utils.fastjson.
+#
+#   python -m benchmarks.json_encoding [--repeat 20] [--precision float32|float64|<n>|off]
+#
+# The app is served in-process and every page is visited once, as in
+# benchmarks.loadtest, while the callback responses are recorded. Each figure
+# and each page layout is then encoded on its own, as a callback response, by
+# both encoders, which must produce the same JSON. Figures are first encoded
+# by utils.encoding at --precision (FIGURE_PRECISION by default); with "off"
+# their arrays are written as decimal text.
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+# Background callbacks would build the maps in another process, out of sight.
+os.environ.setdefault('BACKGROUND_CALLBACKS', '0')
+
+import dash
+import dash._callback as dash_callback
+import requests
+from plotly.io.json import to_json_plotly
+
+from benchmarks.loadtest import User, components, local_server, server_callbacks
+from utils import encoding, fastjson
+
+
+def record(responses, visiting):
+    # Keeps every callback response Dash encodes from now on, with the page
+    # being visited.
+    to_json = dash_callback.to_json
+
+    def wrapper(response):
+        responses.append((visiting['page'], response))
+        return to_json(response)
+
+    dash_callback.to_json = wrapper
+
+
+def payloads(responses, precision):
+    # (label, response) for each figure and page layout, the first time each
+    # is sent.
+    seen = {}
+    for page, response in responses:
+        for component, props in (response.get('response') or {}).items():
+            for prop, value in props.items():
+                if prop == 'figure':
+                    label = component
+                    value = encoding.encode_figure(value, precision)
+                elif component == '_pages_content' and prop == 'children':
+                    label = f'page {page}'
+                else:
+                    continue
+                seen.setdefault(label, {'multi': True, 'response': {component: {prop: value}}})
+    return sorted(seen.items())
+
+
+def median_ms(encoder, value, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoder(value)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20, help='encodings per payload; the median is reported')
+    parser.add_argument('--precision', default=encoding.FIGURE_PRECISION, help='utils.encoding precision for figures')
+    args = parser.parse_args()
+
+    url = local_server()
+    pages = [page['path'] for page in dash.page_registry.values()]
+    shell = {props['id']: props for props in components(requests.get(f'{url}/_dash-layout', timeout=60).json())}
+    responses, visiting = [], {'page': None}
+    record(responses, visiting)
+    user = User(url, server_callbacks(url), shell, pages, 0, 0)
+    for path in pages:
+        visiting['page'] = path
+        user.visit(path)
+
+    if fastjson.orjson is None:
+        print("orjson is not installed: utils.fastjson falls back to plotly's encoder")
+    items = payloads(responses, args.precision)
+    width = max(len(label) for label, _ in items)
+    print(f"{'payload':<{width}} {'KB':>8} {'plotly ms':>10} {'fast ms':>8} {'speedup':>8}")
+    totals = [0.0, 0.0]
+    for label, value in items:
+        before, after = to_json_plotly(value), fastjson.dumps(value)
+        assert json.loads(before) == json.loads(after), label
+        plotly_ms = median_ms(to_json_plotly, value, args.repeat)
+        fast_ms = median_ms(fastjson.dumps, value, args.repeat)
+        totals[0] += plotly_ms
+        totals[1] += fast_ms
+        print(f"{label:<{width}} {len(after) / 1024:>8.1f} {plotly_ms:>10.2f} {fast_ms:>8.2f} {plotly_ms / fast_ms:>7.1f}x")
+    print()
+    print(f"{len(items)} payloads: {totals[0]:.1f} ms with plotly, {totals[1]:.1f} ms with utils.fastjson ({totals[0] / totals[1]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+# Load generator that replays every page's callbacks the way browsers do.
+#
+#   python -m benchmarks.loadtest [--users 8] [--duration 60] [--interactions 5]
+#   python -m benchmarks.loadtest --url http://127.0.0.1:8050   # e.g. gunicorn
+#
+# Without --url the app is imported and served on a local threaded server;
+# with it the app is not imported at all. Either way the pages are the ones
+# the served layout links to (/_dash-layout) and the callbacks those listed
+# on /_dash-dependencies. Each simulated user repeatedly opens a random page,
+# fires the callbacks the renderer would fire on load, then picks random
+# options from the page's dropdowns and radio items, firing the callbacks
+# they feed and those of any components they add. Background callbacks are
+# polled until their result arrives. Other clientside callbacks cost the
+# server nothing and are skipped, except that pre-rendered figures are
+# downloaded as assets/figures.js would. The report lists throughput and
+# p50/p95/p99 latency per callback.
+
+import argparse
+import collections
+import json
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+import requests
+
+from utils.static_figures import FIGURE_URL
+
+
+PAGES_LOCATION = '_pages_location'
+
+
+
+
+####################### DISCOVERY #############################
+
+class Callback:
+    def __init__(self, spec):
+        self.output = spec['output']
+        self.multi = self.output.startswith('..')
+        parts = self.output[2:-2].split('...') if self.multi else [self.output]
+        self.outputs = [tuple(part.split('@')[0].rsplit('.', 1)) for part in parts]
+        self.inputs = [(dep['id'], dep['property']) for dep in spec['inputs']]
+        self.state = [(dep['id'], dep['property']) for dep in spec['state']]
+        self.initial = not spec['prevent_initial_call']
+        self.interval = (spec.get('long') or {}).get('interval', 1000) / 1000
+        self.label = ' + '.join(f'{component}.{prop}' for component, prop in self.outputs)
+
+    def ready(self, state):
+        # The renderer only fires callbacks whose outputs and inputs are all
+        # on the page.
+        return all(component in state for component, _ in self.outputs + self.inputs)
+
+    def touches(self, components):
+        return any(component in components for component, _ in self.outputs + self.inputs)
+
+    def body(self, state, changed):
+        outputs = [{'id': component, 'property': prop} for component, prop in self.outputs]
+        return {
+            'output': self.output,
+            'outputs': outputs if self.multi else outputs[0],
+            'inputs': [{'id': c, 'property': p, 'value': state[c].get(p)} for c, p in self.inputs],
+            'state': [{'id': c, 'property': p, 'value': state.get(c, {}).get(p)} for c, p in self.state],
+            'changedPropIds': [f'{c}.{p}' for c, p in changed],
+        }
+
+
+def server_callbacks(url):
+    specs = requests.get(f'{url}/_dash-dependencies', timeout=60).json()
+    callbacks = []
+    for spec in specs:
+        # Clientside callbacks run in the browser; pattern-matching ids are
+        # not used by any page.
+        if spec.get('clientside_function') or '{' in spec['output']:
+            continue
+        callbacks.append(Callback(spec))
+    return callbacks
+
+
+def components(node):
+    # Props of every component with a string id in a layout tree.
+    if isinstance(node, list):
+        for item in node:
+            yield from components(item)
+    elif isinstance(node, dict) and 'props' in node and 'type' in node:
+        props = node['props']
+        if isinstance(props.get('id'), str):
+            yield props
+        for value in props.values():
+            yield from components(value)
+
+
+def page_paths(layout):
+    # Paths of the pages the layout links to (the navbar), in order.
+    paths = []
+    if isinstance(layout, list):
+        for item in layout:
+            paths += page_paths(item)
+    elif isinstance(layout, dict) and 'props' in layout and 'type' in layout:
+        href = layout['props'].get('href')
+        if isinstance(href, str) and href.startswith('/'):
+            paths.append(href)
+        for value in layout['props'].values():
+            paths += page_paths(value)
+    return list(dict.fromkeys(paths))
+
+
+def option_values(options):
+    return [option['value'] if isinstance(option, dict) else option for option in options or []]
+
+
+
+
+####################### USERS #############################
+
+class User:
+    def __init__(self, url, callbacks, shell, pages, interactions, seed):
+        self.url = url
+        self.callbacks = callbacks
+        self.shell = shell
+        self.pages = pages
+        self.interactions = interactions
+        self.random = random.Random(seed)
+        self.http = requests.Session()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+
+    def post(self, body, params=None):
+        response = self.http.post(f'{self.url}/_dash-update-component', json=body, params=params, timeout=300)
+        response.raise_for_status()
+        # 204: the callback raised PreventUpdate or its job was cancelled.
+        return None if response.status_code == 204 else response.json()
+
+    def fire(self, callback, state, changed, label=None):
+        label = label or callback.label
+        body = callback.body(state, changed)
+        start = time.perf_counter()
+        try:
+            data = self.post(body)
+            if data and 'cacheKey' in data and 'job' in data:
+                # A background job: poll like the renderer until it is done.
+                job = {'cacheKey': data['cacheKey'], 'job': data['job']}
+                while True:
+                    time.sleep(callback.interval)
+                    data = self.post(body, job)
+                    if data is None or 'response' in data:
+                        break
+        except (requests.RequestException, ValueError):
+            self.errors[label] += 1
+            return set()
+        self.latencies[label].append(time.perf_counter() - start)
+        return self.merge(state, (data or {}).get('response', {}))
+
+    def download(self, path):
+        label = f"static {path.rsplit('/', 1)[-1]}"
+        start = time.perf_counter()
+        try:
+            self.http.get(f'{self.url}{path}', timeout=300).raise_for_status()
+        except requests.RequestException:
+            self.errors[label] += 1
+            return
+        self.latencies[label].append(time.perf_counter() - start)
+
+    def merge(self, state, response):
+        # Applies a callback response; returns the ids of components it added.
+        added = set()
+        for component, props in response.items():
+            for prop, value in props.items():
+                if isinstance(value, dict) and '__dash_patch_update' in value:
+                    continue
+                state.setdefault(component, {})[prop] = value
+                for child in components(value):
+                    if child['id'] not in state:
+                        added.add(child['id'])
+                    state[child['id']] = dict(child)
+        return added
+
+    def settle(self, state, fired, added):
+        # Initial calls for callbacks whose components just appeared.
+        fired -= {callback for callback in fired if callback.touches(added)}
+        while True:
+            ready = [cb for cb in self.callbacks if cb.initial and cb not in fired and cb.ready(state)]
+            if not ready:
+                return
+            # Like the renderer, hold back callbacks fed by another that has
+            # yet to run, e.g. a graph whose dropdown gets its options and
+            # value from the data.
+            pending = {output for callback in ready for output in callback.outputs}
+            ready = [cb for cb in ready if not pending & set(cb.inputs)] or ready
+            added = set()
+            for callback in ready:
+                fired.add(callback)
+                added |= self.fire(callback, state, [])
+            fired -= {callback for callback in fired if callback.touches(added)}
+
+    def visit(self, path):
+        state = {component: dict(props) for component, props in self.shell.items()}
+        state[PAGES_LOCATION].update(pathname=path, search='')
+        fired = set()
+
+        changed = [(PAGES_LOCATION, 'pathname')]
+        added = set()
+        for callback in self.callbacks:
+            if (PAGES_LOCATION, 'pathname') in callback.inputs:
+                router = any(component == '_pages_content' for component, _ in callback.outputs)
+                fired.add(callback)
+                added |= self.fire(callback, state, changed, label=f'page {path}' if router else None)
+        self.settle(state, fired, added)
+
+        for props in list(state.values()):
+            if isinstance(props.get('data'), str) and props['data'].startswith(FIGURE_URL):
+                self.download(props['data'])
+
+        for _ in range(self.interactions):
+            controls = [c for c, props in state.items() if option_values(props.get('options'))]
+            if not controls:
+                break
+            control = self.random.choice(sorted(controls))
+            state[control]['value'] = self.random.choice(option_values(state[control]['options']))
+
+            added = set()
+            for callback in self.callbacks:
+                if (control, 'value') in callback.inputs and callback.ready(state):
+                    added |= self.fire(callback, state, [(control, 'value')])
+            self.settle(state, fired, added)
+
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            self.visit(self.random.choice(self.pages))
+
+
+
+
+####################### REPORT #############################
+
+def report(users, elapsed):
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    for user in users:
+        for label, values in user.latencies.items():
+            latencies[label].extend(values)
+        errors.update(user.errors)
+
+    total = sum(len(values) for values in latencies.values())
+    width = max([len(label) for label in latencies] + [8])
+    print(f"{'callback':<{width}} {'calls':>7} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label in sorted(latencies, key=lambda label: -np.percentile(latencies[label], 95)):
+        p50, p95, p99 = np.percentile(latencies[label], [50, 95, 99]) * 1000
+        calls = len(latencies[label])
+        print(f"{label:<{width}} {calls:>7} {errors[label]:>6} {calls / elapsed:>7.2f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+    print()
+    print(f"{total} requests, {sum(errors.values())} errors in {elapsed:.1f} s: {total / elapsed:.1f} requests/s with {len(users)} users")
+
+    return {
+        label: {
+            'calls': len(values),
+            'errors': errors[label],
+            'p50': float(np.percentile(values, 50)),
+            'p95': float(np.percentile(values, 95)),
+            'p99': float(np.percentile(values, 99)),
+        }
+        for label, values in latencies.items()
+    }
+
+
+def local_server():
+    from werkzeug.serving import make_server
+
+    import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help='dashboard to load; defaults to serving the app in-process')
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=60, help='seconds of measured load')
+    parser.add_argument('--interactions', type=int, default=5, help='control changes per page visit')
+    parser.add_argument('--pages', nargs='+', help='paths to visit (default: every registered page)')
+    parser.add_argument('--no-warmup', action='store_true', help='measure cold caches too')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the per-callback results to this file')
+    args = parser.parse_args()
+
+    url = (args.url or local_server()).rstrip('/')
+
+    # The first request registers the page router, so the layout is fetched
+    # before the callbacks.
+    layout = requests.get(f'{url}/_dash-layout', timeout=60).json()
+    shell = {props['id']: props for props in components(layout)}
+    pages = args.pages or page_paths(layout)
+    callbacks = server_callbacks(url)
+    print(f"{len(pages)} pages, {len(callbacks)} server callbacks at {url}")
+
+    if not args.no_warmup:
+        warmup = User(url, callbacks, shell, pages, 0, args.seed)
+        for path in pages:
+            warmup.visit(path)
+
+    users = [User(url, callbacks, shell, pages, args.interactions, args.seed + i) for i in range(args.users)]
+    start = time.monotonic()
+    threads = [threading.Thread(target=user.run, args=(start + args.duration,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = report(users, time.monotonic() - start)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+
+# Production server: gunicorn -c gunicorn.conf.py
+# Every setting can be overridden from the environment.
+
+wsgi_app = "wsgi:server"
+bind = os.environ.get("BIND", "0.0.0.0:8050")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+# Import wsgi.py (and load every dataset) once in the master; workers are
+# forked afterwards and share the frames copy-on-write.
+preload_app = True
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def child_exit(server, worker):
+    # With PROMETHEUS_MULTIPROC_DIR set, drop the live metrics of a worker
+    # that has exited (utils.metrics).
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -2,14 +2,18 @@ import pandas as pd
 import dash
 from dash import dcc, html, callback
 import plotly.express as px
-import dash_daq as daq
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import country_converter as cc
-from plotly.subplots import make_subplots
 import plotly.graph_objects as go
-import logging
-import numpy as np
+from utils.registry import dataset
+from utils.figcache import cached_figure
+from utils.figpatch import patch_figures
+from utils.background import heavy_callback
+from utils.geo import map_graph
+from utils.choropleth import animated_choropleth
+from utils.gapfill import coefficient_of_variation, fill_with_evolution
+from utils import countries, owid
+from utils.wdi import read_wdi
 
 
 
@@ -20,76 +24,32 @@ dash.register_page(__name__, path = '/ConsumptionAnalysis', name = "Consumption
 
 ########################################### DATA #################################################
 
-logger = logging.getLogger('country_converter')
-logger.setLevel(logging.ERROR)
-dataT = pd.read_csv("data/international-tourist-trips.csv", sep=',')
-dataD=  pd.read_csv("data/owid-covid-data.csv", sep=',' )
-dataC = pd.read_csv("data/Consumption_data.csv", sep=',', skiprows=4, header=None)
-dataR = pd.read_csv("data/Government_consumption.csv", sep=',', skiprows=4, header=None)
-
-def load_process(data):
-    column_names = data.iloc[0]
-    data.columns = column_names
-    data = data.drop(data.index[0])
-    selected_columns = ['Country Name', 2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-    data = data[selected_columns]
-    data.columns = data.columns.astype(str)
-    value_vars = [col for col in data.columns[4:] if col != 'nan']
-    melted_data = pd.melt(data, id_vars=['Country Name'], value_vars=value_vars, var_name='year', value_name='Gov_Consump')
-    melted_data['year'] = pd.to_numeric(melted_data['year'])
-    filtered_data = melted_data[melted_data['year'].isin([2018, 2019, 2020, 2021, 2022, 2023])]
-    sorted_data = filtered_data.sort_values('Country Name')
-    sorted_data = filtered_data.sort_values(['Country Name', 'year'])
-    sorted_data['year'] = sorted_data['year'].astype(int)
-    sorted_data = sorted_data.rename(columns={'Country Name': 'location'})
-    sorted_data['continent'] = cc.convert(names=sorted_data['location'], to='continent')
+def load_process(path):
+    sorted_data = read_wdi(path, 'Gov_Consump')
+    sorted_data['continent'] = countries.continent(sorted_data['location'])
     sorted_data = sorted_data[sorted_data['continent'] != 'not found']
     return sorted_data
 
-def load_process_consumption(data):
-    column_names = data.iloc[0]
-    data.columns = column_names
-    data = data.drop(data.index[0])
-    selected_columns = ['Country Name', 2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-    new_data = data[selected_columns]
-    data.columns = data.columns.astype(str)
-    value_vars = [col for col in data.columns[4:] if col != 'nan']
-    melted_data = pd.melt(data, id_vars=['Country Name'], value_vars=value_vars, var_name='year', value_name='Consumption')
-    melted_data['year'] = pd.to_numeric(melted_data['year'])
-    filtered_data = melted_data[melted_data['year'].isin([2018, 2019, 2020, 2021, 2022, 2023])]
-    unique_years = filtered_data['year'].unique()
-    sorted_data = filtered_data.sort_values('Country Name')
-    sorted_data = filtered_data.sort_values(['Country Name', 'year'])
-    sorted_data['year'] = sorted_data['year'].astype(int)
-    sorted_data = sorted_data.rename(columns={'Country Name': 'location'})
-    sorted_data['continent'] = cc.convert(names=sorted_data['location'], to='continent')
-    nan_count_continent = sorted_data['continent'].isnull().sum()
-    nan_count_consumption = sorted_data['Consumption'].isnull().sum()
-    nan_counts_by_year = sorted_data.groupby('year')['Consumption'].apply(lambda x: x.isnull().sum())
+def load_process_consumption(path):
+    sorted_data = read_wdi(path, 'Consumption')
+    sorted_data['continent'] = countries.continent(sorted_data['location'])
     sorted_data = sorted_data[sorted_data['continent'] != 'not found']
     return sorted_data
 
 def continent_Consumption(data):
-    consumption_by_continent_year = data.groupby(['continent', 'year'])['Consumption'].sum().reset_index()
+    consumption_by_continent_year = data.groupby(['continent', 'year'], observed=True)['Consumption'].sum().reset_index()
     return consumption_by_continent_year
 
 def continent_Gov_Consump(data):
-    gov_consump_by_continent_year = data.groupby(['continent', 'year'])['Gov_Consump'].sum().reset_index()
+    gov_consump_by_continent_year = data.groupby(['continent', 'year'], observed=True)['Gov_Consump'].sum().reset_index()
     return gov_consump_by_continent_year
 
 def iso_country(data):
-    data['iso_alpha'] = cc.convert(names=data['location'], to='ISO3')
-    return data
+    return data.assign(iso_alpha=countries.iso3(data['location']))
 
 
-def load_and_process_death_data(data):
-    columns_to_keep = ['continent', 'location', 'date', 'total_cases', 'total_deaths', 'population']
-    data = data[columns_to_keep]
-
-    data['year'] = pd.to_datetime(data['date']).dt.year
-
-    last_value_per_year = data.groupby(['year', 'location'], as_index=False, sort=False).last()
-    data = last_value_per_year.drop(columns=['date'])
+def load_and_process_death_data(path):
+    data = owid.read_last_per_year(path)
 
     manual_mapping = {
         'Africa': 'Africa',
@@ -101,53 +61,14 @@ def load_and_process_death_data(data):
     }
 
     nan_continent_rows = data['continent'].isnull()
-    continent_values = data.loc[nan_continent_rows, 'location'].apply(lambda x: cc.convert(names=x, to='continent', not_found=None))
-    data.loc[nan_continent_rows, 'continent'] = data.loc[nan_continent_rows, 'location'].map(manual_mapping).fillna(pd.Series(continent_values, index=data.loc[nan_continent_rows, 'location'].index))
-
-    def coefficient_of_variation(group):
-        std_dev = group.std()
-        mean = group.mean()
-        if mean == 0:
-            return np.nan  
-        return (std_dev / mean)
-
-    continent_evolution_cases = data.groupby('continent')['total_cases'].apply(coefficient_of_variation)
-    continent_evolution_deaths = data.groupby('continent')['total_deaths'].apply(coefficient_of_variation)
-
-    continent_evolution_df = pd.DataFrame({
-        'Coefficient_of_Variation_Cases': continent_evolution_cases,
-        'Coefficient_of_Variation_Deaths': continent_evolution_deaths,
-    })
-
-    def replace_nan_with_continent_evolution(df, continent_evolution_df):
-        df_copy = df.copy()  
-
-        for column in ['total_cases', 'total_deaths']:
-            for index, row in df_copy.iterrows():
-                if pd.isnull(row[column]):
-                    continent = row['continent']
-                    if continent in continent_evolution_df.index:
-                        previous_value = None
-                        for prev_index in range(index - 1, -1, -1):
-                            prev_row = df_copy.iloc[prev_index]
-                            if prev_row['location'] == row['location'] and prev_row['year'] == row['year'] and not pd.isnull(prev_row[column]):
-                                previous_value = prev_row[column]
-                                break
-
-                        if previous_value is not None:
-                            df_copy.loc[index, column] = previous_value * continent_evolution_df.loc[continent, f'Coefficient_of_Variation_{column.split("_")[1]}']
-                        else:
-                            next_value = None
-                            for next_index in range(index + 1, len(df_copy)):
-                                next_row = df_copy.iloc[next_index]
-                                if next_row['location'] == row['location'] and next_row['year'] == row['year'] and not pd.isnull(next_row[column]):
-                                    next_value = next_row[column]
-                                    break
-                            if next_value is not None:
-                                df_copy.loc[index, column] = next_value / continent_evolution_df.loc[continent, f'Coefficient_of_Variation_{column.split("_")[1]}']
-        return df_copy
-
-    data_filled = replace_nan_with_continent_evolution(data, continent_evolution_df)
+    data.loc[nan_continent_rows, 'continent'] = countries.continent(data.loc[nan_continent_rows, 'location'], overrides=manual_mapping, not_found=None)
+
+    continent_evolution = {
+        'total_cases': coefficient_of_variation(data, 'continent', 'total_cases'),
+        'total_deaths': coefficient_of_variation(data, 'continent', 'total_deaths'),
+    }
+
+    data_filled = fill_with_evolution(data, continent_evolution, by='continent', keys=['location', 'year'])
     names_to_remove = ['Hong Kong', 'Western Sahara']
     data_filled = data_filled[~data_filled['location'].isin(names_to_remove)]
     data_filled = data_filled[data_filled['year'] != 2024]
@@ -156,7 +77,7 @@ def load_and_process_death_data(data):
 
 
 def continent_total_deaths(data):
-    gov_consump_by_continent_year = data.groupby(['continent', 'year'])['total_cases'].sum().reset_index()
+    gov_consump_by_continent_year = data.groupby(['continent', 'year'], observed=True)['total_cases'].sum().reset_index()
     return gov_consump_by_continent_year
 
 
@@ -180,27 +101,26 @@ def process_tourism_data(df):
 
 
 def continent_Tourist(data):
-    consumption_by_continent_year = data.groupby(['continent', 'year'])['Nb_tourists'].sum().reset_index()
+    consumption_by_continent_year = data.groupby(['continent', 'year'], observed=True)['Nb_tourists'].sum().reset_index()
     return consumption_by_continent_year
 
 
-sorted_dataR = load_process(dataR)
-data_gov_consupmtion_continet = continent_Gov_Consump(sorted_dataR)
-gov_consupmtion_data = iso_country(sorted_dataR)
+@dataset("data/Government_consumption.csv", version=2)
+def load_gov_consumption_data():
+    return iso_country(load_process("data/Government_consumption.csv"))
 
-sorted_dataCC = load_process_consumption(dataC)
-data_private_consupmtion_continet = continent_Consumption(sorted_dataCC)
-sorted_dataC = load_process_consumption(dataC)
-private_consupmtion_data = iso_country(sorted_dataC)
+@dataset("data/Consumption_data.csv", version=2)
+def load_private_consumption_data():
+    return iso_country(load_process_consumption("data/Consumption_data.csv"))
 
-data_death = load_and_process_death_data(dataD)
-combined_data = pd.merge(sorted_dataR[['continent','year','location']], data_death, on=['year','location','continent'], how='inner')
-data_death_continent=continent_total_deaths(combined_data)
-iso_data_death=iso_country(data_death)
+@dataset("data/owid-covid-data.csv", version=2)
+def load_death_data():
+    return iso_country(load_and_process_death_data("data/owid-covid-data.csv"))
 
-data_tourist = process_tourism_data(dataT)
-combined_data = pd.merge(sorted_dataCC[['continent','year','location']], data_tourist, on=['year','location'], how='inner')
-data_tourist_continet=continent_Tourist(combined_data)
+@dataset("data/international-tourist-trips.csv")
+def load_tourism_data():
+    dataT = pd.read_csv("data/international-tourist-trips.csv", sep=',')
+    return process_tourism_data(dataT)
 
 
 
@@ -213,28 +133,12 @@ data_tourist_continet=continent_Tourist(combined_data)
 
 def make_ctry_dropdown(category):
     if category == 'Gov_Consump':
-        df = gov_consupmtion_data  
+        df = load_gov_consumption_data()
     elif category == 'Consumption':
-        df = private_consupmtion_data  
+        df = load_private_consumption_data()
     return [{'label': country, 'value': country} for country in df['location'].unique()]
 
 
-options=[{'label': country, 'value': country} for country in gov_consupmtion_data['location'].unique()]
-
-ctry_dropdown_Gov_Consump = dcc.Dropdown(
-    id="Gov_Consump_column",
-    options=make_ctry_dropdown("Gov_Consump"),  
-    value="France",
-    clearable=False
-)
-
-ctry_dropdown_Consumption = dcc.Dropdown(
-    id="Consumption_column",
-    options=make_ctry_dropdown("Consumption"),  
-    value="France",
-    clearable=False
-)
-
 radio_main_category1= dbc.RadioItems(
         id='main_category1', 
         className='radio',
@@ -287,6 +191,7 @@ layout = html.Div(children=[
 def display_layout(main_category1):
     
     if main_category1 == 0:  
+        data_death = load_death_data()
 
         ret = html.Div([
 
@@ -295,9 +200,9 @@ def display_layout(main_category1):
                     html.Br(),
                     html.H4("Overall Analysis"),
                     html.Br(),
-                    dcc.Graph(id='gov-consupmtion-map'),
+                    map_graph('gov-consupmtion-map', level='simple'),
                     html.Br(),
-                    dcc.Graph(id='Total-death-map'),
+                    map_graph('Total-death-map', level='simple'),
                     html.Br(),
                 ], className='box', style={'width': '50%', 'padding': '10px'}),
 
@@ -306,7 +211,7 @@ def display_layout(main_category1):
                     dcc.Dropdown(
                         id='data_death_country',
                         options=[{'label': country, 'value': country} for country in data_death['location'].unique()],
-                        value=data_death['location'].unique()[0],
+                        value=data_death['location'].unique()[0] if len(data_death) else None,
                         placeholder='Choose a country'
                     ),
                     html.Br(),
@@ -356,7 +261,7 @@ def display_layout(main_category1):
                     html.Br(),
                     html.H4("Overall Analysis"),
                     html.Br(),
-                    dcc.Graph(id='Consupmtion-map'),
+                    map_graph('Consupmtion-map', level='simple'),
                     html.Br(),
                     dcc.Graph(id='Consupmtion-lineplot'),
                     html.Br(),
@@ -410,20 +315,22 @@ def display_layout(main_category1):
 
 
 
-@callback(
+@heavy_callback(
     [
         Output('gov-consupmtion-map', 'figure'),
         Output('gov-consupmtion-lineplot', 'figure'),
-        Output('Total-cases-lineplot', 'figure'),
         Output('Total-death-map', 'figure')
     ],
-    Input("data_death_country", "value")
+    Input('gov-consupmtion-map', 'id')
 )
 
 
-def update_country_graphs(data_death_country):
+@cached_figure("consumption-government", load_gov_consumption_data, load_death_data)
+def update_gov_consupmtion_graphs(_):
+    gov_consupmtion_data = load_gov_consumption_data()
+    data_death = load_death_data()
     
-    map_fig = px.choropleth(
+    map_fig = animated_choropleth(
         gov_consupmtion_data,
         locations="iso_alpha",
         color="Gov_Consump",
@@ -433,7 +340,7 @@ def update_country_graphs(data_death_country):
     )
 
     line_fig = px.line(
-        data_gov_consupmtion_continet,
+        continent_Gov_Consump(gov_consupmtion_data),
         x='year',
         y='Gov_Consump',
         color='continent',
@@ -441,16 +348,8 @@ def update_country_graphs(data_death_country):
         labels={'Gov_Consump': 'Value', 'year': 'Year'}
     )
     
-    data_death_data_country = data_death[data_death['location'] == data_death_country]
-    data_death_fig = px.line(
-        data_death_data_country,
-        x='year',
-        y='total_cases',
-        title=f"Death Count Analysis for {data_death_country}",
-        labels={'total_cases': 'Count', 'year': 'Year'}
-    )
-    total_deaths_map = px.choropleth(
-        iso_data_death,
+    total_deaths_map = animated_choropleth(
+        data_death,
         locations="iso_alpha",
         color="total_deaths",
         animation_frame="year",
@@ -459,11 +358,37 @@ def update_country_graphs(data_death_country):
         labels={"total_deaths": 'Count'}
     )
 
-    return map_fig, line_fig, data_death_fig ,  total_deaths_map
+    return map_fig, line_fig, total_deaths_map
 
 
+@cached_figure("consumption-death-country", load_death_data)
+def country_graph(data_death_country):
+    data_death = load_death_data()
+    
+    data_death_data_country = data_death[data_death['location'] == data_death_country]
+    data_death_fig = px.line(
+        data_death_data_country,
+        x='year',
+        y='total_cases',
+        title=f"Death Count Analysis for {data_death_country}",
+        labels={'total_cases': 'Count', 'year': 'Year'}
+    )
+
+    return data_death_fig
+
 
 @callback(
+    Output('Total-cases-lineplot', 'figure'),
+    Input("data_death_country", "value")
+)
+
+
+def update_country_graphs(data_death_country):
+    return patch_figures(country_graph(data_death_country))
+
+
+
+@heavy_callback(
     [
         Output('Consupmtion-map', 'figure'),
         Output('Consupmtion-lineplot', 'figure'),
@@ -472,21 +397,25 @@ def update_country_graphs(data_death_country):
     Input("main_category1", "value")
 )
 
+@cached_figure("consumption-private", load_private_consumption_data, load_tourism_data)
 def update_private_consupmtion_graphs(main_category1):
 
     if main_category1 == 1:
-        Consupmtion_map_fig = px.choropleth(
+        private_consupmtion_data = load_private_consumption_data()
+        combined_data = pd.merge(private_consupmtion_data[['continent','year','location']], load_tourism_data(), on=['year','location'], how='inner')
+
+        Consupmtion_map_fig = animated_choropleth(
             private_consupmtion_data,
             locations="iso_alpha",
             color="Consumption",  
             animation_frame="year",
             title="Global Private Consumption Trends",
-            labels={'Consumption': 'Value'}
+            labels={'Consumption': 'Value'},
+            geos=dict(showcoastlines=True, coastlinecolor="Black")
         )
-        Consupmtion_map_fig.update_geos(showcoastlines=True, coastlinecolor="Black")
 
         private_consupmtion_lineplot_fig = px.line(
-            data_private_consupmtion_continet,
+            continent_Consumption(private_consupmtion_data),
             x='year',
             y='Consumption',  
             color='continent',
@@ -495,7 +424,7 @@ def update_private_consupmtion_graphs(main_category1):
         )
 
         Nb_tourists_lineplot_fig = px.line(
-            data_tourist_continet,
+            continent_Tourist(combined_data),
             x='year',
             y='Nb_tourists',
             color='continent',
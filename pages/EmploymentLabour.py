@@ -5,6 +5,12 @@ import plotly.express as px
 import plotly.graph_objs as go
 from dash.dependencies import Input, Output
 import dash_bootstrap_components as dbc
+from utils.registry import dataset
+from utils.figcache import cached_figure
+from utils.figpatch import patch_figures
+from utils.clientside import filter_callback, line_spec, spec_callback, spec_store
+from utils.geo import map_graph
+from utils.webgl import auto_webgl
 
 
 dash.register_page(__name__, path='/EmploymentLabour', name="Employment & Labour Market", order=4)
@@ -14,10 +20,12 @@ dash.register_page(__name__, path='/EmploymentLabour', name="Employment & Labour
 
 ################################### DATA #########################################
 
-df = pd.read_csv("data/economic_data.csv", index_col='date', parse_dates=True)
-df['unemployment rate'] = df['unemployment rate'].str.replace('%', '').astype(float)
+@dataset("data/economic_data.csv")
+def load_unemployment_data():
+    df = pd.read_csv("data/economic_data.csv", index_col='date', parse_dates=True)
+    df['unemployment rate'] = df['unemployment rate'].str.replace('%', '').astype(float)
+    return df
 
-country_options = [{'label': country, 'value': country} for country in df['country'].unique()]
 default_country = "France"
 
 
@@ -39,7 +47,7 @@ layout = html.Div(children=[
         html.Br(),
         html.H3("Global Unemployment Analysis", style={'padding': '5px', 'border-radius': '5px'}),
         html.Br(),
-        dcc.Graph(id='unemployment-map'),
+        map_graph('unemployment-map'),
     ], className='box', style={'margin': '10px', 'padding': '15px'}),
 
     
@@ -50,13 +58,12 @@ layout = html.Div(children=[
             html.Br(),
             dcc.Dropdown(
                 id='country-dropdown',
-                options=country_options,
-                value=default_country,
                 clearable=False,
                 placeholder = 'Select a Country',
             ),
             html.Br(),
             dcc.Graph(id="unemployment-plot", style = {'width': '100%','padding': '10px'}),
+            *spec_store("unemployment-plot"),
             html.Br(),
             html.Br(),
         ], className='box', style={'width': '70%', 'padding': '10px'}),
@@ -84,11 +91,25 @@ layout = html.Div(children=[
 
 ################################### CALLBACKS #########################################
 
+@callback(
+    [
+        Output('country-dropdown', 'options'),
+        Output('country-dropdown', 'value')
+    ],
+    Input('country-dropdown', 'id')
+)
+def update_country_dropdown(_):
+    df = load_unemployment_data()
+    return [{'label': country, 'value': country} for country in df['country'].unique()], default_country
+
+
 @callback(
     Output('unemployment-map', 'figure'),
-    Input('country-dropdown', 'value')
+    Input('unemployment-map', 'id')
 )
-def update_unemployment_map(selected_country):
+@cached_figure("unemployment-map", load_unemployment_data)
+def update_unemployment_map(_):
+    df = load_unemployment_data()
     fig = px.choropleth(
         df.reset_index(),
         locations='country',
@@ -104,14 +125,27 @@ def update_unemployment_map(selected_country):
     return fig
 
 
-@callback(
-    Output('unemployment-plot', 'figure'),
-    Input('country-dropdown', 'value')
-)
-def update_unemployment_plot(selected_country):
+@cached_figure("unemployment-plot", load_unemployment_data)
+def unemployment_plot(selected_country):
+    df = load_unemployment_data()
     filtered_df = df[df['country'] == selected_country]
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=filtered_df.index, y=filtered_df['unemployment rate'], mode='lines', name=selected_country))
     fig.update_layout(title=f"Unemployment Rate Over Time for {selected_country}", height=600, width=900)
-    return fig
+    return auto_webgl(fig)
+
+
+@spec_callback("unemployment-plot")
+@cached_figure("unemployment-plot-spec", load_unemployment_data)
+def unemployment_spec():
+    data = load_unemployment_data().reset_index()
+    return line_spec(unemployment_plot, data, 'country', x='date', y='unemployment rate', sample=default_country, grouped=False)
+
+
+@filter_callback(
+    Output('unemployment-plot', 'figure'),
+    Input('country-dropdown', 'value')
+)
+def update_unemployment_plot(selected_country):
+    return patch_figures(unemployment_plot(selected_country))
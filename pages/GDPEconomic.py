@@ -3,51 +3,37 @@ import dash
 from dash import dcc, html, callback
 import plotly.express as px
 from dash.dependencies import Input, Output
-import country_converter as cc
-import logging
+from utils.registry import dataset
+from utils.static_figures import static_figure, static_graph
+from utils.geo import map_config
+from utils.choropleth import animated_choropleth
+from utils import countries
+from utils.wdi import read_wdi
 
 dash.register_page(__name__, path='/GDPEconomic', name="GDP and Economic Growth", order=1)
 
-logger = logging.getLogger('country_converter')
-logger.setLevel(logging.ERROR)
-
-
 
 
 
 ######################## DATA ###############################
 
-dataR = pd.read_csv("data/GDP.csv", sep=',', skiprows=4, header=None)
-
-def load_process(data):
-    column_names = data.iloc[0]
-    data.columns = column_names
-    data = data.drop(data.index[0])
-    selected_columns = ['Country Name', 2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-    new_data = data[selected_columns]
-    data.columns = data.columns.astype(str)
-    value_vars = [col for col in data.columns[4:] if col != 'nan']
-    melted_data = pd.melt(data, id_vars=['Country Name'], value_vars=value_vars, var_name='year', value_name='GDP')
-    melted_data['year'] = pd.to_numeric(melted_data['year'])
-    filtered_data = melted_data[melted_data['year'].isin([2018, 2019, 2020, 2021, 2022, 2023])]
-    sorted_data = filtered_data.sort_values(['Country Name', 'year'])
-    sorted_data['year'] = sorted_data['year'].astype(int)
-    sorted_data = sorted_data.rename(columns={'Country Name': 'location'})
-    sorted_data['continent'] = cc.convert(names=sorted_data['location'], to='continent')
+def load_process(path):
+    sorted_data = read_wdi(path, 'GDP')
+    sorted_data['continent'] = countries.continent(sorted_data['location'])
     sorted_data = sorted_data[sorted_data['continent'] != 'not found']
     return sorted_data
 
 def continent_gdp(data):
-    gdp_by_continent_year = data.groupby(['continent', 'year'])['GDP'].sum().reset_index()
+    gdp_by_continent_year = data.groupby(['continent', 'year'], observed=True)['GDP'].sum().reset_index()
     return gdp_by_continent_year
 
 def iso_country(data):
-    data['iso_alpha'] = cc.convert(names=data['location'], to='ISO3')
-    return data
+    return data.assign(iso_alpha=countries.iso3(data['location']))
+
+@dataset("data/GDP.csv", version=2)
+def load_gdp_data():
+    return iso_country(load_process("data/GDP.csv"))
 
-sorted_data = load_process(dataR)
-data1 = continent_gdp(sorted_data)
-data2 = iso_country(sorted_data)
 
 
 
@@ -61,7 +47,7 @@ def update_graph_continent(data):
     return fig
 
 def plot_choropleth_map(data):
-    fig = px.choropleth(
+    fig = animated_choropleth(
         data,
         locations="iso_alpha",
         color="GDP",
@@ -71,6 +57,14 @@ def plot_choropleth_map(data):
     )
     return fig
 
+@static_figure("GDP_graph1", load_gdp_data)
+def gdp_continent_figure():
+    return update_graph_continent(continent_gdp(load_gdp_data()))
+
+@static_figure("GDP_graph2", load_gdp_data)
+def gdp_map_figure():
+    return plot_choropleth_map(load_gdp_data())
+
 
 
 
@@ -91,7 +85,7 @@ layout = html.Div(children=[
     html.Div([
         html.Div([
             html.Br(),
-            dcc.Graph(id="GDP_graph1", figure=update_graph_continent(data1)),
+            *static_graph("GDP_graph1"),
         ], className='box', style={'width':'60%', 'margin': '10px'}),
                 
         html.Div([
@@ -116,7 +110,7 @@ layout = html.Div(children=[
             'margin-top': '20px'
         },
         children=[
-            dcc.Graph(id="GDP_graph2", figure=plot_choropleth_map(data2))
+            *static_graph("GDP_graph2", config=map_config())
         ]
     ),
 
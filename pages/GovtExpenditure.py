@@ -4,6 +4,9 @@ from dash import dcc, html, callback
 import plotly.express as px
 from dash.dependencies import Input, Output
 import dash_bootstrap_components as dbc
+from utils.registry import dataset
+from utils.figcache import cached_figure
+from utils.clientside import filter_callback, line_spec, spec_callback, spec_store
 
 dash.register_page(__name__, path='/GovtExpenditure', name="Government Expenditure", order=11)
 
@@ -14,12 +17,16 @@ dash.register_page(__name__, path='/GovtExpenditure', name="Government Expenditu
 ####################### DATA #############################
 
 file_path = 'data/US.GovExpenditures_20241023_083612.csv'
-data = pd.read_csv(file_path)
 
-data = data[(data['Year'] >= 2018) & (data['Year'] <= 2021)]
+@dataset(file_path)
+def load_expenditure_data():
+    data = pd.read_csv(file_path)
+
+    data = data[(data['Year'] >= 2018) & (data['Year'] <= 2021)]
+
+    data['Year'] = data['Year'].astype(int)
+    return data.drop([col for col in data.columns if 'MissingValue' in col], axis=1)
 
-data['Year'] = data['Year'].astype(int)
-filtered_data = data.drop([col for col in data.columns if 'MissingValue' in col], axis=1)
 
 
 
@@ -64,12 +71,11 @@ layout = html.Div(children=[
             html.Label("Select Country"),
             dcc.Dropdown(
                 id="country_dropdown",
-                options=[{'label': country, 'value': country} for country in filtered_data['Economy_Label'].unique()],
-                value=filtered_data['Economy_Label'].unique()[0],
                 clearable=False,
             ),
             html.Br(),
             dcc.Graph(id="expenditure_graph"),
+            *spec_store("expenditure_graph"),
         ], className='box', style={'width': '60%', 'padding': '20px'}),
 
         html.Div([
@@ -123,6 +129,19 @@ layout = html.Div(children=[
 ####################### CALLBACKS #############################
 
 @callback(
+    [
+        Output("country_dropdown", "options"),
+        Output("country_dropdown", "value")
+    ],
+    Input("country_dropdown", "id")
+)
+def update_country_dropdown(_):
+    filtered_data = load_expenditure_data()
+    countries = filtered_data['Economy_Label'].unique()
+    return [{'label': country, 'value': country} for country in countries], countries[0]
+
+
+@filter_callback(
     [
         Output("expenditure_graph", "figure"),
         Output("interpretation", "children")
@@ -130,10 +149,13 @@ layout = html.Div(children=[
     [
         Input("country_dropdown", "value"),
         Input("expenditure_category", "value")
-    ]
+    ],
+    function_name="expenditure"
 )
 
+@cached_figure("expenditure-graph", load_expenditure_data)
 def update_expenditure_graph(selected_country, selected_category):
+    filtered_data = load_expenditure_data()
     filtered_country_data = filtered_data[filtered_data['Economy_Label'] == selected_country]
     
     fig = px.line(
@@ -155,3 +177,21 @@ def update_expenditure_graph(selected_country, selected_category):
         interpretation += f" Expenditures were relatively stable over this period.\n"
 
     return fig, interpretation
+
+
+@spec_callback("expenditure_graph")
+@cached_figure("expenditure-graph-spec", load_expenditure_data)
+def expenditure_spec():
+    filtered_data = load_expenditure_data()
+    categories = [option['value'] for option in radio_main_category.options]
+    sample = filtered_data['Economy_Label'].iloc[0]
+
+    return line_spec(
+        lambda country: update_expenditure_graph(country, categories[0])[0],
+        filtered_data,
+        'Economy_Label',
+        x='Year',
+        y=categories,
+        sample=sample,
+        grouped=False
+    )
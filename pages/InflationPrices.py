@@ -4,8 +4,10 @@ from dash import dcc, html, callback
 import plotly.express as px
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
-import numpy as np
-import plotly.graph_objs as go
+from utils.registry import dataset
+from utils.figcache import cached_figure
+from utils.clientside import filter_callback, line_spec, spec_callback, spec_store
+from utils.webgl import auto_webgl
 
 
 dash.register_page(__name__, path='/InflationPrices', name="Inflation and Prices", order=5)
@@ -15,6 +17,7 @@ dash.register_page(__name__, path='/InflationPrices', name="Inflation and Prices
 ################################### DATA #########################################
 
 ###### CONSUMER PRICES ######
+@dataset("data/consumer_prices.csv")
 def consumer_prices_data():
     data = pd.read_csv("data/consumer_prices.csv", sep=',')
     # link to the dataset: https://unctadstat.unctad.org/datacentre/dataviewer/US.Cpi_A
@@ -43,6 +46,7 @@ def consumer_prices_data():
 
 
 ###### COMMODITY PRICES ######
+@dataset("data/CommodityPrices.csv")
 def commodity_prices_data():
     data_commodity = pd.read_csv("data/CommodityPrices.csv", sep=',')
     # link: https://unctadstat.unctad.org/datacentre/dataviewer/US.CommodityPrice_A
@@ -110,7 +114,7 @@ def consumer_price_chart(ctry):
                 labels = {'Year': 'Year', 'Consumer Price': 'Consumer Price (Index Base 10)'},
                 markers = True)
     
-    return fig
+    return auto_webgl(fig)
 
 
 def commodity_price_chart(comm):
@@ -128,7 +132,19 @@ def commodity_price_chart(comm):
                 labels = {'Year': 'Phase', 'Commodity Price': 'Price of Commodity'},
                 markers = True)
     
-    return fig
+    return auto_webgl(fig)
+
+
+@spec_callback("consumer_graph")
+@cached_figure("consumer-prices-spec", consumer_prices_data)
+def consumer_price_spec():
+    return line_spec(consumer_price_chart, consumer_prices_data(), 'Country', x='Year', y='Consumer Price', sample='France', overall='Overall')
+
+
+@spec_callback("commodity_graph")
+@cached_figure("commodity-prices-spec", commodity_prices_data)
+def commodity_price_spec():
+    return line_spec(commodity_price_chart, commodity_prices_data(), 'Commodity', x='Year', y='Commodity Price', sample='Bananas', overall='Overall')
 
 
 
@@ -138,8 +154,9 @@ def commodity_price_chart(comm):
 
 ######################################### WIDGETS #########################################
 
-dropdown_countries = dcc.Dropdown(id="ctry_cpi_name_col", options = make_dropdown("Consumer"), value = "France", clearable=False)
-dropdown_commodities = dcc.Dropdown(id="commodity_name_col", options = make_dropdown("Commodity"), value = "Bananas", clearable=False)
+# Their options come from the data; callbacks fill them in when the page loads.
+dropdown_countries = dcc.Dropdown(id="ctry_cpi_name_col", clearable=False)
+dropdown_commodities = dcc.Dropdown(id="commodity_name_col", clearable=False)
 
 
 
@@ -259,6 +276,7 @@ layout = html.Div(children=[
             dropdown_countries, 
             html.Br(), 
             dcc.Graph(id="consumer_graph"),
+            *spec_store("consumer_graph"),
 
             html.Br(),
             html.Br(),
@@ -305,6 +323,7 @@ layout = html.Div(children=[
             dropdown_commodities, 
             html.Br(), 
             dcc.Graph(id="commodity_graph"),
+            *spec_store("commodity_graph"),
 
             html.Br(),
             html.Br(),
@@ -433,15 +452,31 @@ layout = html.Div(children=[
 ################################### CALLBACKS #########################################
 
 
-@callback(Output("consumer_graph", "figure"),
+@callback([Output("ctry_cpi_name_col", "options"), Output("ctry_cpi_name_col", "value")],
+        Input('ctry_cpi_name_col', 'id'))
+
+def update_dropdown_countries(_):
+    return make_dropdown("Consumer"), "France"
+
+
+@callback([Output("commodity_name_col", "options"), Output("commodity_name_col", "value")],
+        Input('commodity_name_col', 'id'))
+
+def update_dropdown_commodities(_):
+    return make_dropdown("Commodity"), "Bananas"
+
+
+@filter_callback(Output("consumer_graph", "figure"),
         Input('ctry_cpi_name_col', 'value'))
 
+@cached_figure("consumer-prices", consumer_prices_data)
 def update_graph_consumer(ctry_cpi_name_col):
     return consumer_price_chart(ctry_cpi_name_col)
 
 
-@callback(Output("commodity_graph", "figure"),
+@filter_callback(Output("commodity_graph", "figure"),
         Input('commodity_name_col', 'value'))
 
+@cached_figure("commodity-prices", commodity_prices_data)
 def update_graph_commodity(commodity_name_col):
     return commodity_price_chart(commodity_name_col)
@@ -3,8 +3,12 @@ import dash
 from dash import dcc, html, callback
 import plotly.express as px
 from dash.dependencies import Output
-import country_converter as cc
-import logging
+from utils.registry import dataset
+from utils.static_figures import static_figure, static_graph
+from utils.geo import map_config
+from utils.choropleth import animated_choropleth
+from utils import countries
+from utils.wdi import read_wdi
 
 dash.register_page(__name__, path='/InvestmentAnalysis', name="Investment Statistics", order=13)
 
@@ -14,39 +18,22 @@ dash.register_page(__name__, path='/InvestmentAnalysis', name="Investment Statis
 
 ####################### DATA #############################
 
-logger = logging.getLogger('country_converter')
-logger.setLevel(logging.ERROR)
-
-dataR = pd.read_csv("data/Investment_data.csv", sep=',', skiprows=4, header=None)
-
-def load_process(data):
-    column_names = data.iloc[0]
-    data.columns = column_names
-    data = data.drop(data.index[0])
-    selected_columns = ['Country Name', 2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-    new_data = data[selected_columns]
-    data.columns = data.columns.astype(str)
-    value_vars = [col for col in data.columns[4:] if col != 'nan']
-    melted_data = pd.melt(data, id_vars=['Country Name'], value_vars=value_vars, var_name='year', value_name='Investment')
-    melted_data['year'] = pd.to_numeric(melted_data['year'])
-    filtered_data = melted_data[melted_data['year'].isin([2018, 2019, 2020, 2021, 2022, 2023])]
-    sorted_data = filtered_data.sort_values(['Country Name', 'year'])
-    sorted_data['year'] = sorted_data['year'].astype(int)
-    sorted_data = sorted_data.rename(columns={'Country Name': 'location'})
-    sorted_data['continent'] = cc.convert(names=sorted_data['location'], to='continent')
+def load_process(path):
+    sorted_data = read_wdi(path, 'Investment')
+    sorted_data['continent'] = countries.continent(sorted_data['location'])
     sorted_data = sorted_data[sorted_data['continent'] != 'not found']
     return sorted_data
 
 def continent_Investment(data):
-    return data.groupby(['continent', 'year'])['Investment'].sum().reset_index()
+    return data.groupby(['continent', 'year'], observed=True)['Investment'].sum().reset_index()
 
 def iso_country(data):
-    data['iso_alpha'] = cc.convert(names=data['location'], to='ISO3')
-    return data
+    return data.assign(iso_alpha=countries.iso3(data['location']))
+
+@dataset("data/Investment_data.csv", version=2)
+def load_investment_data():
+    return iso_country(load_process("data/Investment_data.csv"))
 
-sorted_data = load_process(dataR)
-data1 = continent_Investment(sorted_data)
-data2 = iso_country(sorted_data)
 
 
 
@@ -65,21 +52,29 @@ def update_graph_continent(data):
     return fig
 
 def plot_choropleth_map(data):
-    fig = px.choropleth(
+    fig = animated_choropleth(
         data,
         locations="iso_alpha",
         color="Investment",
         hover_name="location",
         animation_frame="year",
         color_continuous_scale=px.colors.sequential.Viridis,
-    )
-    fig.update_layout(
-        title='Global Investment Over Time',
-        title_x=0.5,
-        font=dict(family="Arial, sans-serif", size=12)
+        layout=dict(
+            title='Global Investment Over Time',
+            title_x=0.5,
+            font=dict(family="Arial, sans-serif", size=12)
+        ),
     )
     return fig
 
+@static_figure("Investment_graph1", load_investment_data)
+def investment_continent_figure():
+    return update_graph_continent(continent_Investment(load_investment_data()))
+
+@static_figure("Investment_graph2", load_investment_data)
+def investment_map_figure():
+    return plot_choropleth_map(load_investment_data())
+
 
 
 
@@ -99,7 +94,7 @@ layout = html.Div(children=[
     html.Div([
         html.Div([
             html.Br(),
-            dcc.Graph(id="Investment_graph1", figure=update_graph_continent(data1)),
+            *static_graph("Investment_graph1"),
         ],className='box', style={'width':'60%','margin': '10px'}),
                 
             
@@ -124,7 +119,7 @@ layout = html.Div(children=[
             'margin-top': '20px'
         },
         children=[
-            dcc.Graph(id="Investment_graph2", figure=plot_choropleth_map(data2))
+            *static_graph("Investment_graph2", config=map_config())
         ]
     ),
 
@@ -1,12 +1,15 @@
 import pandas as pd
 import dash
-from dash import dcc, html, callback
+from dash import dcc, html, callback, clientside_callback, ClientsideFunction
 import plotly.express as px
+import plotly.graph_objects as go
 from dash.dependencies import Input, Output, State
-import dash_daq as daq
 import dash_bootstrap_components as dbc
-import numpy as np
-import plotly.graph_objs as go
+from utils.registry import dataset
+from utils.figcache import cached_figure
+from utils.clientside import CLIENTSIDE_FILTERING, clientside_filter, line_spec, spec_store
+from utils.downsample import resample, series, to_nanoseconds
+from utils.webgl import auto_webgl
 
 dash.register_page(__name__, path='/StockMarket', name="Stocks and Finances", order=2)
 
@@ -17,6 +20,7 @@ dash.register_page(__name__, path='/StockMarket', name="Stocks and Finances", or
 
 
 ###### STOCKS TRADED ######
+@dataset("data/StocksTraded.csv", version=2)
 def stocks_traded_data():
     data = pd.read_csv("data/StocksTraded.csv", sep=',')
     # link to the dataset: https://databank.worldbank.org/reports.aspx?source=2&series=CM.MKT.TRAD.CD&country=#
@@ -37,10 +41,17 @@ def stocks_traded_data():
                                 var_name = 'Year', 
                                 value_name = 'Stocks Traded'
                                 )
+
+    # The CSV holds the amounts as text; with the ".." replaced by 0 the
+    # column would mix str and int, which neither the disk cache nor the
+    # shared store can encode.
+    melted_data['Stocks Traded'] = pd.to_numeric(melted_data['Stocks Traded'], errors='coerce')
+
     return melted_data
 
 
 ###### CURRENCY RATES ######
+@dataset("data/CurrencyRates.csv")
 def currency_rates_data():
     data = pd.read_csv("data/CurrencyRates.csv", sep=',')
     # link to the dataset: https://databank.worldbank.org/reports.aspx?source=2&series=PA.NUS.FCRF&country=#
@@ -69,6 +80,7 @@ def currency_rates_data():
 
 
 ###### STOCK INDICES ######
+@dataset("data/Stock_SP_500.csv", "data/Stock_Russel_2000.csv", "data/Stock_OMX_Nordic40.csv", "data/Stock_NYSE_Comp.csv")
 def stock_indices_data():
     data_SP500 = pd.read_csv("data/Stock_SP_500.csv", sep=',')
     data_Russel_2000 = pd.read_csv("data/Stock_Russel_2000.csv", sep=',')
@@ -98,6 +110,30 @@ def stock_indices_data():
     return data_stock
 
 
+###### STOCK INDICES (DAILY) ######
+STOCK_INDICES = [
+    ("data/Stock_SP_500.csv", "SP 500"),
+    ("data/Stock_Russel_2000.csv", "Russel 2000"),
+    ("data/Stock_OMX_Nordic40.csv", "OMX Nordic 40"),
+    ("data/Stock_NYSE_Comp.csv", "NYSE Composite"),
+]
+
+@dataset(*[path for path, _ in STOCK_INDICES])
+def stock_indices_daily_data():
+    # One row per index and trading day, for the daily chart.
+    frames = []
+    for path, name in STOCK_INDICES:
+        data = pd.read_csv(path, sep=',', usecols=['Date', 'Close/Last'])
+        data['Date'] = pd.to_datetime(data['Date'], format='%m/%d/%Y')
+        data['Close/Last'] = pd.to_numeric(data['Close/Last'], errors='coerce')
+        data.insert(0, 'Stock', name)
+        frames.append(data)
+
+    data_stock = pd.concat(frames, ignore_index=True).sort_values(['Stock', 'Date'], ignore_index=True)
+    data_stock.rename(columns={'Close/Last':'Price(USD)'},inplace=True)
+    return data_stock
+
+
 ###### DROPDOWN CREATION ######
 def make_ctry_dropdown(s):
     if (s == "Stocks Traded"):
@@ -135,10 +171,6 @@ radio_main_category= dbc.RadioItems(
         inline=True
     )
 
-ctry_dropdown_stocks_traded = dcc.Dropdown(id="stocks_traded_column", options = make_ctry_dropdown("Stocks Traded"), value = "France", clearable=False)
-ctry_dropdown_currency = dcc.Dropdown(id="currency_column", options = make_ctry_dropdown("Currency"), value = "France", clearable=False)
-ctry_dropdown_stock = dcc.Dropdown(id="stock_column", options = make_ctry_dropdown("Stock"), value = "SP 500", clearable=False)
-
 
 
 
@@ -159,7 +191,7 @@ def stocks_traded_chart(ctry):
                 title = f'Impact of Covid-19 on Stocks Traded in {ctry}',
                 labels = {'Year': 'Year', 'Stocks Traded': 'Stocks Traded (in USD)'},
                 markers = True)
-  return fig
+  return auto_webgl(fig)
 
 
 def currency_rates_chart(ctry):
@@ -176,7 +208,7 @@ def currency_rates_chart(ctry):
                 title = f'Impact of Covid-19 on Currency Rates in {ctry}',
                 labels = {'Year': 'Year', 'Currency Rates': 'Currency Rates (as per USD)'},
                 markers = True)
-    return fig
+    return auto_webgl(fig)
 
 
 def stock_indices_chart(stock):
@@ -193,7 +225,45 @@ def stock_indices_chart(stock):
         title = f'Impact of Covid-19 on {stock}',
         markers = True)
     
-    return fig
+    return auto_webgl(fig)
+
+
+@cached_figure("stock-daily", stock_indices_daily_data)
+def stock_daily_chart(stocks, start, end, points):
+    # Each index between start and end (int64 ns, None for no bound),
+    # downsampled to `points` with LTTB.
+    indices = series(stock_indices_daily_data, 'Stock', 'Date', 'Price(USD)')
+    fig = go.Figure()
+    shown = total = 0
+    for stock in stocks:
+        if stock not in indices:
+            continue
+        x, y, rows = resample(*indices[stock], start, end, points)
+        fig.add_trace(go.Scatter(x=x.astype('datetime64[ns]'), y=y, mode='lines', name=stock))
+        shown += len(x)
+        total += rows
+
+    fig.update_layout(
+        title=f'Daily closing prices ({shown:,} of {total:,} points shown)',
+        xaxis_title='Date',
+        yaxis_title='Price(USD)',
+        hovermode='x unified',
+        # Keeps the user's zoom when the resampled series comes back.
+        uirevision='stock-daily',
+    )
+    return auto_webgl(fig)
+
+
+@cached_figure("stock-market-spec", stocks_traded_data, currency_rates_data, stock_indices_data)
+def indiv_cat_spec(main_category):
+    if main_category == 0:
+        chart, data, key, y = stocks_traded_chart, stocks_traded_data(), 'Country', 'Stocks Traded'
+    elif main_category == 1:
+        chart, data, key, y = currency_rates_chart, currency_rates_data(), 'Country', 'Currency Rates'
+    else:
+        chart, data, key, y = stock_indices_chart, stock_indices_data(), 'Stock', 'Price(USD)'
+
+    return line_spec(chart, data, key, x='Year', y=y, sample=str(data[key].iloc[0]))
 
 
 
@@ -229,7 +299,8 @@ layout = html.Div(children=[
             html.Br(),
             dcc.Dropdown(id="opt_dropdown", placeholder="Choose an option: "), 
             html.Br(), 
-            dcc.Graph(id="indiv_cat_graph")],
+            dcc.Graph(id="indiv_cat_graph"),
+            *spec_store("indiv_cat_graph")],
         className='box', style={'width': '33%'}),
 
         html.Div([
@@ -248,6 +319,21 @@ layout = html.Div(children=[
 
     # SECOND ROW TEXT CONTAINER
     html.Div(id = "comment2" ,className='box', style={'width': '100%'}),
+
+    # DAILY STOCK INDICES
+    html.Div([
+        html.Label("DAILY CLOSING PRICES OF THE STOCK INDICES (ZOOM IN FOR EVERY TRADING DAY)"),
+        html.Br(),
+        html.Br(),
+        dcc.Dropdown(
+            id="stock_daily_dropdown",
+            options=[{'label': name, 'value': name} for _, name in STOCK_INDICES],
+            value=[name for _, name in STOCK_INDICES],
+            multi=True,
+        ),
+        dcc.Graph(id="stock_daily_graph"),
+        dcc.Store(id="stock_daily_view"),
+    ], className='box', style={'margin': '10px', 'padding-top': '15px', 'padding-bottom': '15px'}),
     
     html.Br(),
     html.Br(),
@@ -261,20 +347,7 @@ layout = html.Div(children=[
 
 ################################### CALLBACKS #########################################
 
-@callback(
-    [
-        Output("opt_dropdown", "options"),
-        Output("comment1", "children"),
-        Output("indiv_cat_graph", "figure"),
-        Output("overall_graph", "figure"),
-        Output("comment2", "children"),
-    ],
-    [
-        Input("main_category", "value"),
-        Input("opt_dropdown", "value")
-    ]
-)
-
+@cached_figure("stock-market", stocks_traded_data, currency_rates_data, stock_indices_data)
 def update_graph_st(main_category, opt_dropdown_value):
 
     if main_category == 0:
@@ -445,3 +518,65 @@ def update_graph_st(main_category, opt_dropdown_value):
         overall_fig = stock_indices_chart("Overall")
 
     return options, comment1, fig, overall_fig, comment2
+
+
+if CLIENTSIDE_FILTERING:
+    # Only a change of category reaches the server; the per-option chart is
+    # drawn in the browser from the spec of the selected category.
+    @callback(
+        [
+            Output("opt_dropdown", "options"),
+            Output("comment1", "children"),
+            Output("overall_graph", "figure"),
+            Output("comment2", "children"),
+            Output("indiv_cat_graph-spec", "data"),
+        ],
+        Input("main_category", "value")
+    )
+    def update_category_st(main_category):
+        options, comment1, _, overall_fig, comment2 = update_graph_st(main_category, None)
+        return options, comment1, overall_fig, comment2, indiv_cat_spec(main_category)
+
+    clientside_filter(Output("indiv_cat_graph", "figure"), Input("opt_dropdown", "value"))
+
+else:
+    callback(
+        [
+            Output("opt_dropdown", "options"),
+            Output("comment1", "children"),
+            Output("indiv_cat_graph", "figure"),
+            Output("overall_graph", "figure"),
+            Output("comment2", "children"),
+        ],
+        [
+            Input("main_category", "value"),
+            Input("opt_dropdown", "value")
+        ]
+    )(update_graph_st)
+
+
+# The browser reports the plot width and the visible dates of the daily
+# chart (assets/resample.js); the server answers with that window resampled
+# to about one point per pixel.
+clientside_callback(
+    ClientsideFunction(namespace="resample", function_name="view"),
+    Output("stock_daily_view", "data"),
+    Input("stock_daily_graph", "relayoutData"),
+    State("stock_daily_graph", "id"),
+    State("stock_daily_view", "data"),
+)
+
+
+@callback(
+    Output("stock_daily_graph", "figure"),
+    [
+        Input("stock_daily_view", "data"),
+        Input("stock_daily_dropdown", "value")
+    ]
+)
+def update_daily_graph(view, stocks):
+    view = view or {}
+    start, end = view.get("range") or (None, None)
+    # Widths are rounded up to 100 px so that similar screens share figures.
+    points = -(-int(view.get("width") or 800) // 100) * 100
+    return stock_daily_chart(tuple(stocks or ()), to_nanoseconds(start), to_nanoseconds(end), points)
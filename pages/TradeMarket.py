@@ -3,12 +3,17 @@ import dash
 from dash import dcc, html , callback
 import plotly.express as px  
 import pandas as pd  
-import dash_daq as daq
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output  , State
-from plotly.subplots import make_subplots
-import country_converter as cc
 import plotly.graph_objects as go
+from utils.registry import dataset
+from utils.figcache import cached_figure
+from utils.figpatch import patch_figures
+from utils.background import heavy_callback
+from utils.geo import map_graph
+from utils.choropleth import animated_choropleth
+from utils import countries
+from utils.wdi import read_wdi
 
 
 dash.register_page(__name__, path='/TradeMarket', name="Trade Market", order=3)
@@ -19,112 +24,66 @@ dash.register_page(__name__, path='/TradeMarket', name="Trade Market", order=3)
 
 ################################### DATA #########################################
 
-dataR = pd.read_csv("data/Export.csv", sep=',', skiprows=4, header=None)
-dataI = pd.read_csv("data/Import.csv", sep=',', skiprows=4, header=None)
-dataM = pd.read_csv("data/manufacturing.csv", sep=',', skiprows=4, header=None)
-
-
 ###### EXPORT ######
-def load_process_export(data):
-    column_names = data.iloc[0]
-    data.columns = column_names
-    data = data.drop(data.index[0])
-    
-    selected_columns = ['Country Name', 2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-    data = data[selected_columns]
+def load_process_export(path):
+    melted_data = read_wdi(path, 'Export')
 
-    data.columns = data.columns.astype(str)
-    data = data.rename(columns={'Country Name': 'location'})
-    data['diff_2020_2019_export'] = data['2020.0'] - data['2019.0']
-    
-    value_vars = ['2018.0', '2019.0', '2020.0', '2021.0', '2022.0', '2023.0']
-    melted_data = pd.melt(data, id_vars=['location', 'diff_2020_2019_export'], value_vars=value_vars, var_name='year', value_name='Export')
-    
-    melted_data['year'] = pd.to_numeric(melted_data['year'])
-    melted_data = melted_data.sort_values(['location', 'year'])
-    melted_data['year'] = melted_data['year'].astype(int)
-    melted_data['continent'] = cc.convert(names=melted_data['location'], to='continent')    
+    by_year = melted_data.pivot(index='location', columns='year', values='Export')
+    diff_2020_2019 = by_year[2020] - by_year[2019]
+    melted_data.insert(1, 'diff_2020_2019_export', melted_data['location'].map(diff_2020_2019))
+
+    melted_data['continent'] = countries.continent(melted_data['location'])    
     melted_data = melted_data[melted_data['continent'] != 'not found']
     
     return melted_data
 
 def continent_Export(data):
-  Import_by_continent_year = data.groupby(['continent', 'year'])['Export'].sum().reset_index()
+  Import_by_continent_year = data.groupby(['continent', 'year'], observed=True)['Export'].sum().reset_index()
   return Import_by_continent_year
 
 
 
 ###### MANUFACTURING ######
-def load_process_manufacturing(data):
-  column_names = data.iloc[0]
-  data.columns = column_names
-  data = data.drop(data.index[0])
-  selected_columns = ['Country Name',2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-  new_data = data[selected_columns]
-  data.columns = data.columns.astype(str)
-  value_vars = [col for col in data.columns[4:] if col != 'nan']
-  melted_data = pd.melt(data, id_vars=['Country Name'], value_vars=value_vars, var_name='year', value_name='Manufacturing')
-  melted_data['year'] = pd.to_numeric(melted_data['year'])
-  filtered_data = melted_data[melted_data['year'].isin([2018,2019,2020, 2021, 2022, 2023])]
-  unique_years = filtered_data['year'].unique()
-  sorted_data = filtered_data.sort_values('Country Name')
-  sorted_data = filtered_data.sort_values(['Country Name', 'year'])
-  sorted_data['year'] = sorted_data['year'].astype(int)
-  sorted_data = sorted_data.rename(columns={'Country Name': 'location'})
-    
-  return sorted_data
+def load_process_manufacturing(path):
+  return read_wdi(path, 'Manufacturing')
 
 
 ###### IMPORT ######
-def load_process_import(data):
-  column_names = data.iloc[0]
-  data.columns = column_names
-  data = data.drop(data.index[0])
-  selected_columns = ['Country Name',2018.0, 2019.0, 2020.0, 2021.0, 2022.0, 2023.0]
-  new_data = data[selected_columns]
-  data.columns = data.columns.astype(str)
-  value_vars = [col for col in data.columns[4:] if col != 'nan']
-  melted_data = pd.melt(data, id_vars=['Country Name'], value_vars=value_vars, var_name='year', value_name='Import')
-  melted_data['year'] = pd.to_numeric(melted_data['year'])
-  filtered_data = melted_data[melted_data['year'].isin([2018,2019,2020, 2021, 2022, 2023])]
-  unique_years = filtered_data['year'].unique()
-  sorted_data = filtered_data.sort_values('Country Name')
-  sorted_data = filtered_data.sort_values(['Country Name', 'year'])
-  sorted_data['year'] = sorted_data['year'].astype(int)
-  sorted_data = sorted_data.rename(columns={'Country Name': 'location'})
-  sorted_data['continent'] = cc.convert(names=sorted_data['location'], to='continent')
-  nan_count_continent = sorted_data['continent'].isnull().sum()
-  nan_count_continent = sorted_data['Import'].isnull().sum()
-  nan_counts_by_year = sorted_data.groupby('year')['Import'].apply(lambda x: x.isnull().sum())
+def load_process_import(path):
+  sorted_data = read_wdi(path, 'Import')
+  sorted_data['continent'] = countries.continent(sorted_data['location'])
   sorted_data = sorted_data[sorted_data['continent'] != 'not found']
   return sorted_data
 
 def continent_Import(data):  
-  Import_by_continent_year = data.groupby(['continent', 'year'])['Import'].sum().reset_index()
+  Import_by_continent_year = data.groupby(['continent', 'year'], observed=True)['Import'].sum().reset_index()
   return Import_by_continent_year
 
 def iso_country(data):   
-   data['iso_alpha'] = cc.convert(names=data['location'], to='ISO3')
-   return data
+   return data.assign(iso_alpha=countries.iso3(data['location']))
    
 
 ###### LOADING AND PROCESSING DATA ######    
-export_data_not_iso = load_process_export(dataR)
-manufacturing_data = load_process_manufacturing(dataM)
-export_data=iso_country(export_data_not_iso)
-import_data_not_iso=load_process_import(dataI)
-export_data_continent=continent_Export(export_data_not_iso)
-import_data_continent=continent_Import(import_data_not_iso)
-import_data=iso_country(import_data_not_iso)
+@dataset("data/Export.csv", version=2)
+def load_export_data():
+  return iso_country(load_process_export("data/Export.csv"))
+
+@dataset("data/Import.csv", version=2)
+def load_import_data():
+  return iso_country(load_process_import("data/Import.csv"))
+
+@dataset("data/manufacturing.csv", version=2)
+def load_manufacturing_data():
+  return load_process_manufacturing("data/manufacturing.csv")
 
 
 
 ###### MAKING THE DROPDOWN ######
 def make_ctry_dropdown(category):
     if category == "Export":
-        df = export_data  
+        df = load_export_data()
     elif category == "Import":
-        df = import_data  
+        df = load_import_data()
     return [{'label': country, 'value': country} for country in df['location'].unique()]
 
 
@@ -136,22 +95,6 @@ def make_ctry_dropdown(category):
 
 ######################################### WIDGETS #########################################
 
-options=[{'label': country, 'value': country} for country in export_data['location'].unique()]
-
-ctry_dropdown_Export = dcc.Dropdown(
-    id="Export_column",
-    options=make_ctry_dropdown("Export"),  
-    value="France",
-    clearable=False
-)
-
-ctry_dropdown_Import = dcc.Dropdown(
-    id="Import_column",
-    options=make_ctry_dropdown("Import"),  
-    value="France",
-    clearable=False
-)
-
 radio_main_category= dbc.RadioItems(
         id='main_category', 
         className='radio',
@@ -208,6 +151,7 @@ layout = html.Div(children=[
 def display_layout(main_category):
     
     if main_category == 0: # EXPORTS
+        export_data = load_export_data()
         
         ret = html.Div([
             html.Div([
@@ -231,7 +175,7 @@ def display_layout(main_category):
                     html.Br(),
                     dcc.Graph(id='exports-lineplot'),
                     html.Br(),
-                    dcc.Graph(id='exports-map'),
+                    map_graph('exports-map', level='simple'),
                     html.Br(),
                 ], className='box', style={'width': '50%', 'padding': '10px'}),
             ], style={'display': 'flex', 'width': '100%'}),
@@ -271,7 +215,7 @@ def display_layout(main_category):
             html.Div([
                 html.Div([
                     html.Br(),
-                    dcc.Graph(id='imports-map'),
+                    map_graph('imports-map', level='simple'),
                     html.Br(),
                 ], className='box', style={'width': '50%', 'padding': '10px'}),
             
@@ -314,19 +258,19 @@ def display_layout(main_category):
 
 
 # Callback for export
-@callback(
+@heavy_callback(
     [
         Output('exports-map', 'figure'),
-        Output('exports-lineplot', 'figure'),
-        Output('export-lineplot-country', 'figure'),
-        Output('manufacturing-lineplot', 'figure')
+        Output('exports-lineplot', 'figure')
     ],
-    Input("export_country", "value")
+    Input('exports-map', 'id')
 )
 
-def update_country_graphs(export_country):
+@cached_figure("trade-exports", load_export_data)
+def update_export_graphs(_):
+    export_data = load_export_data()
     
-    map_fig = px.choropleth(
+    map_fig = animated_choropleth(
         export_data,
         locations="iso_alpha",
         color="Export",
@@ -335,21 +279,29 @@ def update_country_graphs(export_country):
         labels={'Export': 'Export Value'}
     )
     
-    export_data_country = export_data_not_iso[export_data_not_iso['location'] == export_country]
-    export_lineplot_country_fig = px.line(
-        export_data_country,
+    line_fig = px.line(
+        continent_Export(export_data),
         x='year',
         y='Export',
-        title=f"Export Over Time for {export_country}",
+        color='continent',
+        title="Export by Continent",
         labels={'Export': 'Export Value', 'year': 'Year'}
     )
+
+    return map_fig, line_fig
+
+
+@cached_figure("trade-export-country", load_export_data, load_manufacturing_data)
+def country_graphs(export_country):
+    export_data = load_export_data()
+    manufacturing_data = load_manufacturing_data()
     
-    line_fig = px.line(
-        export_data_continent,
+    export_data_country = export_data[export_data['location'] == export_country]
+    export_lineplot_country_fig = px.line(
+        export_data_country,
         x='year',
         y='Export',
-        color='continent',
-        title="Export by Continent",
+        title=f"Export Over Time for {export_country}",
         labels={'Export': 'Export Value', 'year': 'Year'}
     )
     
@@ -362,12 +314,24 @@ def update_country_graphs(export_country):
         labels={'Manufacturing': 'Manufacturing Value', 'year': 'Year'}
     )
 
-    return map_fig, line_fig, export_lineplot_country_fig, manufacturing_fig
+    return export_lineplot_country_fig, manufacturing_fig
+
+
+@callback(
+    [
+        Output('export-lineplot-country', 'figure'),
+        Output('manufacturing-lineplot', 'figure')
+    ],
+    Input("export_country", "value")
+)
+
+def update_country_graphs(export_country):
+    return patch_figures(country_graphs(export_country))
 
 
 
 # Callback for import
-@callback(
+@heavy_callback(
     [
         Output('imports-map', 'figure'),
         Output('imports-lineplot', 'figure')
@@ -375,21 +339,23 @@ def update_country_graphs(export_country):
     Input("main_category", "value")
 )
 
+@cached_figure("trade-imports", load_import_data)
 def update_import_graphs(main_category):
     
     if main_category == 1:
-        imports_map_fig = px.choropleth(
+        import_data = load_import_data()
+        imports_map_fig = animated_choropleth(
             import_data,
             locations="iso_alpha",
             color="Import",
             animation_frame="year",
             title="Import by Countries",
-            labels={'Import': 'Import Value'}
+            labels={'Import': 'Import Value'},
+            geos=dict(showcoastlines=True, coastlinecolor="Black")
         )
-        imports_map_fig.update_geos(showcoastlines=True, coastlinecolor="Black")
         
         imports_lineplot_fig = px.line(
-            import_data_continent,
+            continent_Import(import_data),
             x='year',
             y='Import',
             color='continent',
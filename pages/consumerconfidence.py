@@ -4,7 +4,11 @@ import plotly.express as px
 import pandas as pd
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output
-import country_converter as coco
+from utils.registry import dataset
+from utils.static_figures import static_figure, static_graph
+from utils.geo import map_config
+from utils.choropleth import animated_choropleth
+from utils import countries
 
 
 dash.register_page(__name__, path='/ConsumerConfidence', name="Consumer Confidence Analysis", order=70)
@@ -16,18 +20,21 @@ dash.register_page(__name__, path='/ConsumerConfidence', name="Consumer Confiden
 
 ####################### DATA #############################
 
-df = pd.read_csv("data/consumer_idx.csv")
+@dataset("data/consumer_idx.csv")
+def load_consumer_confidence_data():
+    df = pd.read_csv("data/consumer_idx.csv")
 
-df_long = pd.melt(df, id_vars=['Time period'], var_name='date', value_name='consumer_confidence')
-df_long['date'] = pd.to_datetime(df_long['date'], errors='coerce')  
-df_long.rename(columns={'Time period': 'country'}, inplace=True)
-df_long.dropna(inplace=True) 
+    df_long = pd.melt(df, id_vars=['Time period'], var_name='date', value_name='consumer_confidence')
+    df_long['date'] = pd.to_datetime(df_long['date'], errors='coerce')  
+    df_long.rename(columns={'Time period': 'country'}, inplace=True)
+    df_long.dropna(inplace=True) 
 
-df_long['iso_alpha'] = coco.convert(names=df_long['country'], to='ISO3')
-df_long['continent'] = coco.convert(names=df_long['country'], to='continent')
+    df_long['iso_alpha'] = countries.iso3(df_long['country'])
+    df_long['continent'] = countries.continent(df_long['country'])
+
+    df_long['year'] = df_long['date'].dt.year
+    return df_long
 
-df_long['year'] = df_long['date'].dt.year
-df_continent = df_long.groupby(['continent', 'year'])['consumer_confidence'].mean().reset_index()
 
 
 
@@ -49,7 +56,7 @@ layout = html.Div(children=[
             html.Br(),
             html.H3("Consumer Confidence by Country:", style={'padding': '5px', 'border-radius': '5px'}),
             html.Br(),
-            dcc.Graph(id="consumer-confidence-map"),
+            *static_graph("consumer-confidence-map", config=map_config()),
             html.Br(),
         ], className='box', style={'width': '50%', 'padding': '10px'}),
 
@@ -57,7 +64,7 @@ layout = html.Div(children=[
             html.Br(),
             html.H4("Consumer Confidence Trends by Continent", style={'padding': '5px', 'border-radius': '5px'}),
             html.Br(),
-            dcc.Graph(id="consumer-confidence-continent-line"),
+            *static_graph("consumer-confidence-continent-line"),
             html.Br(),
         ], className='box', style={'width': '50%', 'padding': '10px'}),
     ], style={'display': 'flex', 'width':'100%','justify-content': 'space-between', 'margin': '20px'}),
@@ -116,16 +123,12 @@ layout = html.Div(children=[
 
 
 
-####################### CALLBACKS #############################
-
-@callback(
-    Output('consumer-confidence-map', 'figure'),
-    Input('consumer-confidence-map', 'id')  
-)
+####################### FIGURES #############################
 
-def update_consumer_confidence_map(_):
-    fig = px.choropleth(
-        df_long,
+@static_figure("consumer-confidence-map", load_consumer_confidence_data)
+def consumer_confidence_map():
+    fig = animated_choropleth(
+        load_consumer_confidence_data(),
         locations='iso_alpha',
         color='consumer_confidence',
         animation_frame='year',
@@ -135,11 +138,10 @@ def update_consumer_confidence_map(_):
     return fig
 
 
-@callback(
-    Output('consumer-confidence-continent-line', 'figure'),
-    Input('consumer-confidence-map', 'id')  
-)
-def update_continent_line_plot(_):
+@static_figure("consumer-confidence-continent-line", load_consumer_confidence_data)
+def continent_line_plot():
+    df_long = load_consumer_confidence_data()
+    df_continent = df_long.groupby(['continent', 'year'], observed=True)['consumer_confidence'].mean().reset_index()
     fig = px.line(
         df_continent,
         x='year',
@@ -2,6 +2,10 @@ import dash
 from dash import dcc, html, Input, Output
 import pandas as pd
 import plotly.express as px
+from utils.registry import dataset
+from utils.static_figures import static_figure, static_graph
+from utils.geo import map_config
+from utils.choropleth import animated_choropleth
 
 dash.register_page(__name__, path='/', name="Homepage", order=0)
 
@@ -11,9 +15,12 @@ dash.register_page(__name__, path='/', name="Homepage", order=0)
 
 ####################### DATA #############################
 
-df = pd.read_csv("data/hdi_data_map.csv")
-df = df.rename(columns={'Entity':'Country','Human Development Index':'HDI'})
-df = df[df["Year"].isin([2016, 2017, 2018, 2019, 2020, 2021, 2022])]
+@dataset("data/hdi_data_map.csv")
+def load_hdi_data():
+    df = pd.read_csv("data/hdi_data_map.csv")
+    df = df.rename(columns={'Entity':'Country','Human Development Index':'HDI'})
+    return df[df["Year"].isin([2016, 2017, 2018, 2019, 2020, 2021, 2022])]
+
 
 
 
@@ -120,7 +127,7 @@ layout = html.Div(children=[
             html.Br(),
         ],className='box', style={'background-color': '#f1f9ff', 'padding': '20px', 'border-radius': '10px', 'width': '100%'}),
         html.Br(),
-        dcc.Graph(id='hdi-world-map', style={'height': '100%', 'width': '100%'}),
+        *static_graph('hdi-world-map', style={'height': '100%', 'width': '100%'}, config=map_config('detailed')),
         html.Br(),
     ], style={'margin': '20px'}),
 
@@ -139,16 +146,12 @@ layout = html.Div(children=[
 
 
 
-####################### CALLBACKS #############################
-
-@dash.callback(
-    Output('hdi-world-map', 'figure'),
-    Input('hdi-world-map', 'id')  
-)
+####################### FIGURES #############################
 
-def update_hdi_map(_):
-    fig = px.choropleth(
-        df,
+@static_figure('hdi-world-map', load_hdi_data)
+def hdi_map():
+    fig = animated_choropleth(
+        load_hdi_data(),
         locations='Country',
         locationmode='country names',  
         color='HDI',
@@ -157,10 +160,10 @@ def update_hdi_map(_):
         color_continuous_scale=px.colors.sequential.Plasma,
         labels={'HDI': 'HDI'},
         # title='Human Development Index (HDI) by Country',
-        range_color=(0, 1)  
+        range_color=(0, 1),
+        geos=dict(projection_type="mercator"),
+        layout=dict(margin={"r":0,"t":40,"l":0,"b":0})
     )
-    fig.update_geos(projection_type="mercator")
-    fig.update_layout(margin={"r":0,"t":40,"l":0,"b":0})
 
     return fig
 
@@ -0,0 +1,13 @@
+import pytest
+
+from utils import registry
+
+
+@pytest.fixture
+def datasets(monkeypatch):
+    # An empty registry for the test, so the pages' datasets (registered on
+    # import) are neither loaded nor counted.
+    monkeypatch.setattr(registry, "_entries", {})
+    monkeypatch.setattr(registry, "_scheduled", set())
+    monkeypatch.setattr(registry, "_prefetch_thread", None)
+    return registry
@@ -0,0 +1,95 @@
+import time
+
+import dash._callback as dash_callback
+import pytest
+from dash import Dash, Input, Output, dcc, html
+
+from utils import background
+
+
+pytestmark = pytest.mark.skipif(background.manager is None, reason="dash[diskcache] is not installed")
+
+
+def figure(value):
+    if value == "fail":
+        raise ValueError("no data for fail")
+    return {"data": [], "layout": {"title": {"text": value}}}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # A fresh manager and callback map, so the pages' callbacks stay out of
+    # this app and its results out of .cache/background.
+    monkeypatch.setattr(background, "BACKGROUND_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(background, "manager", background._make_manager())
+    monkeypatch.setattr(dash_callback, "GLOBAL_CALLBACK_MAP", {})
+    monkeypatch.setattr(dash_callback, "GLOBAL_CALLBACK_LIST", [])
+
+    app = Dash(__name__, background_callback_manager=background.manager)
+    app.layout = html.Div([
+        dcc.Location(id="_pages_location"),
+        dcc.Input(id="value"),
+        dcc.Graph(id="graph", className="map"),
+    ])
+    background.heavy_callback(Output("graph", "figure"), Input("value", "value"), class_names={"graph": "map"})(figure)
+    return app.server.test_client()
+
+
+def dispatch(client, value, **args):
+    body = {
+        "output": "graph.figure",
+        "outputs": {"id": "graph", "property": "figure"},
+        "inputs": [{"id": "value", "property": "value", "value": value}],
+        "changedPropIds": ["value.value"],
+        "state": [],
+    }
+    return client.post("/_dash-update-component", json=body, query_string=args)
+
+
+def run_job(client, value):
+    # Starts the job and polls it as the renderer does; returns the job's
+    # cache key and the response carrying its result.
+    started = dispatch(client, value).get_json()
+    assert set(started) >= {"cacheKey", "job"}
+    for _ in range(400):
+        response = dispatch(client, value, cacheKey=started["cacheKey"], job=started["job"])
+        if response.status_code != 200 or "response" in response.get_json():
+            return started["cacheKey"], response
+        time.sleep(0.05)
+    pytest.fail("the background job never finished")
+
+
+def test_graph_is_dimmed_while_running_and_restored(client):
+    [spec] = [spec for spec in client.get("/_dash-dependencies").get_json() if spec["output"] == "graph.figure"]
+
+    assert spec["long"]["interval"] == background.BACKGROUND_INTERVAL
+    assert spec["running"] == {
+        "running": {"graph.className": f"map {background.RUNNING_CLASS}"},
+        "runningOff": {"graph.className": "map"},
+    }
+
+
+def test_result_comes_from_the_job_then_from_the_cache(client):
+    _, response = run_job(client, "a")
+
+    assert response.get_json()["response"] == {"graph": {"figure": figure("a")}}
+
+    repeat = dispatch(client, "a").get_json()
+    assert "cacheKey" not in repeat
+    assert repeat == {"multi": True, "response": {"graph": {"figure": figure("a")}}}
+
+
+def test_results_of_other_code_are_not_served(client, monkeypatch):
+    run_job(client, "a")
+    fingerprint, _ = background.manager.cache_by
+    monkeypatch.setattr(background.manager, "cache_by", [fingerprint, lambda: "other code"])
+
+    assert "cacheKey" in dispatch(client, "a").get_json()
+
+
+def test_failed_job_is_reported_once_and_not_cached(client):
+    key, response = run_job(client, "fail")
+
+    assert response.status_code == 500
+    assert not background.manager.result_ready(key)
+    assert "cacheKey" in dispatch(client, "fail").get_json()
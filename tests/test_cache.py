@@ -0,0 +1,52 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from utils import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "datasets"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("Country,Value\nFrance,1\n")
+    return str(path)
+
+
+def counting(frame):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return frame
+
+    return build, calls
+
+
+def test_frame_is_built_once_per_source_version(source):
+    frame = pd.DataFrame({"Country": ["France"], "Value": [1.0]})
+    build, calls = counting(frame)
+
+    pd.testing.assert_frame_equal(cache.cached_frame("test", [source], build), frame)
+    pd.testing.assert_frame_equal(cache.cached_frame("test", [source], build), frame)
+    assert len(calls) == 1
+
+    cache.cached_frame("test", [source], build, version=2)
+    assert len(calls) == 2
+
+
+def test_frame_parquet_cannot_store_is_returned_with_a_warning(source, caplog):
+    frame = pd.DataFrame({"Country": ["France", "Spain"], "Value": ["1.5", 0]})
+    build, calls = counting(frame)
+
+    with caplog.at_level(logging.WARNING, logger="utils.cache"):
+        assert cache.cached_frame("mixed", [source], build) is frame
+    assert "Not caching mixed" in caplog.text
+
+    cache.cached_frame("mixed", [source], build)
+    assert len(calls) == 2
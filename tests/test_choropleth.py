@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.choropleth import animated_choropleth
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["iso", "value", "year", "name"])
+
+
+def build(data):
+    return animated_choropleth(data, locations="iso", color="value", animation_frame="year", hover_name="name")
+
+
+def test_empty_data_is_one_empty_trace():
+    spec = build(frame([]))
+
+    assert "frames" not in spec
+    assert "sliders" not in spec["layout"]
+    [trace] = spec["data"]
+    assert trace["type"] == "choropleth"
+    assert trace["locations"] == [] and len(trace["z"]) == 0
+    go.Figure(spec)
+
+
+def test_single_year_is_one_trace_without_frames():
+    spec = build(frame([("FRA", 1.0, 2020, "France"), ("DEU", 2.0, 2020, "Germany")]))
+
+    assert "frames" not in spec
+    assert "sliders" not in spec["layout"]
+    [trace] = spec["data"]
+    assert trace["locations"] == ["FRA", "DEU"]
+    assert trace["hovertext"] == ["France", "Germany"]
+    np.testing.assert_array_equal(trace["z"], [1.0, 2.0])
+    go.Figure(spec)
+
+
+def test_years_are_frames_of_values():
+    spec = build(frame([
+        ("FRA", 1.0, 2020, "France"),
+        ("DEU", 2.0, 2020, "Germany"),
+        ("FRA", 3.0, 2021, "France"),
+    ]))
+
+    assert [frame["name"] for frame in spec["frames"]] == ["2020", "2021"]
+    assert len(spec["layout"]["sliders"][0]["steps"]) == 2
+    np.testing.assert_array_equal(spec["frames"][1]["data"][0]["z"], [3.0, np.nan])
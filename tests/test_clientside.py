@@ -0,0 +1,28 @@
+import pandas as pd
+import plotly.express as px
+
+from utils.clientside import COLUMN, KEY, line_spec
+
+
+DATA = pd.DataFrame({
+    'Country': ['Niger'] * 2 + ['Nigeria'] * 2,
+    'Year': [2020, 2021] * 2,
+    'Rate': [1.0, 2.0, 3.0, 4.0],
+})
+
+
+def chart(country):
+    subset = DATA[DATA['Country'] == country]
+    return px.line(subset, x='Year', y='Rate', color='Country', title=f'Rate in {country}, as in Nigeria and Niger')
+
+
+def test_only_fields_naming_the_selection_get_placeholders():
+    spec = line_spec(chart, DATA, 'Country', x='Year', y='Rate', sample='Niger')
+
+    [trace] = spec['figure']['data']
+    assert trace['name'] == KEY
+    assert trace['legendgroup'] == KEY
+    assert trace['hovertemplate'] == f'Country={KEY}<br>Year=%{{x}}<br>{COLUMN}=%{{y}}<extra></extra>'
+    assert spec['figure']['layout']['title']['text'] == f'Rate in {KEY}, as in Nigeria and Niger'
+    assert spec['figure']['layout']['yaxis']['title']['text'] == COLUMN
+    assert 'x' not in trace and 'y' not in trace
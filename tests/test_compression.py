@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+from dash import Dash, Input, Output, dcc, html
+
+from utils import compression
+
+
+TEXT = "Impact of COVID-19 on the global economy. " * 100
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    app = Dash(__name__)
+    app.layout = html.Div([dcc.Input(id="value"), html.P(id="text")])
+
+    @app.callback(Output("text", "children"), Input("value", "value"))
+    def text(value):
+        return TEXT
+
+    compression.init_app(app.server)
+    return app.server.test_client()
+
+
+def update(client, **headers):
+    body = {
+        "output": "text.children",
+        "outputs": {"id": "text", "property": "children"},
+        "inputs": [{"id": "value", "property": "value", "value": "a"}],
+        "changedPropIds": ["value.value"],
+    }
+    return client.post("/_dash-update-component", json=body, headers=headers)
+
+
+@pytest.mark.parametrize("path", ["/_dash-layout", "/_dash-dependencies"])
+def test_shell_is_revalidated_with_304(client, path):
+    first = client.get(path)
+
+    assert first.status_code == 200 and first.data
+    assert first.headers["Vary"] == "Accept-Encoding"
+    assert first.headers["Cache-Control"] == "no-cache"
+    etag = first.headers["ETag"]
+
+    second = client.get(path, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == etag
+    assert second.headers["Vary"] == "Accept-Encoding"
+
+
+def test_each_encoding_has_its_own_tag(client, monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESS_MIN_SIZE", 0)
+    plain = client.get("/_dash-layout")
+    gzipped = client.get("/_dash-layout", headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped.data) == plain.data
+    assert gzipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+    revalidated = client.get("/_dash-layout", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": gzipped.headers["ETag"],
+    })
+    assert revalidated.status_code == 304
+
+
+def test_tag_changes_with_the_code(client, monkeypatch):
+    etag = client.get("/_dash-layout").headers["ETag"]
+    monkeypatch.setattr(compression, "_code_version", "other code")
+
+    response = client.get("/_dash-layout", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_callbacks_are_compressed_not_tagged(client):
+    plain = update(client)
+    gzipped = update(client, **{"Accept-Encoding": "gzip"})
+
+    assert TEXT.encode() in plain.data
+    assert "Content-Encoding" not in plain.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(gzipped.data) == plain.data
+    assert "ETag" not in plain.headers and "ETag" not in gzipped.headers
+
+
+def test_small_responses_are_not_compressed(client, monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESS_MIN_SIZE", 1 << 20)
+    response = client.get("/_dash-layout", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
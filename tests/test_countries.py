@@ -0,0 +1,78 @@
+import json
+
+import pandas as pd
+import pytest
+
+from utils import countries
+
+
+class FakeConverter:
+    # Answers like country_converter: a scalar for a single name.
+    def __init__(self, **tables):
+        self.tables = tables
+        self.calls = []
+
+    def convert(self, names, to, not_found):
+        self.calls.append((to, list(names)))
+        result = [self.tables[to].get(name, not_found) for name in names]
+        return result[0] if len(result) == 1 else result
+
+
+@pytest.fixture
+def table_path(tmp_path, monkeypatch):
+    path = tmp_path / "countries.json"
+    monkeypatch.setattr(countries, "COUNTRY_TABLE", str(path))
+    monkeypatch.setattr(countries, "_table", None)
+    monkeypatch.setattr(countries, "_cc_version", lambda: "1.0")
+    return path
+
+
+@pytest.fixture
+def converter(table_path, monkeypatch):
+    converter = FakeConverter(
+        continent={"France": "Europe", "Japan": "Asia"},
+        ISO3={"France": "FRA", "Japan": "JPN"},
+    )
+    monkeypatch.setattr(countries, "_converter", converter)
+    return converter
+
+
+def test_names_are_resolved_in_one_batch(converter):
+    names = pd.Series(["France", "Japan", "France", "Atlantis"])
+
+    assert countries.continent(names).tolist() == ["Europe", "Asia", "Europe", "not found"]
+    assert converter.calls == [("continent", ["France", "Japan", "Atlantis"])]
+
+    assert countries.iso3(["Japan"]).tolist() == ["JPN"]
+    assert countries.continent(["Japan", "France"]).tolist() == ["Asia", "Europe"]
+    assert converter.calls[1:] == [("ISO3", ["Japan"])]
+
+
+def test_unmatched_names_can_be_kept(converter):
+    assert countries.continent(["France", "Atlantis"], not_found=None).tolist() == ["Europe", "Atlantis"]
+
+
+def test_overrides_win(converter):
+    overrides = {"France": "Somewhere", "Atlantis": "Ocean"}
+
+    assert countries.continent(["France", "Japan", "Atlantis"], overrides=overrides).tolist() == ["Somewhere", "Asia", "Ocean"]
+
+
+def test_table_is_persisted_and_reused(converter, table_path, monkeypatch):
+    countries.continent(["France", "Atlantis"])
+
+    stored = json.loads(table_path.read_text())
+    assert stored == {"version": "1.0", "mappings": {"continent": {"Atlantis": None, "France": "Europe"}}}
+
+    # Another process: the table comes from disk, the converter is not used.
+    monkeypatch.setattr(countries, "_table", None)
+    monkeypatch.setattr(countries, "_converter", FakeConverter(continent={}))
+    assert countries.continent(["France", "Atlantis"]).tolist() == ["Europe", "not found"]
+    assert countries._converter.calls == []
+
+
+def test_table_of_another_converter_version_is_ignored(converter, table_path):
+    table_path.write_text(json.dumps({"version": "0.9", "mappings": {"continent": {"France": "Stale"}}}))
+
+    assert countries.continent(["France"]).tolist() == ["Europe"]
+    assert converter.calls == [("continent", ["France"])]
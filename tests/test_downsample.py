@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from utils.downsample import lttb, resample, to_nanoseconds, window
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+X = np.arange(10_000)
+Y = np.sin(X / 300) + np.random.default_rng(0).normal(0, 0.1, len(X))
+
+
+@pytest.mark.parametrize("points", [3, 10, 800, 9_999])
+def test_lttb_keeps_the_ends_and_returns_points_rows_in_order(points):
+    kept = lttb(X, Y, points)
+
+    assert len(kept) == points
+    assert kept[0] == 0 and kept[-1] == len(X) - 1
+    assert (np.diff(kept) > 0).all()
+    assert (np.diff(X[kept]) > 0).all()
+
+
+@pytest.mark.parametrize("points", [0, 2, 10_000, 20_000])
+def test_lttb_keeps_every_row_it_cannot_reduce(points):
+    assert (lttb(X, Y, points) == np.arange(len(X))).all()
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(len(X))
+    y[4321] = 100.0
+
+    assert 4321 in lttb(X, y, 50)
+
+
+def test_window_includes_a_row_beyond_each_edge():
+    x = np.arange(0, 100, 10)
+
+    assert window(x) == slice(0, 10)
+    assert window(x, 25, 55) == slice(2, 7)
+    assert window(x, 20, 50) == slice(1, 7)
+    assert window(x, None, 5) == slice(0, 2)
+    assert window(x, 95, None) == slice(9, 10)
+
+
+def test_zoom_resamples_only_the_visible_window():
+    xs, ys = X.astype(np.int64), Y
+
+    x, y, rows = resample(xs, ys, points=500)
+    assert (len(x), rows) == (500, len(X))
+
+    x, y, rows = resample(xs, ys, 2_000, 2_999, points=500)
+    assert rows == 1_002
+    assert len(x) == 500 and x[0] == 1_999 and x[-1] == 3_000
+
+    # Zoomed in to fewer rows than points: every row is sent.
+    x, y, rows = resample(xs, ys, 2_000, 2_099, points=500)
+    assert rows == len(x) == 102
+    assert (y == ys[1_999:2_101]).all()
+
+
+def test_relayout_dates_become_nanoseconds():
+    assert to_nanoseconds(None) is None
+    assert to_nanoseconds("2020-03-16 04:48:00.0") == np.datetime64("2020-03-16T04:48:00", "ns").astype(np.int64)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_browser_reports_the_zoomed_window():
+    script = """
+        global.window = {dash_clientside: {no_update: 'NO_UPDATE'}};
+        var plot = {_fullLayout: {_size: {w: 1031.6}}};
+        global.document = {getElementById: function (id) {
+            return id === 'graph' ? {querySelector: function () { return plot; }} : null;
+        }};
+        require(process.argv[1]);
+        var view = window.dash_clientside.resample.view;
+        var initial = view(null, 'graph', null);
+        var zoomed = view({'xaxis.range[0]': '2020-01-01', 'xaxis.range[1]': '2020-06-01'}, 'graph', initial);
+        console.log(JSON.stringify([
+            initial,
+            view({autosize: true}, 'graph', initial),
+            zoomed,
+            view({'xaxis.range': ['2021-01-01', '2021-02-01']}, 'graph', zoomed),
+            view({'yaxis.range[0]': 1}, 'graph', zoomed),
+            view({'xaxis.autorange': true}, 'graph', zoomed),
+            view(null, 'missing', zoomed)
+        ]));
+    """
+    result = subprocess.run(
+        ["node", "-e", script, os.path.join(ROOT, "assets", "resample.js")],
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    assert json.loads(result.stdout) == [
+        {"width": 1032, "range": None},
+        "NO_UPDATE",
+        {"width": 1032, "range": ["2020-01-01", "2020-06-01"]},
+        {"width": 1032, "range": ["2021-01-01", "2021-02-01"]},
+        "NO_UPDATE",
+        {"width": 1032, "range": None},
+        "NO_UPDATE",
+    ]
@@ -0,0 +1,136 @@
+import base64
+import copy
+
+import dash._callback as dash_callback
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from utils import encoding
+
+
+def decode(spec):
+    # What plotly.js reads from a typed array spec.
+    values = np.frombuffer(base64.b64decode(spec['bdata']), dtype=np.dtype(spec['dtype']).newbyteorder('<'))
+    if 'shape' in spec:
+        values = values.reshape([int(size) for size in spec['shape'].split(',')])
+    return values
+
+
+VALUES = np.array([0.1, 1234.5678, -2.25, np.nan, 1e-3])
+
+
+def test_float32_keeps_about_seven_significant_digits():
+    spec = encoding.quantize(VALUES, 'float32')
+
+    assert spec['dtype'] == 'f4'
+    np.testing.assert_allclose(decode(spec), VALUES, rtol=1e-7)
+    assert np.isnan(decode(spec)[3])
+
+
+def test_float64_is_exact():
+    spec = encoding.quantize(VALUES, 'float64')
+
+    assert spec['dtype'] == 'f8'
+    np.testing.assert_array_equal(decode(spec), VALUES)
+
+
+@pytest.mark.parametrize('values, precision, dtype, expected', [
+    ([0.125, 2.5], 2, 'f4', [0.12, 2.5]),
+    ([1234567.891, 0.5], 2, 'f8', [1234567.89, 0.5]),
+    ([1.4, 2.6], 0, 'i1', [1, 3]),
+])
+def test_decimals_round_and_pick_the_narrowest_type_that_keeps_them(values, precision, dtype, expected):
+    spec = encoding.quantize(values, precision)
+
+    assert spec['dtype'] == dtype
+    np.testing.assert_allclose(np.round(decode(spec).astype(float), precision), expected)
+
+
+@pytest.mark.parametrize('values, dtype', [
+    ([0, 1, 255], 'u1'),
+    ([-1, 1], 'i1'),
+    ([0, 70000], 'i4'),
+    ([2020.0, 2021.0], 'i2'),
+    ([0, 2 ** 40], 'f8'),
+])
+def test_whole_numbers_use_the_smallest_integer_type(values, dtype):
+    spec = encoding.quantize(np.array(values))
+
+    assert spec['dtype'] == dtype
+    np.testing.assert_array_equal(decode(spec), values)
+
+
+def test_whole_numbers_with_gaps_stay_floats():
+    spec = encoding.quantize([2020.0, np.nan])
+
+    assert spec['dtype'] == 'f4'
+
+
+def test_values_beyond_float32_are_sent_as_float64():
+    assert encoding.quantize([1e39, 0.5], 'float32')['dtype'] == 'f8'
+
+
+@pytest.mark.parametrize('values', [
+    ['France', 'Spain'],
+    [1.0, None],
+    np.array(['2020-01-01'], dtype='datetime64[ns]'),
+    [],
+    np.zeros((2, 2, 2)),
+    'text',
+])
+def test_non_numeric_arrays_are_left_alone(values):
+    assert encoding.quantize(values) is None
+
+
+def test_off_leaves_everything_alone():
+    assert encoding.quantize(VALUES, 'off') is None
+
+
+def test_two_dimensional_arrays_keep_their_shape():
+    values = np.arange(6.0).reshape(2, 3) + 0.5
+    spec = encoding.quantize(values)
+
+    assert spec['shape'] == '2,3'
+    np.testing.assert_array_equal(decode(spec), values)
+
+
+def test_figure_traces_and_frames_are_encoded_without_touching_the_input():
+    figure = go.Figure(go.Scatter(x=['a', 'b'], y=[1.5, 2.5]), frames=[go.Frame(data=[go.Scatter(y=[3.5, 4.5])])]).to_dict()
+    original = copy.deepcopy(figure)
+
+    encoded = encoding.encode_figure(figure)
+
+    assert figure == original
+    assert encoded['data'][0]['x'] == ['a', 'b']
+    np.testing.assert_array_equal(decode(encoded['data'][0]['y']), [1.5, 2.5])
+    np.testing.assert_array_equal(decode(encoded['frames'][0]['data'][0]['y']), [3.5, 4.5])
+    assert encoded['layout'] == figure['layout']
+
+
+def test_only_figure_outputs_of_a_response_are_encoded():
+    sent = []
+    to_json = encoding._encode_response(sent.append)
+    figure = {'data': [{'type': 'scatter', 'y': [1.5, 2.5]}], 'layout': {}}
+    children = {'props': {'children': [1.5, 2.5]}, 'type': 'Div', 'namespace': 'dash_html_components'}
+
+    to_json({'multi': True, 'response': {'graph': {'figure': figure}, 'text': {'children': children}}})
+    to_json({'cacheKey': 'abc', 'job': 1})
+
+    [response, job] = sent
+    assert response['response']['graph']['figure']['data'][0]['y']['dtype'] == 'f4'
+    assert response['response']['text']['children'] is children
+    assert figure['data'][0]['y'] == [1.5, 2.5]
+    assert job == {'cacheKey': 'abc', 'job': 1}
+
+
+@pytest.mark.parametrize('precision, wrapped', [('float32', True), ('off', False)])
+def test_init_app_wraps_dash_encoder_unless_off(monkeypatch, precision, wrapped):
+    def to_json(response):
+        return response
+
+    monkeypatch.setattr(dash_callback, 'to_json', to_json)
+    monkeypatch.setattr(encoding, 'FIGURE_PRECISION', precision)
+    encoding.init_app(None)
+
+    assert (dash_callback.to_json is not to_json) == wrapped
@@ -0,0 +1,96 @@
+import decimal
+
+import dash._callback as dash_callback
+import dash.dash as dash_app
+import flask
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from dash import dcc, html
+from plotly.io.json import to_json_plotly
+
+from utils import fastjson
+
+
+pytestmark = pytest.mark.skipif(fastjson.orjson is None, reason="orjson is not installed")
+
+
+VALUES = {
+    "nulls": {"values": [np.nan, np.inf, -np.inf, None, 1.5]},
+    "float array": np.array([1.5, np.nan, 3.0]),
+    "int array": np.arange(3),
+    "2-d array": np.arange(6.0).reshape(2, 3),
+    "strided array": np.arange(10.0)[::2],
+    "datetime array": np.array(["2020-01-01", "2020-01-02"], dtype="datetime64[ns]"),
+    "series": pd.Series([1.0, None]),
+    "date series": pd.Series(pd.to_datetime(["2020-01-01", "2020-06-30"])),
+    "index": pd.Index(["a", "b"]),
+    "timestamp": pd.Timestamp("2020-01-01 12:30"),
+    "NaT": pd.NaT,
+    "numpy scalars": [np.float32(1.5), np.int64(2), np.bool_(True)],
+    "decimal": decimal.Decimal("1.5"),
+    "figure": go.Figure(go.Scatter(x=[1, 2], y=[3.5, None])),
+    "components": html.Div([dcc.Graph(id="graph", figure={"data": []}), "text"]),
+    "unsafe text": {"text": "</script><script>alert(1)</script>     & é"},
+    "int keys": {1: "a", 2: "b"},
+}
+
+
+@pytest.mark.parametrize("value", VALUES.values(), ids=VALUES.keys())
+def test_same_json_as_dash_encoder(value):
+    assert fastjson.dumps(value) == to_json_plotly(value)
+
+
+def test_html_and_line_separators_are_escaped():
+    body = fastjson.dumps({"text": "</script>  "})
+
+    assert body == '{"text":"\\u003c\\u002fscript\\u003e\\u2028\\u2029"}'
+
+
+def test_values_orjson_cannot_encode_go_through_plotly(monkeypatch):
+    calls = []
+    monkeypatch.setattr(fastjson, "to_json_plotly", lambda value: calls.append(value) or "plotly")
+
+    assert fastjson.dumps({"big": 2 ** 70}) == "plotly"
+    assert len(calls) == 1
+
+
+def test_without_orjson_plotly_is_used(monkeypatch):
+    monkeypatch.setattr(fastjson, "orjson", None)
+
+    assert fastjson.dumps(VALUES["figure"]) == to_json_plotly(VALUES["figure"])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # init_app replaces Dash's encoders; put them back afterwards.
+    monkeypatch.setattr(dash_callback, "to_json", dash_callback.to_json)
+    monkeypatch.setattr(dash_app, "to_json", dash_app.to_json)
+    return flask.Flask(__name__)
+
+
+def test_init_app_installs_the_encoder(server):
+    fastjson.init_app(server)
+
+    assert dash_callback.to_json is fastjson.dumps
+    assert dash_app.to_json is fastjson.dumps
+
+    @server.route("/echo", methods=["POST"])
+    def echo():
+        return flask.jsonify(flask.request.get_json())
+
+    response = server.test_client().post("/echo", json={"b": 1, "a": [1.5, None]})
+    assert response.data == b'{"a":[1.5,null],"b":1}\n'
+    assert isinstance(server.json, fastjson.OrjsonProvider)
+
+
+def test_fast_json_off_keeps_plotly(server, monkeypatch):
+    monkeypatch.setattr(fastjson, "FAST_JSON", False)
+    to_json = dash_callback.to_json
+    provider = server.json
+
+    fastjson.init_app(server)
+
+    assert dash_callback.to_json is to_json
+    assert server.json is provider
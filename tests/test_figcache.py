@@ -0,0 +1,104 @@
+import plotly.graph_objects as go
+import pytest
+
+from utils import figcache, registry
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = figcache.FigureCache(2)
+    monkeypatch.setattr(figcache, "figures", cache)
+    return cache
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    versions = {"test.data": (1,)}
+    monkeypatch.setattr(registry, "version", lambda name: versions[name])
+    return versions
+
+
+def data():
+    pass
+
+
+data.dataset_name = "test.data"
+
+
+def counted(output):
+    calls = []
+
+    def build(*args, **kwargs):
+        calls.append(args)
+        return output(*args) if callable(output) else output
+
+    return build, calls
+
+
+def test_repeat_calls_are_hits(cache, versions):
+    build, calls = counted(lambda country: go.Figure(layout={"title": {"text": country}}))
+    figure = figcache.cached_figure("test", data)(build)
+
+    first = figure("France")
+    assert figure("France") is first
+    figure("Spain")
+
+    assert calls == [("France",), ("Spain",)]
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 2, "maxsize": 2}
+    # Figures are stored as plain dicts.
+    assert first["layout"]["title"]["text"] == "France"
+
+
+def test_least_recently_used_entry_is_evicted(cache, versions):
+    build, calls = counted({"data": []})
+    figure = figcache.cached_figure("test", data)(build)
+
+    figure("a")
+    figure("b")
+    figure("a")
+    figure("c")
+
+    assert figure.cached("a") and figure.cached("c")
+    assert not figure.cached("b")
+    assert cache.stats()["size"] == 2
+
+
+def test_changed_data_version_is_a_miss(cache, versions):
+    build, calls = counted({"data": []})
+    figure = figcache.cached_figure("test", data)(build)
+
+    figure("a")
+    versions["test.data"] = (2,)
+    assert not figure.cached("a")
+    figure("a")
+
+    assert len(calls) == 2
+
+
+def test_list_and_dict_arguments_are_keys(cache, versions):
+    build, calls = counted({"data": []})
+    figure = figcache.cached_figure("test", data)(build)
+
+    figure(["France", "Spain"], options={"log": True})
+    figure(["France", "Spain"], options={"log": True})
+    figure(["Spain", "France"], options={"log": True})
+
+    assert len(calls) == 2
+
+
+def test_other_outputs_are_kept_as_returned(cache, versions):
+    children = [{"type": "Div"}]
+    build, _ = counted(lambda value: (go.Figure(), children))
+    figure = figcache.cached_figure("test", data)(build)
+
+    fig, cached_children = figure("a")
+    assert isinstance(fig, dict)
+    assert cached_children == children
+
+
+def test_figure_ids_do_not_share_entries(cache, versions):
+    first = figcache.cached_figure("first", data)(lambda value: {"name": "first"})
+    second = figcache.cached_figure("second", data)(lambda value: {"name": "second"})
+
+    assert first("a") == {"name": "first"}
+    assert second("a") == {"name": "second"}
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.frozen import FrozenFrame, ReadOnlyDatasetError, freeze
+
+
+@pytest.fixture
+def frame():
+    return freeze(pd.DataFrame({
+        "Country": pd.Categorical(["France", "Spain", "France"]),
+        "Year": [2020, 2020, 2021],
+        "Value": [1.0, 2.0, 3.0],
+    }))
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda frame: frame.__setitem__("Value", 0.0),
+    lambda frame: frame.__setitem__("New", 0.0),
+    lambda frame: frame.__delitem__("Value"),
+    lambda frame: frame.loc.__setitem__((0, "Value"), 0.0),
+    lambda frame: frame.iloc.__setitem__((0, 2), 0.0),
+    lambda frame: frame.at.__setitem__((0, "Value"), 0.0),
+    lambda frame: frame.iat.__setitem__((0, 2), 0.0),
+    lambda frame: frame.insert(0, "New", 0.0),
+    lambda frame: frame.pop("Value"),
+    lambda frame: frame.update(pd.DataFrame({"Value": [0.0]})),
+    lambda frame: setattr(frame, "Value", 0.0),
+    lambda frame: frame.fillna(0, inplace=True),
+    lambda frame: frame.rename(columns={"Value": "v"}, inplace=True),
+    lambda frame: frame.drop(columns="Value", inplace=True),
+    lambda frame: frame.sort_values("Value", inplace=True),
+    lambda frame: frame.replace(1.0, 0.0, inplace=True),
+], ids=[
+    "setitem", "setitem-new", "delitem", "loc", "iloc", "at", "iat", "insert", "pop", "update",
+    "setattr", "fillna", "rename", "drop", "sort_values", "replace",
+])
+def test_mutating_api_raises(frame, mutate):
+    with pytest.raises(ReadOnlyDatasetError):
+        mutate(frame)
+    assert frame["Value"].tolist() == [1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize("column", ["Year", "Value"])
+def test_buffers_are_write_protected(frame, column):
+    with pytest.raises(ValueError, match="read-only"):
+        frame[column].to_numpy()[0] = 0
+
+
+def test_categorical_codes_are_write_protected(frame):
+    with pytest.raises(ValueError, match="read-only"):
+        frame["Country"].array.codes[0] = 1
+
+
+def test_freezing_does_not_copy():
+    values = np.array([1.0, 2.0])
+    frozen = freeze(pd.DataFrame({"Value": values}, copy=False))
+
+    assert isinstance(frozen, FrozenFrame)
+    assert np.shares_memory(frozen["Value"].to_numpy(), values)
+
+
+@pytest.mark.parametrize("derive", [
+    lambda frame: frame[frame["Value"] > 1],
+    lambda frame: frame.copy(),
+    lambda frame: frame.assign(Other=1),
+    lambda frame: frame.loc[frame["Year"] == 2020, ["Country", "Value"]],
+    lambda frame: frame.groupby("Year", as_index=False)["Value"].sum(),
+    lambda frame: frame.merge(pd.DataFrame({"Year": [2020], "Note": ["a"]}), on="Year"),
+    lambda frame: frame.rename(columns={"Value": "v"}),
+    lambda frame: frame.sort_values("Value", ascending=False),
+], ids=["filter", "copy", "assign", "loc", "groupby", "merge", "rename", "sort_values"])
+# pandas warns about writing to a filtered frame whatever the source.
+@pytest.mark.filterwarnings("ignore::pandas.errors.SettingWithCopyWarning")
+def test_derived_frames_are_writable(frame, derive):
+    derived = derive(frame)
+
+    assert type(derived) is pd.DataFrame
+    derived["Written"] = 1
+    derived.iloc[0, 0] = derived.iloc[-1, 0]
+    assert (derived["Written"] == 1).all()
+    assert frame["Value"].tolist() == [1.0, 2.0, 3.0]
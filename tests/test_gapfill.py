@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.gapfill import COLUMNS, factors_for, legacy_fill, synthetic_frame
+from utils.gapfill import coefficient_of_variation, fill_with_evolution
+
+
+def fill(data, factors):
+    return fill_with_evolution(data, factors, 'continent', ['location', 'year'])
+
+
+def test_gaps_chain_from_the_nearest_known_value():
+    data = pd.DataFrame({
+        'location': ['A'] * 5 + ['B'] * 2,
+        'year': [2020] * 4 + [2021] + [2020] * 2,
+        'continent': ['Europe'] * 5 + ['Asia'] * 2,
+        'total_cases': [np.nan, 8.0, np.nan, np.nan, np.nan, np.nan, np.nan],
+    })
+    factors = {'total_cases': pd.Series({'Europe': 2.0})}
+
+    filled = fill(data, factors)
+
+    # Leading gap from the next known value, trailing gaps chained forward;
+    # another year is another key, and a continent without a factor and a
+    # key without any known value stay empty.
+    np.testing.assert_allclose(filled['total_cases'], [4.0, 8.0, 16.0, 32.0, np.nan, np.nan, np.nan])
+    assert data['total_cases'].isna().sum() == 6
+
+
+def test_coefficient_of_variation_skips_zero_means():
+    data = pd.DataFrame({'continent': ['Europe', 'Europe', 'Asia', 'Asia'], 'total_cases': [1.0, 3.0, 0.0, 0.0]})
+
+    factors = coefficient_of_variation(data, 'continent', 'total_cases')
+
+    assert factors['Europe'] == pytest.approx(np.std([1.0, 3.0], ddof=1) / 2.0)
+    assert np.isnan(factors['Asia'])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_the_row_by_row_fill(seed):
+    data = synthetic_frame(360, locations=6, years=3, seed=seed, shuffle=True)
+    factors = factors_for(data)
+
+    expected = legacy_fill(data, factors)
+
+    pd.testing.assert_frame_equal(fill(data, factors), expected)
+    assert expected[COLUMNS].isna().sum().sum() < data[COLUMNS].isna().sum().sum()
@@ -0,0 +1,141 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils import geo
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Microstates and territories too small for Natural Earth's 1:110m countries;
+# plotly's own world_110m.json has no shape for them either.
+TOO_SMALL = {
+    'ABW', 'AND', 'ASM', 'ATG', 'BHR', 'BMU', 'BRB', 'COM', 'CPV', 'CUW', 'CYM', 'DMA', 'FRO', 'FSM', 'GIB', 'GRD',
+    'GUM', 'HKG', 'IMN', 'KIR', 'KNA', 'LCA', 'LIE', 'MAC', 'MAF', 'MCO', 'MDV', 'MHL', 'MLT', 'MNP', 'MUS', 'NRU',
+    'PLW', 'PYF', 'SGP', 'SMR', 'STP', 'SXM', 'SYC', 'TCA', 'TON', 'TUV', 'VCT', 'VGB', 'VIR', 'WSM',
+}
+
+
+def load(level):
+    with open(os.path.join(ROOT, geo.GEOMETRY_DIR, level, geo.TOPOJSON_NAME)) as f:
+        return json.load(f)
+
+
+def decode(topology):
+    # Absolute quantized points of every arc.
+    arcs = []
+    for arc in topology['arcs']:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x, y = x + dx, y + dy
+            points.append((x, y))
+        arcs.append(points)
+    return arcs
+
+
+def ring_points(arcs, ring):
+    points = []
+    for index in ring:
+        arc = arcs[index] if index >= 0 else arcs[~index][::-1]
+        assert not points or points[-1] == arc[0], 'arcs of a ring must join'
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+def polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['arcs']]
+    assert geometry['type'] == 'MultiPolygon'
+    return geometry['arcs']
+
+
+@pytest.mark.parametrize('level', sorted(geo.GEOMETRY_LEVELS))
+def test_level_is_valid_topojson(level):
+    topology = load(level)
+    arcs = decode(topology)
+
+    assert topology['type'] == 'Topology'
+    assert set(topology['objects']) == {'countries', 'land', 'ocean', 'coastlines', 'lakes', 'rivers', 'subunits'}
+    assert all(layer['type'] == 'GeometryCollection' for layer in topology['objects'].values())
+    assert all(len(arc) >= 2 for arc in arcs)
+
+    (sx, sy), (tx, ty) = topology['transform']['scale'], topology['transform']['translate']
+    for arc in arcs:
+        for x, y in arc:
+            assert -180 <= x * sx + tx <= 180.0001 and -90 <= y * sy + ty <= 90.0001
+
+    for name in ('countries', 'land', 'ocean'):
+        for geometry in topology['objects'][name]['geometries']:
+            for polygon in polygons(geometry):
+                for ring in polygon:
+                    assert all(-len(arcs) <= index < len(arcs) for index in ring)
+                    points = ring_points(arcs, ring)
+                    assert points[0] == points[-1] and len(points) >= 4
+
+    [coastlines] = topology['objects']['coastlines']['geometries']
+    assert coastlines['type'] == 'MultiLineString'
+    assert all(0 <= index < len(arcs) for line in coastlines['arcs'] for index in line)
+
+
+def test_levels_have_the_same_countries_and_less_detail():
+    topologies = {level: load(level) for level in geo.GEOMETRY_LEVELS}
+    ids = {level: [geometry.get('id') for geometry in topology['objects']['countries']['geometries']]
+           for level, topology in topologies.items()}
+    points = {level: sum(len(arc) for arc in topology['arcs']) for level, topology in topologies.items()}
+
+    assert ids['detailed'] == ids['standard'] == ids['simple']
+    codes = [code for code in ids['standard'] if code]
+    assert len(codes) == len(set(codes)) > 170
+    assert all(len(code) == 3 and code.isupper() for code in codes)
+    assert points['detailed'] > points['standard'] > points['simple']
+
+
+def test_assets_are_what_the_builder_writes(tmp_path):
+    pytest.importorskip('shapefile')
+    geo.build(os.path.join(ROOT, geo.SOURCE), str(tmp_path))
+
+    for level in geo.GEOMETRY_LEVELS:
+        with open(tmp_path / level / geo.TOPOJSON_NAME) as f:
+            assert json.load(f) == load(level), level
+
+
+def test_shared_border_is_stored_once():
+    # Two unit squares side by side, clockwise as shapefiles store outer rings.
+    west = [(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)]
+    east = [(1, 0), (1, 1), (2, 1), (2, 0), (1, 0)]
+
+    topology = geo.topology([('WST', [[west]]), ('EST', [[east]])])
+    arcs = decode(topology)
+    countries = topology['objects']['countries']['geometries']
+
+    assert [country['id'] for country in countries] == ['WST', 'EST']
+    shared = set.intersection(*({index if index >= 0 else ~index for index in country['arcs'][0]} for country in countries))
+    assert len(shared) == 1
+    # Their union is one rectangle through both ends of the border.
+    [[land]] = topology['objects']['land']['geometries'][0]['arcs']
+    assert len(ring_points(arcs, land)) == 7
+
+
+def test_every_dataset_country_has_a_shape():
+    script = (
+        'import json, app\n'
+        'from utils import registry\n'
+        'codes = set()\n'
+        'for name in registry.states():\n'
+        '    data = registry.get(name)\n'
+        '    if "iso_alpha" in data.columns:\n'
+        '        codes.update(str(code) for code in data["iso_alpha"].dropna())\n'
+        'print(json.dumps(sorted(codes)))\n'
+    )
+    env = dict(os.environ, PREFETCH_DATASETS='0')
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stderr
+    codes = {code for code in json.loads(result.stdout.strip().splitlines()[-1]) if len(code) == 3 and code.isupper()}
+
+    shapes = {geometry.get('id') for geometry in load(geo.DEFAULT_LEVEL)['objects']['countries']['geometries']}
+    assert len(codes) > 150
+    assert sorted(codes - shapes - TOO_SMALL) == []
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import flask
+import pandas as pd
+import pytest
+
+from utils import health
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client():
+    server = flask.Flask(__name__)
+    health.init_app(server)
+    return server.test_client()
+
+
+@pytest.fixture
+def release(datasets):
+    # Registers "fast" and "slow", prefetches them and returns the event
+    # that lets "slow" finish, once "fast" is loaded.
+    event = threading.Event()
+    datasets.register("fast", [], lambda: pd.DataFrame({"a": [1]}))
+    datasets.register("slow", [], lambda: event.wait() and pd.DataFrame({"a": [1]}))
+    thread = datasets.prefetch()
+    while not datasets.loaded("fast"):
+        time.sleep(0.01)
+    yield event
+    event.set()
+    thread.join(10)
+
+
+def test_healthz_answers_while_loading(client, release):
+    response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+
+
+def test_not_ready_until_scheduled_loads_finish(client, datasets, release):
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json() == {"ready": False, "pending": ["slow"], "failed": {}}
+
+    release.set()
+    datasets.prefetch().join(10)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json() == {"ready": True, "pending": [], "failed": {}}
+
+
+def test_datasets_loaded_on_demand_do_not_hold_readiness(client, datasets):
+    datasets.register("on-demand", [], lambda: pd.DataFrame({"a": [1]}))
+
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["pending"] == []
+
+
+def test_failed_loads_are_reported_without_blocking(client, datasets):
+    def broken():
+        raise FileNotFoundError("data/missing.csv")
+
+    datasets.register("broken", [], broken)
+    datasets.register("fine", [], lambda: pd.DataFrame({"a": [1]}))
+    datasets.load_all()
+
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "ready": True,
+        "pending": [],
+        "failed": {"broken": "FileNotFoundError: data/missing.csv"},
+    }
+
+
+def test_wsgi_preloads_every_dataset_before_serving():
+    script = (
+        "import wsgi\n"
+        "response = wsgi.server.test_client().get('/readyz')\n"
+        "print(response.status_code, response.get_json()['pending'])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=600)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "200 []"
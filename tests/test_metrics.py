@@ -0,0 +1,122 @@
+import time
+
+import dash._callback as dash_callback
+import pytest
+from dash import Dash, Input, Output, dcc, html
+
+from utils import background, metrics
+
+
+def sample(name, **labels):
+    return metrics._collectors.get_sample_value(name, labels) or 0.0
+
+
+def seconds(output, phase):
+    return (
+        sample("dash_callback_seconds_count", output=output, phase=phase),
+        sample("dash_callback_seconds_sum", output=output, phase=phase),
+    )
+
+
+@pytest.fixture
+def app(datasets, tmp_path, monkeypatch):
+    # A fresh callback map, and Dash's helpers and the registry's watchers
+    # put back after init_app has wrapped them.
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.setattr(dash_callback, "GLOBAL_CALLBACK_MAP", {})
+    monkeypatch.setattr(dash_callback, "GLOBAL_CALLBACK_LIST", [])
+    monkeypatch.setattr(dash_callback, "_invoke_callback", dash_callback._invoke_callback)
+    monkeypatch.setattr(dash_callback, "to_json", dash_callback.to_json)
+    monkeypatch.setattr(datasets, "_watchers", [])
+    if background.manager is not None:
+        monkeypatch.setattr(background, "BACKGROUND_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(background, "manager", background._make_manager())
+
+    source = tmp_path / "source.csv"
+    source.write_text("a\n1\n")
+    datasets.register("metrics-test", [str(source)], lambda: time.sleep(0.1) or "frame")
+
+    app = Dash(__name__, background_callback_manager=background.manager)
+    app.layout = html.Div([
+        dcc.Location(id="_pages_location"),
+        dcc.Input(id="value"),
+        dcc.Graph(id="metrics-sync"),
+        dcc.Graph(id="metrics-job"),
+    ])
+
+    @app.callback(Output("metrics-sync", "figure"), Input("value", "value"))
+    def sync(value):
+        datasets.get("metrics-test")
+        time.sleep(0.05)
+        return {"data": [], "layout": {"title": {"text": value}}}
+
+    metrics.init_app(app.server)
+    return app
+
+
+def dispatch(client, output, value, **args):
+    body = {
+        "output": f"{output}.figure",
+        "outputs": {"id": output, "property": "figure"},
+        "inputs": [{"id": "value", "property": "value", "value": value}],
+        "changedPropIds": ["value.value"],
+        "state": [],
+    }
+    return client.post("/_dash-update-component", json=body, query_string=args)
+
+
+def test_callback_phases_are_recorded_and_served(app):
+    client = app.server.test_client()
+    before = {phase: seconds("metrics-sync", phase) for phase in ("data", "figure", "serialize", "total")}
+    loads = sample("dataset_load_seconds_count", dataset="metrics-test")
+
+    assert dispatch(client, "metrics-sync", "a").status_code == 200
+
+    after = {phase: seconds("metrics-sync", phase) for phase in before}
+    assert all(after[phase][0] == before[phase][0] + 1 for phase in before)
+    assert after["data"][1] - before["data"][1] >= 0.1
+    assert after["figure"][1] - before["figure"][1] >= 0.05
+    assert after["total"][1] - before["total"][1] >= 0.15
+    assert sample("dataset_load_seconds_count", dataset="metrics-test") == loads + 1
+    assert seconds("metrics-sync", "job") == (0.0, 0.0)
+
+    response = client.get(metrics.METRICS_PATH)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert 'dash_callback_seconds_count{output="metrics-sync",phase="figure"}' in text
+    assert 'dash_callback_response_bytes_count{output="metrics-sync"}' in text
+    assert 'dataset_load_seconds_count{dataset="metrics-test"}' in text
+
+
+@pytest.mark.skipif(background.manager is None, reason="dash[diskcache] is not installed")
+def test_background_job_time_is_recorded_once(app):
+    def figure(value):
+        time.sleep(0.2)
+        return {"data": [], "layout": {"title": {"text": value}}}
+
+    background.heavy_callback(Output("metrics-job", "figure"), Input("value", "value"))(figure)
+    client = app.server.test_client()
+    before = {phase: seconds("metrics-job", phase) for phase in ("data", "figure", "job", "total")}
+
+    started = dispatch(client, "metrics-job", "a").get_json()
+    polls = 1
+    for _ in range(400):
+        polls += 1
+        response = dispatch(client, "metrics-job", "a", cacheKey=started["cacheKey"], job=started["job"])
+        if "response" in response.get_json():
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("the background job never finished")
+
+    after = {phase: seconds("metrics-job", phase) for phase in before}
+    assert after["total"][0] == before["total"][0] + polls
+    # Starting and polling the job is not the cost of building the figure.
+    assert after["data"] == before["data"] and after["figure"] == before["figure"]
+    assert after["job"][0] == before["job"][0] + 1
+    assert after["job"][1] - before["job"][1] >= 0.2
+
+    # A repeat is answered from the cache, without a job to time.
+    assert "response" in dispatch(client, "metrics-job", "a").get_json()
+    assert seconds("metrics-job", "job") == after["job"]
@@ -0,0 +1,61 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.owid import LAST_PER_YEAR_COLUMNS, read_last_per_year
+
+
+ROWS = [
+    # continent, location, date, total_cases, total_deaths, population, an unused column
+    ("Europe", "France", "2020-03-01", 10.0, None, 67.0, "x"),
+    ("Asia", "Japan", "2020-03-01", 5.0, 1.0, 125.0, "x"),
+    ("Europe", "France", "2020-12-31", None, 3.0, 67.0, "x"),
+    ("Europe", "France", "2021-01-01", 40.0, 4.0, 67.0, "x"),
+    ("Asia", "Japan", "2020-12-31", 20.0, None, 125.0, "x"),
+    ("Europe", "France", "2021-06-01", None, None, 68.0, "x"),
+    (None, "World", "2020-06-01", 100.0, 10.0, 7800.0, "x"),
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "owid-covid-data.csv"
+    columns = ["continent", "location", "date", "total_cases", "total_deaths", "population", "new_tests"]
+    pd.DataFrame(ROWS, columns=columns).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 100])
+def test_chunks_give_the_last_value_per_year_and_location(path, chunksize):
+    whole = pd.read_csv(path)
+    whole["year"] = whole["date"].str.slice(0, 4).astype(int)
+    expected = whole.drop(columns=["date", "new_tests"]).groupby(["year", "location"], sort=False).last().reset_index()
+
+    last = read_last_per_year(path, chunksize=chunksize)
+
+    assert list(last.columns) == LAST_PER_YEAR_COLUMNS
+    # groupby().last() gives None or NaN for a missing continent depending
+    # on the chunk; both mean missing.
+    pd.testing.assert_frame_equal(last.fillna(np.nan), expected[LAST_PER_YEAR_COLUMNS].fillna(np.nan))
+
+
+def test_last_non_null_value_of_each_column_wins(path):
+    last = read_last_per_year(path, chunksize=2).set_index(["year", "location"])
+
+    assert last.loc[(2020, "France"), "total_cases"] == 10.0
+    assert last.loc[(2020, "France"), "total_deaths"] == 3.0
+    assert last.loc[(2021, "France"), "total_cases"] == 40.0
+    assert last.loc[(2021, "France"), "population"] == 68.0
+    assert pd.isna(last.loc[(2020, "World"), "continent"])
+
+
+def test_missing_file_is_an_empty_frame(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger="utils.owid"):
+        last = read_last_per_year(str(tmp_path / "missing.csv"))
+
+    assert "not found" in caplog.text
+    assert last.empty
+    assert list(last.columns) == LAST_PER_YEAR_COLUMNS
+    assert last["year"].dtype == np.int64 and last["total_cases"].dtype == np.float64
@@ -0,0 +1,223 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils import cache, store
+from utils.frozen import FrozenFrame, ReadOnlyDatasetError
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("Country,Value\nFrance,1\n")
+    return str(path)
+
+
+def touch(path, content=None):
+    # A new mtime, and new contents when given.
+    if content is not None:
+        with open(path, "w") as f:
+            f.write(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def counting_loader(path):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return pd.read_csv(path)
+
+    return load, calls
+
+
+def test_frame_is_loaded_once_and_frozen(datasets, source):
+    load, calls = counting_loader(source)
+    datasets.register("test", [source], load)
+
+    frame = datasets.get("test")
+    assert datasets.get("test") is frame
+    assert len(calls) == 1
+    assert isinstance(frame, FrozenFrame)
+    with pytest.raises(ReadOnlyDatasetError):
+        frame["Value"] = 0
+
+
+def test_changed_source_is_reloaded(datasets, source):
+    load, calls = counting_loader(source)
+    datasets.register("test", [source], load)
+    datasets.get("test")
+    version, fingerprint = datasets.version("test"), datasets.fingerprint()
+
+    touch(source, "Country,Value\nFrance,2\n")
+
+    assert datasets.version("test") != version
+    assert datasets.fingerprint() != fingerprint
+    assert datasets.get("test")["Value"].tolist() == [2]
+    assert len(calls) == 2
+
+
+def test_content_key_ignores_mtime(datasets, source):
+    datasets.register("test", [source], lambda: None)
+    key = datasets.content_key("test")
+
+    touch(source)
+    assert datasets.content_key("test") == key
+
+    touch(source, "Country,Value\nFrance,2\n")
+    assert datasets.content_key("test") != key
+
+
+def test_concurrent_first_gets_load_once(datasets, source):
+    load, calls = counting_loader(source)
+    datasets.register("test", [source], lambda: time.sleep(0.1) or load())
+
+    threads = [threading.Thread(target=datasets.get, args=("test",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+
+
+def test_states(datasets, source):
+    fail = [True]
+
+    def load():
+        if fail[0]:
+            raise ValueError("bad row")
+        return pd.DataFrame({"a": [1]})
+
+    datasets.register("test", [source], load)
+    datasets.register("other", [source], lambda: pd.DataFrame({"a": [1]}))
+    assert datasets.states() == {"other": "on demand", "test": "on demand"}
+    assert datasets.pending() == ["other", "test"]
+
+    with pytest.raises(ValueError):
+        datasets.get("test")
+    assert datasets.state("test") == "failed"
+    assert datasets.error("test") == "ValueError: bad row"
+
+    datasets.load_all()
+    assert datasets.states() == {"other": "loaded", "test": "failed"}
+
+    fail[0] = False
+    datasets.get("test")
+    assert datasets.state("test") == "loaded"
+    assert datasets.error("test") is None
+    assert datasets.pending() == []
+
+
+def test_watchers_see_loads_and_gets(datasets, source, monkeypatch):
+    events = []
+    monkeypatch.setattr(datasets, "_watchers", [])
+    datasets.watch(lambda event, name, seconds: events.append((event, name)))
+    datasets.register("test", [source], lambda: pd.DataFrame({"a": [1]}))
+
+    datasets.get("test")
+    datasets.get("test")
+
+    assert events == [("load", "test"), ("get", "test"), ("get", "test")]
+
+
+def test_dataset_accessor_goes_through_cache_and_store(datasets, source, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path / "store"))
+    calls = []
+
+    @datasets.dataset(source)
+    def values():
+        calls.append(1)
+        return pd.read_csv(source)
+
+    assert values.dataset_name == f"{__name__}.values"
+    assert values()["Country"].tolist() == ["France"]
+    assert os.listdir(tmp_path / "datasets") and os.listdir(tmp_path / "store")
+
+    # As in another process: the registry is empty, the store is not.
+    monkeypatch.setattr(datasets, "_entries", {})
+
+    @datasets.dataset(source)
+    def values():  # noqa: F811
+        calls.append(1)
+        return pd.read_csv(source)
+
+    assert values()["Country"].tolist() == ["France"]
+    assert len(calls) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_gets_free_locks(datasets, source):
+    # A background job forked while another thread was loading a dataset
+    # must not wait for a lock nobody in the child will release.
+    datasets.register("test", [source], lambda: pd.DataFrame({"a": [1]}))
+    lock = datasets._entries["test"].lock
+    lock.acquire()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                datasets.get("test")
+                os._exit(0)
+            finally:
+                os._exit(1)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail("the forked child blocked on the parent's lock")
+    finally:
+        lock.release()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_prefetch_loads_everything_once_in_the_background(datasets, source):
+    load, calls = counting_loader(source)
+    datasets.register("first", [source], load)
+    datasets.register("second", [source], load)
+
+    thread = datasets.prefetch()
+    assert datasets.prefetch() is thread
+    thread.join(10)
+
+    assert thread.daemon
+    assert len(calls) == 2
+    assert datasets.states() == {"first": "loaded", "second": "loaded"}
+
+
+def test_pages_load_their_datasets_on_first_visit():
+    # Layouts are built on import, without the data; the callbacks a visit
+    # fires on load fill in what depends on it.
+    script = (
+        "import sys, dash, app\n"
+        "from utils import registry\n"
+        "assert registry.pending() == sorted(registry.states()), 'loaded on import'\n"
+        "assert not any(callable(page['layout']) for page in dash.page_registry.values())\n"
+        "page = sys.modules['pages.InflationPrices']\n"
+        "page.update_dropdown_countries(None), page.update_dropdown_commodities(None)\n"
+        "print(sorted(set(registry.states()) - set(registry.pending())))\n"
+    )
+    env = dict(os.environ, PREFETCH_DATASETS="0")
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, timeout=600)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == repr([
+        "pages.InflationPrices.commodity_prices_data",
+        "pages.InflationPrices.consumer_prices_data",
+    ])
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.profiling import over_budget
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budgets in seconds, as in the README. Timing a cold start is
+# only meaningful on a known machine, so that test only runs when one of
+# these is set (the others keep their default).
+BUDGETS = ("STARTUP_BUDGET_IMPORT", "STARTUP_BUDGET_LOAD", "STARTUP_BUDGET_PAGE")
+BUDGET_IMPORT = os.environ.get("STARTUP_BUDGET_IMPORT", "2.5")
+BUDGET_LOAD = os.environ.get("STARTUP_BUDGET_LOAD", "10")
+BUDGET_PAGE = os.environ.get("STARTUP_BUDGET_PAGE", "0.2")
+
+# Imported on first use only; importing the app must not pull them in.
+DEFERRED = ("dash_daq", "country_converter", "plotly.subplots")
+
+
+def run(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=600)
+
+
+@pytest.mark.skipif(not any(name in os.environ for name in BUDGETS), reason="set STARTUP_BUDGET_* to time a cold start")
+def test_cold_start_is_within_budget(tmp_path):
+    report_path = tmp_path / "startup.json"
+    result = run(
+        "-m", "utils.profiling", "--cold", "--json", str(report_path),
+        "--budget-import", BUDGET_IMPORT, "--budget-load", BUDGET_LOAD, "--budget-page", BUDGET_PAGE,
+    )
+
+    assert report_path.exists(), result.stderr
+    assert result.returncode == 0, result.stderr
+    report = json.loads(report_path.read_text())
+    assert report["import"]["pages"] and report["load"]["datasets"]
+
+
+def test_heavy_imports_are_deferred():
+    result = run("-c", f"import sys, app; print([m for m in {DEFERRED!r} if m in sys.modules])")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+@pytest.mark.parametrize("budgets, failures", [
+    ({}, 0),
+    ({"budget_import": 2.0, "budget_load": 5.0, "budget_page": 0.5}, 0),
+    ({"budget_import": 1.0}, 1),
+    ({"budget_load": 2.0}, 1),
+    ({"budget_page": 0.1}, 1),
+])
+def test_over_budget(budgets, failures):
+    report = {
+        "import": {"total": 1.5, "pages": {"pages.homepage": {"self": 0.3, "cumulative": 0.4}}},
+        "load": {"total": 3.0},
+    }
+
+    assert len(over_budget(report, **budgets)) == failures
@@ -0,0 +1,113 @@
+import gzip
+import json
+
+import dash._callback as dash_callback
+import flask
+import pytest
+
+from utils import encoding, static_figures
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("Year,Value\n2020,1.5\n2021,2.5\n")
+    return path
+
+
+@pytest.fixture
+def figure(datasets, source, tmp_path, monkeypatch):
+    # One static figure over one dataset, rendered under tmp_path.
+    monkeypatch.setattr(static_figures, "FIGURE_DIR", str(tmp_path / "figures"))
+    monkeypatch.setattr(static_figures, "_figures", {})
+    monkeypatch.setattr(static_figures, "brotli", None)
+    monkeypatch.setattr(dash_callback, "GLOBAL_CALLBACK_MAP", {})
+    monkeypatch.setattr(dash_callback, "GLOBAL_CALLBACK_LIST", [])
+    datasets.register("figure-test", [str(source)], lambda: None)
+
+    def values():
+        return None
+
+    values.dataset_name = "figure-test"
+    builds = []
+
+    @static_figures.static_figure("test-graph", values)
+    def build():
+        builds.append(1)
+        return {"data": [{"type": "scatter", "x": [2020, 2021], "y": [1.5, 2.5]}], "layout": {}}
+
+    build.builds = builds
+    return build
+
+
+@pytest.fixture
+def client(figure):
+    server = flask.Flask(__name__)
+    static_figures.init_app(server)
+    return server.test_client()
+
+
+def test_key_follows_the_data_and_the_figure_version(figure, source, monkeypatch):
+    key = static_figures.figure_key("test-graph")
+
+    assert static_figures.figure_key("test-graph") == key
+    assert static_figures.figure_url("test-graph") == f"/_figures/{key}/test-graph.json"
+
+    source.write_text("Year,Value\n2020,1.5\n2021,3.5\n")
+    changed = static_figures.figure_key("test-graph")
+    assert changed != key
+
+    static_figures._figures["test-graph"] = (figure, ["figure-test"], 2)
+    assert static_figures.figure_key("test-graph") not in (key, changed)
+
+    static_figures._figures["test-graph"] = (figure, ["figure-test"], 1)
+    monkeypatch.setattr(encoding, "FIGURE_PRECISION", "off")
+    assert static_figures.figure_key("test-graph") not in (key, changed)
+
+
+def test_layout_links_the_current_figure_without_reading_data(figure):
+    store, graph = static_figures.static_graph("test-graph", config={"displayModeBar": False})
+
+    assert store.id == "test-graph-src" and store.data == "/_figures/current/test-graph.json"
+    assert graph.id == "test-graph" and graph.config == {"displayModeBar": False}
+    assert figure.builds == []
+
+
+def test_current_and_stale_urls_redirect_to_the_versioned_file(client):
+    for key in ("current", "0123456789abcdef"):
+        response = client.get(f"/_figures/{key}/test-graph.json")
+
+        assert response.status_code == 302
+        assert response.headers["Location"] == static_figures.figure_url("test-graph")
+        assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_figure_is_rendered_once_and_served_compressed(client, figure):
+    url = static_figures.figure_url("test-graph")
+
+    gzipped = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert gzipped.status_code == 200
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["Vary"] == "Accept-Encoding"
+    assert gzipped.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    body = json.loads(gzip.decompress(gzipped.data))
+    assert body["data"][0]["type"] == "scatter"
+
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+    assert json.loads(plain.data) == body
+    assert figure.builds == [1]
+
+
+def test_build_all_writes_every_figure(figure, tmp_path):
+    assert static_figures.build_all() == ["test-graph"]
+
+    key = static_figures.figure_key("test-graph")
+    assert (tmp_path / "figures" / key / "test-graph.json.gz").exists()
+    assert not (tmp_path / "figures" / key / "test-graph.json.br").exists()
+    static_figures.build_all()
+    assert figure.builds == [1]
+
+
+def test_unknown_figure_is_not_found(client):
+    assert client.get("/_figures/current/missing.json").status_code == 404
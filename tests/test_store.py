@@ -0,0 +1,70 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import store
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+FRAME = pd.DataFrame({
+    "Country": ["Spain", "France", None, "Spain"],
+    "Year": [2020, 2020, 2021, 2021],
+    "Value": [1.5, np.nan, 3.0, 4.0],
+})
+
+
+def counting(frame):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return frame
+
+    return build, calls
+
+
+def test_published_frame_is_mapped_by_later_calls(store_dir):
+    build, calls = counting(FRAME)
+
+    first = store.shared_frame("test", "k1", build)
+    second = store.shared_frame("test", "k1", build)
+
+    assert len(calls) == 1
+    assert os.listdir(store_dir) == ["test-k1.arrow"]
+    for frame in (first, second):
+        pd.testing.assert_frame_equal(frame[["Year", "Value"]], FRAME[["Year", "Value"]])
+        assert frame["Country"].isna().tolist() == [False, False, True, False]
+        assert frame["Country"].dropna().tolist() == ["Spain", "France", "Spain"]
+        assert isinstance(frame["Country"].dtype, pd.CategoricalDtype)
+        assert list(frame["Country"].cat.categories) == ["France", "Spain"]
+        assert frame["Year"].dtype == np.int64
+        # Views of the read-only mapping, not copies.
+        assert not frame["Value"].to_numpy().flags.writeable
+
+
+def test_new_key_replaces_the_stale_file(store_dir):
+    store.shared_frame("test", "k1", lambda: FRAME)
+    store.shared_frame("test", "k2", lambda: FRAME)
+
+    assert os.listdir(store_dir) == ["test-k2.arrow"]
+
+
+def test_frame_arrow_cannot_store_is_returned_with_a_warning(store_dir, caplog):
+    mixed = pd.DataFrame({"Country": ["France", "Spain"], "Value": ["1.5", 0]})
+    build, calls = counting(mixed)
+
+    with caplog.at_level(logging.WARNING, logger="utils.store"):
+        assert store.shared_frame("mixed", "k1", build) is mixed
+    assert "Not sharing mixed" in caplog.text
+    assert os.listdir(store_dir) == []
+
+    store.shared_frame("mixed", "k1", build)
+    assert len(calls) == 2
@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils import wdi
+
+
+HEADER = '"Data Source","World Development Indicators",\n\n"Last Updated Date","2024-06-28",\n\n'
+YEARS = ['1960'] + [str(year) for year in wdi.WDI_YEARS]
+
+
+@pytest.fixture(autouse=True)
+def parsed(monkeypatch):
+    monkeypatch.setattr(wdi, "_parsed", {})
+    return wdi._parsed
+
+
+def write(path, values, mtime_ns=None):
+    # `values` maps country names to {year: value}.
+    rows = [
+        {'Country Name': name, 'Country Code': name[:3].upper(), 'Indicator Name': 'GDP', 'Indicator Code': 'NY.GDP',
+         **{year: by_year.get(int(year)) for year in YEARS}}
+        for name, by_year in values.items()
+    ]
+    path.write_text(HEADER + pd.DataFrame(rows).to_csv(index=False))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_file_is_read_as_a_sorted_long_frame(tmp_path):
+    path = write(tmp_path / "gdp.csv", {
+        'Spain': {1960: 1.0, 2019: 2.0, 2020: 3.0},
+        'France': {1960: 1.0, 2019: 4.0, 2020: 5.0, 2021: 6.0},
+    })
+
+    long = wdi.read_wdi(path, 'GDP', years=(2019, 2020, 2021))
+
+    assert list(long.columns) == ['location', 'year', 'GDP']
+    assert long['location'].tolist() == ['France'] * 3 + ['Spain'] * 3
+    assert long['year'].tolist() == [2019, 2020, 2021] * 2
+    assert long['GDP'].tolist()[:5] == [4.0, 5.0, 6.0, 2.0, 3.0]
+    assert pd.isna(long['GDP'].iloc[5])
+
+
+def test_each_call_gets_its_own_writable_frame(tmp_path):
+    path = write(tmp_path / "gdp.csv", {'France': {2018: 4.0}})
+
+    first = wdi.read_wdi(path, 'GDP')
+    first.loc[0, 'GDP'] = 0.0
+
+    assert wdi.read_wdi(path, 'GDP').loc[0, 'GDP'] == 4.0
+
+
+def test_file_is_parsed_once_until_it_changes(tmp_path, parsed, monkeypatch):
+    path = write(tmp_path / "gdp.csv", {'France': {2019: 4.0}}, mtime_ns=10**18)
+    reads = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: reads.append(1) or read_csv(*args, **kwargs))
+
+    wdi.read_wdi(path, 'GDP')
+    wdi.read_wdi(path, 'Other name')
+    assert len(reads) == 1
+
+    write(tmp_path / "gdp.csv", {'France': {2019: 7.0}}, mtime_ns=2 * 10**18)
+    assert wdi.read_wdi(path, 'GDP', years=(2019,))['GDP'].tolist() == [7.0]
+    wdi.read_wdi(path, 'GDP')
+    assert len(reads) == 3
+    # Only the parses of the current file are kept.
+    assert [mtime for mtime, _ in parsed.values()] == [2 * 10**18, 2 * 10**18]
@@ -0,0 +1,67 @@
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import pytest
+
+from utils.webgl import auto_webgl, use_webgl
+
+
+def lines(traces, points):
+    return go.Figure([
+        go.Scatter(x=list(range(points)), y=list(range(points)), name=str(i), mode="lines")
+        for i in range(traces)
+    ])
+
+
+@pytest.mark.parametrize("traces, points, webgl", [
+    (1, 1000, False),
+    (1, 1001, True),
+    (4, 250, False),
+    (4, 251, True),
+    (50, 1, False),
+    (51, 1, True),
+])
+def test_thresholds(traces, points, webgl):
+    fig = lines(traces, points)
+
+    assert use_webgl(fig, points=1000, traces=50) is webgl
+    assert {trace.type for trace in auto_webgl(fig, points=1000, traces=50).data} == {"scattergl" if webgl else "scatter"}
+
+
+def test_only_scatter_traces_count_and_switch():
+    fig = lines(1, 600)
+    fig.add_bar(x=list(range(600)), y=list(range(600)))
+
+    assert not use_webgl(fig, points=1000)
+    assert auto_webgl(fig, points=1000) is fig
+
+    converted = auto_webgl(fig, points=500)
+    assert [trace.type for trace in converted.data] == ["scattergl", "bar"]
+
+
+def test_small_gl_figures_go_back_to_svg():
+    data = pd.DataFrame({"x": range(10), "y": range(10)})
+    fig = px.line(data, x="x", y="y", render_mode="webgl")
+
+    assert [trace.type for trace in auto_webgl(fig).data] == ["scatter"]
+
+
+def test_styling_is_kept_and_svg_only_props_dropped():
+    fig = go.Figure(go.Scatter(
+        x=[1, 2, 3], y=[4, 5, 6], name="index", mode="lines+markers",
+        hovertemplate="%{y}<extra></extra>", line={"color": "red", "dash": "dot"},
+        stackgroup="one", orientation="v", cliponaxis=False, fillpattern={"shape": "/"},
+    ))
+    fig.update_layout(title="Prices")
+
+    converted = auto_webgl(fig, points=2)
+    [trace] = converted.to_dict()["data"]
+
+    assert trace["type"] == "scattergl"
+    for prop in ("stackgroup", "orientation", "cliponaxis", "fillpattern"):
+        assert prop not in trace
+    assert (trace["name"], trace["mode"], trace["hovertemplate"]) == ("index", "lines+markers", "%{y}<extra></extra>")
+    assert trace["line"] == {"color": "red", "dash": "dot"}
+    assert converted.layout.title.text == "Prices"
+    # What is left is a figure plotly accepts as it stands.
+    go.Figure(converted.to_dict())
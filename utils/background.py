@@ -0,0 +1,204 @@
+import functools
+import logging
+import os
+import time
+
+import dash._callback as dash_callback
+import flask
+from dash import Input, Output, callback
+from dash._callback_context import context_value
+from dash._utils import clean_property_name, stringify_id
+
+from utils import registry
+from utils.cache import code_version
+
+
+logger = logging.getLogger(__name__)
+
+# The animated world maps take long enough to build that they would hold a
+# request thread for the whole time. Their callbacks run as Dash background
+# jobs instead: a DiskcacheManager starts each job in its own process, the
+# browser polls for the result and request threads stay free. Results are
+# kept under BACKGROUND_CACHE_DIR, keyed by the inputs, the dataset versions
+# and the code (utils.cache.code_version), so every worker answers a repeat
+# from disk and a deploy never serves maps its predecessor built. A job that
+# fails is reported once and dropped from the cache, never replayed. Needs
+# dash[diskcache]; without it (or with BACKGROUND_CALLBACKS=0) these are
+# ordinary callbacks. The browser polls every BACKGROUND_INTERVAL ms; results
+# already in the figure cache or the background cache are returned with the
+# first response, without starting a job. Each job also stores how long the
+# callback ran; the request that collects the result puts it in
+# flask.g.background_seconds for utils.metrics (None on requests that only
+# start or poll a job).
+BACKGROUND_CALLBACKS = os.environ.get("BACKGROUND_CALLBACKS", "1") != "0"
+BACKGROUND_CACHE_DIR = os.environ.get("BACKGROUND_CACHE_DIR", ".cache/background")
+BACKGROUND_CACHE_EXPIRE = int(os.environ.get("BACKGROUND_CACHE_EXPIRE", str(24 * 3600)))
+BACKGROUND_INTERVAL = int(os.environ.get("BACKGROUND_INTERVAL", "250"))
+
+# Graphs of a running job get this class (see assets/style.css).
+RUNNING_CLASS = "graph-running"
+
+
+
+
+####################### MANAGER #############################
+
+def _make_manager():
+    if not BACKGROUND_CALLBACKS:
+        return None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+
+        class Manager(DiskcacheManager):
+            def call_job_fn(self, key, job_fn, args, context):
+                # The key reaches the job through its callback context, so
+                # that _timed_job can store the run time next to the result.
+                _collected(None)
+                return super().call_job_fn(key, job_fn, args, dict(context, job_key=key))
+
+            def get_result(self, key, job):
+                # Dash keeps whatever the job stored under the key, errors
+                # included, and would answer every later request with it.
+                result = super().get_result(key, job)
+                _collected(None if result is self.UNDEFINED else self.handle.pop(_seconds_key(key), None))
+                if isinstance(result, dict) and "long_callback_error" in result:
+                    self.clear_cache_entry(key)
+                return result
+
+        cache = diskcache.Cache(BACKGROUND_CACHE_DIR)
+        return Manager(cache, cache_by=[registry.fingerprint, code_version], expire=BACKGROUND_CACHE_EXPIRE)
+    except ImportError:
+        logger.info("dash[diskcache] is not installed; heavy callbacks run in the request thread")
+        return None
+
+
+manager = _make_manager()
+
+
+
+
+####################### TIMING #############################
+
+def _seconds_key(key):
+    return f"{key}-seconds"
+
+
+def _collected(seconds):
+    # The run time of the job whose result this request returns, if any.
+    if flask.has_request_context() and flask.g.get("background_seconds") is None:
+        flask.g.background_seconds = seconds
+
+
+def _timed_job(func):
+    # Runs in the job's process, whose own metrics nobody collects. The time
+    # is stored before Dash stores the result, since Dash terminates the
+    # process once the result has been read.
+    @functools.wraps(func)
+    def job(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            key = context_value.get().get("job_key")
+            if key is not None:
+                manager.handle.set(_seconds_key(key), time.perf_counter() - start, expire=manager.expire)
+
+    return job
+
+
+
+
+####################### DECORATOR #############################
+
+def _outputs(dependencies):
+    for dependency in dependencies:
+        if isinstance(dependency, (list, tuple)):
+            yield from _outputs(dependency)
+        elif isinstance(dependency, Output):
+            yield dependency
+
+
+def _response(outputs_list, value):
+    # The body Dash sends for `value` returned to `outputs_list`.
+    if isinstance(outputs_list, dict):
+        outputs_list, value = [outputs_list], [value]
+    response = {}
+    for spec, item in zip(outputs_list, value):
+        if not dash_callback.NoUpdate.is_no_update(item):
+            response.setdefault(stringify_id(spec["id"]), {})[clean_property_name(spec["property"])] = item
+    return {"multi": True, "response": response}
+
+
+def _ready(func):
+    # The result of func(*args) when it is known without running it, else
+    # None.
+    cached = getattr(func, "cached", None)
+
+    def lookup(args):
+        if cached is not None and cached(*args):
+            return func(*args)
+        key = manager.build_cache_key(func, list(args), [])
+        if not manager.result_ready(key):
+            return None
+        result = manager.get_result(key, None)
+        # Failed jobs go through Dash, which reports the error.
+        if isinstance(result, dict) and "long_callback_error" in result:
+            return None
+        return result
+
+    return lookup
+
+
+def _answer_ready(func, dispatch):
+    # Dash starts a job for every first request of a background callback,
+    # and the browser only asks for its result an interval later, even when
+    # the result is already cached.
+    lookup = _ready(func)
+
+    @functools.wraps(dispatch)
+    def wrapper(*args, **kwargs):
+        if "cacheKey" not in flask.request.args:
+            result = lookup(args)
+            if result is not None:
+                return dash_callback.to_json(_response(kwargs["outputs_list"], result))
+        return dispatch(*args, **kwargs)
+
+    return wrapper
+
+
+def heavy_callback(*dependencies, class_names=None, **kwargs):
+    # Drop-in for dash.callback on slow figure callbacks. As a background job
+    # the callback's graphs are dimmed while it runs, and the job is
+    # cancelled when the user navigates to another page. `class_names` maps
+    # graph ids to their own className, which is restored afterwards.
+    if manager is None:
+        return callback(*dependencies, **kwargs)
+
+    class_names = class_names or {}
+    running = []
+    for output in _outputs(dependencies):
+        if output.component_property == "figure":
+            own = class_names.get(output.component_id, "")
+            running.append((Output(output.component_id, "className"), f"{own} {RUNNING_CLASS}".strip(), own))
+
+    registered = set(dash_callback.GLOBAL_CALLBACK_MAP)
+    register = callback(
+        *dependencies,
+        background=True,
+        manager=manager,
+        interval=BACKGROUND_INTERVAL,
+        running=running,
+        cancel=[Input("_pages_location", "pathname")],
+        **kwargs,
+    )
+    callback_ids = set(dash_callback.GLOBAL_CALLBACK_MAP) - registered
+
+    def decorator(func):
+        register(_timed_job(func))
+        for callback_id in callback_ids:
+            entry = dash_callback.GLOBAL_CALLBACK_MAP[callback_id]
+            entry["callback"] = _answer_ready(func, entry["callback"])
+        return func
+
+    return decorator
@@ -0,0 +1,11 @@
+import logging
+
+# Importing the app registers every page and, with them, their static figures.
+import app  # noqa: F401
+from utils import static_figures
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    figures = static_figures.build_all()
+    print(f"Rendered {len(figures)} figures into {static_figures.FIGURE_DIR}")
@@ -0,0 +1,125 @@
+import functools
+import hashlib
+import logging
+import os
+
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Processed frames are stored as parquet files under this directory. Every
+# entry is keyed by the content hash of its source files plus the version of
+# the transform that produced it, so editing a CSV or bumping `version` makes
+# the old entry unreachable.
+CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", ".cache/datasets")
+
+# Bump to invalidate every cached frame at once (e.g. after a pandas upgrade).
+CACHE_FORMAT = 1
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+
+
+####################### HASHING #############################
+
+@functools.lru_cache(maxsize=None)
+def _hash_file(path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    # Memoised on (size, mtime) so a process only reads each source once;
+    # a missing file hashes to a fixed marker instead of raising.
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    return _hash_file(path, st.st_size, st.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(root=ROOT):
+    # Hash of every module under pages/ and utils/, for caches of values the
+    # code computes (callback results, ETags). Same on every host.
+    digest = hashlib.sha256()
+    for folder in ("pages", "utils"):
+        for dirpath, dirnames, files in os.walk(os.path.join(root, folder)):
+            dirnames.sort()
+            for file in sorted(files):
+                if file.endswith(".py"):
+                    path = os.path.join(dirpath, file)
+                    digest.update(f"{os.path.relpath(path, root)}:{file_hash(path)}".encode())
+    return digest.hexdigest()
+
+
+def cache_key(sources, version=1):
+    digest = hashlib.sha256(f"{CACHE_FORMAT}:{version}".encode())
+    for path in sources:
+        digest.update(f"{path}:{file_hash(path)}".encode())
+    return digest.hexdigest()[:16]
+
+
+
+
+####################### CACHE #############################
+
+def _entry_path(name, key):
+    return os.path.join(CACHE_DIR, f"{name}-{key}.parquet")
+
+
+def _drop_stale(name, keep):
+    prefix = f"{name}-"
+    for file in os.listdir(CACHE_DIR):
+        if file.startswith(prefix) and file.endswith(".parquet") and file != keep:
+            try:
+                os.remove(os.path.join(CACHE_DIR, file))
+            except OSError:
+                pass
+
+
+def cached_frame(name, sources, build, version=1):
+    path = _entry_path(name, cache_key(sources, version))
+
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except Exception as exc:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, exc)
+
+    data = build()
+
+    # Write to a temporary file and rename so concurrent workers never read
+    # a partially written entry. Frames that parquet cannot represent (mixed
+    # object columns) are not cached, with a warning: the loader should
+    # give such columns a single type.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        data.to_parquet(tmp)
+        os.replace(tmp, path)
+        _drop_stale(name, os.path.basename(path))
+    except (ImportError, OSError, TypeError, ValueError) as exc:
+        logger.warning("Not caching %s: %s", name, exc)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return data
+
+
+def disk_cached(*sources, version=1):
+    def decorator(build):
+        name = f"{build.__module__}.{build.__name__}"
+
+        @functools.wraps(build)
+        def wrapper():
+            return cached_frame(name, sources, build, version)
+
+        return wrapper
+
+    return decorator
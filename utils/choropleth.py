@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+
+# plotly.express animates a choropleth with one full trace per frame: every
+# frame repeats the locations, hover names and template of every country. The
+# maps here instead send one base trace holding the locations and hover names,
+# and frames holding only that year's values, which utils.encoding sends as
+# binary typed arrays, so a map costs about years x countries x 4 bytes plus
+# the controls. Countries without a value in a year are NaN and are not
+# drawn, as when they were missing from the frame.
+
+
+
+
+####################### FIGURE #############################
+
+def animated_choropleth(data, locations, color, animation_frame, hover_name=None, layout=None, geos=None, **kwargs):
+    # The figure px.choropleth(data, locations, color, animation_frame,
+    # hover_name, **kwargs) draws for a continuous colour, as a figure dict in
+    # the compact form described above. `layout` and `geos` are passed to
+    # update_layout() and update_geos(): the result is not a go.Figure, which
+    # would validate every frame again.
+    data = data.dropna(subset=[locations, animation_frame])
+    frame_codes, _ = pd.factorize(data[animation_frame])
+    place_codes, places = pd.factorize(data[locations])
+
+    # One row per frame is enough for plotly.express to lay out the slider,
+    # the play buttons, the colour axis and each frame's hover template.
+    fig = px.choropleth(
+        data.drop_duplicates(animation_frame),
+        locations=locations,
+        color=color,
+        animation_frame=animation_frame,
+        hover_name=hover_name,
+        **kwargs,
+    )
+    fig.update_layout(**(layout or {}))
+    fig.update_geos(**(geos or {}))
+    spec = fig.to_dict()
+    # plotly.express adds no frames (nor slider) for a single year, and no
+    # trace at all for empty data.
+    frames = spec.pop("frames", None) or []
+    if not spec["data"]:
+        spec["data"] = [{"type": "choropleth", "geo": "geo", "coloraxis": "coloraxis"}]
+
+    values = np.full((len(frames) or 1, len(places)), np.nan)
+    values[frame_codes, place_codes] = pd.to_numeric(data[color], errors="coerce").to_numpy(dtype=float)
+
+    base = spec["data"][0]
+    base["locations"] = [str(place) for place in places]
+    base["z"] = values[0]
+    if hover_name is not None:
+        first = np.unique(place_codes, return_index=True)[1]
+        base["hovertext"] = data[hover_name].iloc[first].astype(str).tolist()
+
+    if len(frames) < 2:
+        return spec
+
+    spec["frames"] = [
+        {
+            "name": frame["name"],
+            "data": [{
+                "type": "choropleth",
+                "z": row,
+                "hovertemplate": frame["data"][0]["hovertemplate"],
+            }],
+        }
+        for frame, row in zip(frames, values)
+    ]
+    return spec
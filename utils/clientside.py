@@ -0,0 +1,182 @@
+import itertools
+import json
+import os
+
+import dash
+from dash import ClientsideFunction, Input, Output, callback, dcc
+from plotly.io.json import to_json_plotly
+
+
+# Line charts that only filter one small frame by a dropdown value can be
+# drawn in the browser. With CLIENTSIDE_FILTERING=1 a page ships the frame
+# once, as a compact spec in a dcc.Store, and assets/filters.js rebuilds the
+# figure on every selection without a server round-trip. Off by default, in
+# which case the same functions run as ordinary server callbacks.
+CLIENTSIDE_FILTERING = os.environ.get("CLIENTSIDE_FILTERING", "0") != "0"
+
+# Placeholders filters.js fills with the selected value and column.
+KEY = "%{key}"
+COLUMN = "%{column}"
+
+
+
+
+####################### SPEC #############################
+
+def _wire(value):
+    # `value` exactly as Dash would send it: plain JSON types, NaN as null
+    # and timestamps as ISO strings.
+    return json.loads(to_json_plotly(value))
+
+
+def _mentions(text, sample, other_text, other):
+    # `text`, drawn for `sample`, with KEY at the mentions of `sample` that
+    # read `other` in `other_text`, the same text drawn for `other`. Other
+    # occurrences of `sample`, e.g. inside a longer name, stay as they are.
+    if not isinstance(text, str) or not isinstance(other_text, str):
+        return text
+    parts = text.split(sample)
+    if len(parts) > 8:
+        return text
+    for keyed in itertools.product((True, False), repeat=len(parts) - 1):
+        template = parts[0] + "".join((KEY if key else sample) + part for key, part in zip(keyed, parts[1:]))
+        if template.replace(KEY, other) == other_text:
+            return template
+    return text
+
+
+def _title(layout):
+    title = layout.get('title')
+    return title.get('text') if isinstance(title, dict) else None
+
+
+def _hover(text, sample, column):
+    # plotly.express writes one "label=value" line per column: the line whose
+    # value is the sample and the one labelled with the plotted column change.
+    if not isinstance(text, str):
+        return text
+    lines = []
+    for line in text.split("<br>"):
+        label, equals, value = line.partition("=")
+        if equals and value == sample:
+            line = f"{label}={KEY}"
+        elif equals and label == column:
+            line = f"{COLUMN}={value}"
+        lines.append(line)
+    return "<br>".join(lines)
+
+
+def _trace_template(trace, sample, column):
+    trace = {k: v for k, v in trace.items() if k not in ('x', 'y')}
+    for field in ('name', 'legendgroup'):
+        if trace.get(field) == sample:
+            trace[field] = KEY
+    if 'hovertemplate' in trace:
+        trace['hovertemplate'] = _hover(trace['hovertemplate'], sample, column)
+    return trace
+
+
+def _layout_template(layout, sample, column, other_layout, other):
+    layout = dict(layout)
+    if _title(layout) is not None and other is not None:
+        text = _mentions(_title(layout), sample, _title(other_layout), other)
+        layout['title'] = dict(layout['title'], text=text)
+    yaxis = layout.get('yaxis')
+    if isinstance(yaxis, dict) and (yaxis.get('title') or {}).get('text') == column:
+        layout['yaxis'] = dict(yaxis, title=dict(yaxis['title'], text=COLUMN))
+    return layout
+
+
+def line_spec(build, data, key, x, y, sample, overall=None, grouped=True):
+    # Everything filters.js needs to redraw build(value) for any value of the
+    # `key` column. `build(sample)` is drawn once on the server and its
+    # first trace and layout are reused as templates: trace names, legend
+    # groups, hover templates and the y axis title get KEY and COLUMN where
+    # they are `sample` and the first `y` column, and the title where it
+    # differs from the title drawn for another key. Nothing else is touched.
+    # `y` may name several columns for charts
+    # whose plotted column is also selectable. `grouped` means one trace per
+    # key value, as px.line(color=key) draws; `overall` is the value that
+    # selects every key.
+    columns = [y] if isinstance(y, str) else list(y)
+    codes, keys = data[key].factorize()
+
+    figure = _wire(build(sample))
+    other = next((str(value) for value in keys if str(value) != sample), None)
+    other_layout = _wire(build(other))['layout'] if other is not None else {}
+
+    spec = {
+        'keys': [str(value) for value in keys],
+        'key': codes.tolist(),
+        'x': _wire(data[x].tolist()),
+        'y': {column: _wire(data[column].tolist()) for column in columns},
+        'column': columns[0],
+        'sample': sample,
+        'grouped': grouped,
+        'figure': {
+            'data': [_trace_template(trace, sample, columns[0]) for trace in figure['data'][:1]],
+            'layout': _layout_template(figure['layout'], sample, columns[0], other_layout, other),
+        },
+        'overall': overall,
+    }
+
+    if overall is not None:
+        # The overall chart is drawn from its own first trace: with many
+        # points plotly.express switches to WebGL traces.
+        traces = _wire(build(overall))['data']
+        spec['order'] = [trace['name'] for trace in traces]
+        spec['colors'] = [trace.get('line', {}).get('color') for trace in traces]
+        spec['overall_trace'] = _trace_template(traces[0], spec['order'][0], columns[0])
+    return spec
+
+
+def spec_store(figure_id):
+    # Layout children holding the spec of `figure_id`, or nothing when the
+    # chart is drawn on the server. The store starts empty and a callback
+    # (spec_callback, or the page's own) fills it.
+    if not CLIENTSIDE_FILTERING:
+        return []
+    return [dcc.Store(id=f"{figure_id}-spec")]
+
+
+
+
+####################### CALLBACKS #############################
+
+def clientside_filter(outputs, inputs, function_name="line"):
+    # Draws `outputs` with filters.<function_name>, fed by the inputs and the
+    # spec stored next to the first output.
+    outputs = outputs if isinstance(outputs, list) else [outputs]
+    inputs = inputs if isinstance(inputs, list) else [inputs]
+    dash.clientside_callback(
+        ClientsideFunction(namespace="filters", function_name=function_name),
+        *outputs,
+        *inputs,
+        Input(f"{outputs[0].component_id}-spec", "data"),
+    )
+
+
+def spec_callback(figure_id):
+    # Registers the decorated zero-argument function to fill the store of
+    # spec_store(figure_id) when the page loads, with CLIENTSIDE_FILTERING
+    # on. The function itself is returned unchanged either way.
+    def decorator(func):
+        if CLIENTSIDE_FILTERING:
+            callback(Output(f"{figure_id}-spec", "data"), Input(f"{figure_id}-spec", "id"))(lambda _: func())
+        return func
+
+    return decorator
+
+
+def filter_callback(outputs, inputs, function_name="line"):
+    # Registers the decorated function as a server callback, or, with
+    # CLIENTSIDE_FILTERING on, its clientside_filter counterpart. The function
+    # itself is returned unchanged either way.
+    def decorator(func):
+        if CLIENTSIDE_FILTERING:
+            clientside_filter(outputs, inputs, function_name)
+        else:
+            callback(outputs, inputs)(func)
+        return func
+
+    return decorator
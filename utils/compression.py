@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import os
+
+import dash
+import flask
+
+from utils.cache import code_version
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Dash answers layout and callback requests with plain JSON, and the animated
+# choropleths make those responses several MB. They are compressed here when
+# the client accepts it. The app shell (_dash-layout) and the callback graph
+# (_dash-dependencies) only change with the code, so those GETs carry a
+# strong ETag derived from the code and the Dash version, the same on every
+# host. The browser revalidates them on each load and a matching
+# If-None-Match is answered with 304 before Dash serializes anything.
+# Callback responses are POSTs, which browsers never revalidate, so they are
+# only compressed. Static figures and assets get their ETags from send_file.
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", "6"))
+
+_ENDPOINTS = ("_dash-update-component", "_dash-layout", "_dash-dependencies")
+_TAGGED = ("_dash-layout", "_dash-dependencies")
+_code_version = ""
+
+
+
+
+####################### ETAGS #############################
+
+def _taggable():
+    # A layout function may return something different on every request.
+    if flask.request.method != "GET" or not flask.request.path.endswith(_TAGGED):
+        return False
+    return not (flask.request.path.endswith("_dash-layout") and callable(dash.get_app().layout))
+
+
+def _request_etag():
+    digest = hashlib.sha256(f"{_code_version}:{dash.__version__}".encode())
+    digest.update(flask.request.full_path.encode())
+    return digest.hexdigest()[:32]
+
+
+def _variants(tag):
+    return [tag] + [f"{tag}-{encoding}" for encoding in ("gzip", "br")]
+
+
+def _before_request():
+    if not flask.request.path.endswith(_ENDPOINTS):
+        return None
+    tag = flask.g.dash_etag = _request_etag() if _taggable() else None
+    if tag is None:
+        return None
+    for variant in _variants(tag):
+        if flask.request.if_none_match.contains(variant):
+            response = flask.Response(status=304)
+            response.set_etag(variant)
+            response.headers["Vary"] = "Accept-Encoding"
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+    return None
+
+
+
+
+####################### COMPRESSION #############################
+
+def _encoding(accepted):
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _after_request(response):
+    if "dash_etag" not in flask.g:
+        return response
+    tag = flask.g.pop("dash_etag")
+    if response.status_code != 200 or response.direct_passthrough:
+        return response
+
+    response.headers["Vary"] = "Accept-Encoding"
+    encoding = _encoding(flask.request.headers.get("Accept-Encoding", ""))
+    if tag is not None:
+        response.headers["Cache-Control"] = "no-cache"
+    body = response.get_data()
+    if encoding is None or "Content-Encoding" in response.headers or len(body) < COMPRESS_MIN_SIZE:
+        if tag is not None:
+            response.set_etag(tag)
+        return response
+
+    if encoding == "br":
+        body = brotli.compress(body, quality=min(COMPRESS_LEVEL, 11))
+    else:
+        body = gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # Each encoding is a different representation and gets its own tag.
+    if tag is not None:
+        response.set_etag(f"{tag}-{encoding}")
+    return response
+
+
+def init_app(server):
+    global _code_version
+    _code_version = code_version(server.root_path)
+    server.before_request(_before_request)
+    server.after_request(_after_request)
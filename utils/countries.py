@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+
+# Every distinct country name is resolved through country_converter once and
+# the answer is kept in this JSON table, so later runs (and other workers)
+# only pay for names they have never seen.
+COUNTRY_TABLE = os.environ.get("COUNTRY_TABLE", ".cache/countries.json")
+
+_NOT_FOUND = "\x00not found"
+
+_lock = threading.Lock()
+_table = None
+_converter = None
+
+
+def _after_fork():
+    # See utils.registry: forked background jobs need a free lock.
+    global _lock
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+
+
+####################### TABLE #############################
+
+def _cc_version():
+    import country_converter
+    return country_converter.__version__
+
+
+def _load_table():
+    global _table
+    if _table is None:
+        _table = {}
+        try:
+            with open(COUNTRY_TABLE, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") == _cc_version():
+                _table = stored["mappings"]
+        except (OSError, ValueError, KeyError):
+            pass
+    return _table
+
+
+def _save_table():
+    tmp = f"{COUNTRY_TABLE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(COUNTRY_TABLE) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": _cc_version(), "mappings": _table}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, COUNTRY_TABLE)
+    except OSError:
+        pass
+
+
+def _get_converter():
+    global _converter
+    if _converter is None:
+        import country_converter
+
+        logging.getLogger("country_converter").setLevel(logging.ERROR)
+        _converter = country_converter.CountryConverter()
+    return _converter
+
+
+def _mapping(to, names):
+    # Returns the {name: value} table for `to`, resolving any unseen names in
+    # a single batched country_converter call. Unmatched names map to None.
+    with _lock:
+        table = _load_table().setdefault(to, {})
+        missing = [name for name in names if name not in table]
+        if missing:
+            result = _get_converter().convert(names=missing, to=to, not_found=_NOT_FOUND)
+            if len(missing) == 1:
+                result = [result]
+            for name, value in zip(missing, result):
+                table[name] = None if value == _NOT_FOUND else value
+            _save_table()
+        return table
+
+
+
+
+####################### LOOKUP #############################
+
+def convert(names, to, overrides=None, not_found="not found"):
+    # Vectorised drop-in for cc.convert(names=..., to=...). `overrides` is a
+    # {name: value} table that wins over country_converter; `not_found=None`
+    # keeps the input name for unmatched entries, as country_converter does.
+    names = names if isinstance(names, pd.Series) else pd.Series(list(names), dtype=object)
+    table = _mapping(to, names.dropna().unique().tolist())
+
+    resolved = names.map(table)
+    if overrides:
+        resolved = names.map(overrides).fillna(resolved)
+
+    fill = names if not_found is None else not_found
+    return resolved.where(resolved.notna(), fill)
+
+
+def continent(names, overrides=None, not_found="not found"):
+    return convert(names, "continent", overrides, not_found)
+
+
+def iso3(names, overrides=None, not_found="not found"):
+    return convert(names, "ISO3", overrides, not_found)
@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import registry
+
+
+# Long daily series are sent to the browser downsampled to about one point
+# per pixel of the plot with Largest-Triangle-Three-Buckets, which keeps the
+# shape of the line (peaks and crashes included) rather than averaging it
+# away. When the user zooms, only the visible window is resampled, so once it
+# holds fewer rows than the plot has pixels every row is sent.
+
+_series = {}
+_lock = threading.Lock()
+
+
+
+
+####################### LTTB #############################
+
+def lttb(x, y, points):
+    # Indexes of the `points` rows of (x, y) that LTTB keeps; x is sorted.
+    # The first and last rows are always kept.
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # points - 2 buckets between the first and the last row.
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        following = slice(end, edges[i + 2] if i + 2 < len(edges) else n)
+        next_x, next_y = x[following].mean(), y[following].mean()
+        # Twice the area of the triangle between the previously kept point,
+        # each candidate and the mean of the next bucket.
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = kept[i + 1] = start + int(area.argmax())
+    return kept
+
+
+def window(x, start=None, end=None):
+    # Slice of the sorted array x between start and end, widened by a row on
+    # each side so the line runs to the edges of the plot.
+    low = 0 if start is None else max(int(np.searchsorted(x, start, "left")) - 1, 0)
+    high = len(x) if end is None else min(int(np.searchsorted(x, end, "right")) + 1, len(x))
+    return slice(low, high)
+
+
+
+
+####################### SERIES #############################
+
+def series(accessor, key, x, y):
+    # {key value: (x, y)} numpy arrays sorted by x, built once per version of
+    # the dataset. Datetime x values become int64 nanoseconds.
+    name = accessor.dataset_name
+    version = registry.version(name)
+    cached = _series.get((name, key, x, y))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        data = accessor()
+        result = {}
+        for value, group in data.groupby(key, observed=True, sort=False):
+            group = group.dropna(subset=[y]).sort_values(x)
+            xs = group[x].to_numpy()
+            if np.issubdtype(xs.dtype, np.datetime64):
+                xs = xs.astype("datetime64[ns]").view(np.int64)
+            result[value] = (xs, group[y].to_numpy(dtype=float))
+        _series[(name, key, x, y)] = (version, result)
+    return result
+
+
+def resample(xs, ys, start=None, end=None, points=1000):
+    # The rows of one series between start and end, downsampled to `points`.
+    # Returns (x, y, rows in the window).
+    rows = window(xs, start, end)
+    xs, ys = xs[rows], ys[rows]
+    kept = lttb(xs, ys, points)
+    return xs[kept], ys[kept], len(xs)
+
+
+def to_nanoseconds(value):
+    # A date from relayoutData ("2020-03-16 04:48:00.0") as int64 nanoseconds.
+    return None if value is None else pd.Timestamp(value).value
@@ -0,0 +1,139 @@
+import base64
+import functools
+import os
+
+import dash._callback as dash_callback
+import numpy as np
+import plotly.graph_objects as go
+
+
+# The numeric x, y and z arrays of every figure sent to the browser (callback
+# outputs, patched traces and static figures) go out as plotly.js typed
+# arrays: base64 of a binary buffer instead of decimal text, which the
+# browser decodes without parsing. Each array is quantized on its own to
+# FIGURE_PRECISION:
+#   float32   4-byte floats, about 7 significant digits (the default)
+#   float64   8-byte floats, the values exactly
+#   <n>       values rounded to n decimals, in 4-byte floats when that keeps
+#             them, else 8-byte
+#   off       plain JSON, as plotly.py writes it
+# Whole-number arrays without gaps are sent in the smallest integer type that
+# holds them at any precision. Dates, categories and text are left alone.
+FIGURE_PRECISION = os.environ.get("FIGURE_PRECISION", "float32")
+
+_ARRAYS = ("x", "y", "z")
+_INTEGER_TYPES = ("i1", "u1", "i2", "u2", "i4", "u4")
+
+
+
+
+####################### ARRAYS #############################
+
+def typed_array(values, dtype):
+    # `values` as a plotly.js typed array spec: base64 of the little-endian
+    # buffer, with its shape when it has more than one dimension.
+    values = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    spec = {"dtype": dtype, "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+    if values.ndim > 1:
+        spec["shape"] = ",".join(str(size) for size in values.shape)
+    return spec
+
+
+def _integer_type(values):
+    low, high = values.min(), values.max()
+    for dtype in _INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "f8"
+
+
+def quantize(values, precision=None):
+    # The typed array spec of `values` at `precision` (FIGURE_PRECISION by
+    # default), or None when it is not a numeric array or precision is "off".
+    precision = FIGURE_PRECISION if precision is None else str(precision)
+    if precision == "off":
+        return None
+    if isinstance(values, (list, tuple)):
+        values = np.asarray(values)
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in "iuf" or values.size == 0 or values.ndim > 2:
+        return None
+
+    if values.dtype.kind in "iu":
+        return typed_array(values, _integer_type(values))
+
+    decimals = None if precision in ("float32", "float64") else int(precision)
+    if decimals is not None:
+        values = np.round(values, decimals)
+    finite = np.isfinite(values)
+    if finite.all() and np.array_equal(values, np.trunc(values)):
+        return typed_array(values, _integer_type(values))
+
+    if precision == "float64" or np.abs(values[finite]).max(initial=0) > np.finfo(np.float32).max:
+        return typed_array(values, "f8")
+    single = values.astype(np.float32)
+    if decimals is not None and not np.array_equal(np.round(single.astype(float), decimals), values, equal_nan=True):
+        return typed_array(values, "f8")
+    return typed_array(single, "f4")
+
+
+
+
+####################### FIGURES #############################
+
+def encode_traces(traces, precision=None):
+    # Copies of the trace dicts with their numeric x, y and z arrays encoded.
+    encoded = []
+    for trace in traces:
+        trace = dict(trace)
+        for name in _ARRAYS:
+            if name in trace:
+                spec = quantize(trace[name], precision)
+                if spec is not None:
+                    trace[name] = spec
+        encoded.append(trace)
+    return encoded
+
+
+def encode_figure(figure, precision=None):
+    # `figure` (a go.Figure or a figure dict) with every trace, including
+    # those of animation frames, encoded. Anything else is returned as is.
+    # The input is not modified: cached figures are shared.
+    if isinstance(figure, go.Figure):
+        figure = figure.to_plotly_json()
+    if not isinstance(figure, dict) or not isinstance(figure.get("data"), (list, tuple)):
+        return figure
+
+    figure = dict(figure, data=encode_traces(figure["data"], precision))
+    if figure.get("frames"):
+        figure["frames"] = [
+            dict(frame, data=encode_traces(frame.get("data", []), precision))
+            for frame in figure["frames"]
+        ]
+    return figure
+
+
+def _encode_response(to_json):
+    # Dash's callback response is {"response": {component id: {prop: value}}};
+    # every "figure" value in it is encoded before the JSON encoding.
+    @functools.wraps(to_json)
+    def wrapper(response):
+        outputs = response.get("response") if isinstance(response, dict) else None
+        if isinstance(outputs, dict):
+            response = dict(response, response={
+                component: {
+                    prop: encode_figure(value) if prop == "figure" else value
+                    for prop, value in props.items()
+                }
+                for component, props in outputs.items()
+            })
+        return to_json(response)
+
+    return wrapper
+
+
+def init_app(server):
+    # Register before utils.metrics, so that the encoding is timed as part
+    # of the "serialize" phase.
+    if FIGURE_PRECISION != "off":
+        dash_callback.to_json = _encode_response(dash_callback.to_json)
@@ -0,0 +1,106 @@
+import decimal
+import logging
+import os
+
+import dash._callback as dash_callback
+import dash.dash as dash_app
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+from plotly.io.json import to_json_plotly
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+# Dash writes callback responses, page layouts and its config with plotly's
+# to_json_plotly. That tries orjson, but as soon as the value holds something
+# orjson cannot encode (Dash components, a go.Figure, pandas timestamps) it
+# walks the whole value again in Python, element by element, and encodes the
+# result a second time. Here orjson gets a `default` hook for those types
+# instead, so a response is encoded in one native pass, NumPy arrays
+# included. The JSON is the same, escaped the same way for <script> tags.
+# Flask's own JSON (flask.jsonify, request.get_json) goes through orjson too.
+# Without orjson, or with FAST_JSON=0, plotly's encoder is kept.
+FAST_JSON = os.environ.get("FAST_JSON", "1") != "0"
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+# As plotly.io.json escapes them.
+_ESCAPES = (
+    (b"<", b"\\u003c"),
+    (b">", b"\\u003e"),
+    (b"/", b"\\u002f"),
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+
+
+
+####################### ENCODER #############################
+
+def _default(value):
+    # Called by orjson for each value it has no encoding for.
+    if hasattr(value, "to_plotly_json"):
+        # Dash components, plotly figures and dash.Patch.
+        return value.to_plotly_json()
+    if isinstance(value, np.ndarray):
+        if not value.flags.c_contiguous:
+            return np.ascontiguousarray(value)
+        if value.dtype.kind == "M":
+            return np.datetime_as_string(value).tolist()
+        return value.tolist()
+    if isinstance(value, (pd.Series, pd.Index)):
+        return value.to_numpy()
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value, option=0):
+    # `value` as JSON text, as Dash's to_json writes it. Values orjson cannot
+    # encode even with the hook go through plotly's encoder.
+    if orjson is None:
+        return to_json_plotly(value)
+    try:
+        body = orjson.dumps(value, default=_default, option=_OPTIONS | option)
+    except TypeError:
+        return to_json_plotly(value)
+    for char, escaped in _ESCAPES:
+        if char in body:
+            body = body.replace(char, escaped)
+    return body.decode()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # flask.jsonify and request.get_json() through orjson.
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, orjson.OPT_SORT_KEYS if kwargs.get("sort_keys", self.sort_keys) else 0)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def init_app(server):
+    # Register before utils.encoding and utils.metrics, which wrap the
+    # encoder Dash uses for callback responses.
+    if not FAST_JSON:
+        return
+    if orjson is None:
+        logger.info("orjson is not installed; Dash responses use plotly's JSON encoder")
+        return
+    dash_callback.to_json = dumps
+    dash_app.to_json = dumps
+    server.json = OrjsonProvider(server)
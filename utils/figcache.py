@@ -0,0 +1,130 @@
+import collections
+import functools
+import os
+import threading
+
+import plotly.graph_objects as go
+
+from utils import registry
+
+
+# Callback outputs are kept in a bounded, process-wide LRU keyed by the
+# figure id, the callback arguments and the version of every dataset the
+# figure is drawn from. Figures are stored as plain dicts, so a hit skips
+# plotly.express entirely and only leaves the JSON encoding to Dash. Any
+# other output is kept as returned: the figure specs of utils.clientside and
+# the StockMarket graph container (html children) go through here too, so
+# whatever is cached must only depend on the arguments and the datasets.
+FIGURE_CACHE_SIZE = int(os.environ.get("FIGURE_CACHE_SIZE", "256"))
+
+
+
+
+####################### CACHE #############################
+
+class FigureCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # See utils.registry: forked background jobs need a free lock.
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __contains__(self, key):
+        # Does not count as a hit or a miss.
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+figures = FigureCache(FIGURE_CACHE_SIZE)
+
+
+
+
+####################### DECORATOR #############################
+
+def _freeze(value):
+    # Dropdown values may be lists or dicts; make them usable as dict keys.
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _plain(output):
+    if isinstance(output, go.Figure):
+        return output.to_dict()
+    if isinstance(output, tuple):
+        return tuple(_plain(item) for item in output)
+    if isinstance(output, list):
+        return [_plain(item) for item in output]
+    return output
+
+
+def cached_figure(figure_id, *datasets):
+    # Caches what a callback returns. `datasets` are the @dataset accessors
+    # the figure reads, so a changed source file yields a new key. Cached
+    # outputs are shared between requests and must not be mutated.
+    names = [accessor.dataset_name for accessor in datasets]
+
+    def decorator(func):
+        def key(args, kwargs):
+            versions = tuple(registry.version(name) for name in names)
+            return (figure_id, _freeze(args), _freeze(kwargs), versions)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            entry = key(args, kwargs)
+            try:
+                return figures.get(entry)
+            except KeyError:
+                pass
+
+            output = _plain(func(*args, **kwargs))
+            figures.put(entry, output)
+            return output
+
+        # Whether a call with these arguments would be answered from the cache.
+        wrapper.cached = lambda *args, **kwargs: key(args, kwargs) in figures
+        return wrapper
+
+    return decorator
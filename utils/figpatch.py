@@ -0,0 +1,31 @@
+import dash
+
+from utils import encoding
+
+
+# Country pickers only change the traces and title of their line charts.
+# After the first render those graphs are updated with dash.Patch, so a click
+# sends a few KB of points instead of a full figure with its template.
+
+def retrace(figure):
+    # Patch that swaps in the traces and title of `figure` (a figure dict)
+    # and lets the axes rescale, leaving the rest of the client figure alone.
+    layout = figure.get('layout', {})
+    patched = dash.Patch()
+    patched['data'] = encoding.encode_traces(figure['data'])
+    patched['layout']['title'] = layout.get('title', {})
+    for axis in layout:
+        if axis.startswith(('xaxis', 'yaxis')):
+            patched['layout'][axis]['autorange'] = True
+    return patched
+
+
+def patch_figures(figures):
+    # Full figures on the initial call, when the graphs have just been
+    # mounted and hold nothing to patch; patches on later input changes.
+    # Takes a single figure dict or a tuple of them.
+    if dash.ctx.triggered_id is None:
+        return figures
+    if isinstance(figures, dict):
+        return retrace(figures)
+    return tuple(retrace(figure) for figure in figures)
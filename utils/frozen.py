@@ -0,0 +1,101 @@
+import functools
+import inspect
+
+import pandas as pd
+
+
+# Registry frames are shared by every request thread. They are handed out as
+# FrozenFrame: every column buffer is write-protected and the mutating
+# DataFrame API raises, while anything derived from them (filters, groupbys,
+# merge, assign, copy) is an ordinary DataFrame the caller owns.
+
+class ReadOnlyDatasetError(ValueError):
+    pass
+
+
+def _refuse(*args, **kwargs):
+    raise ReadOnlyDatasetError("shared datasets are read-only; derive a new frame (e.g. .assign() or .copy()) instead")
+
+
+def _protect(values):
+    for array in (values, getattr(values, "_ndarray", None), getattr(values, "_codes", None)):
+        flags = getattr(array, "flags", None)
+        if flags is not None and hasattr(flags, "writeable"):
+            flags.writeable = False
+
+
+class _ReadOnlyIndexer:
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __getattr__(self, name):
+        # pandas reaches into frame.loc for its helpers, e.g. for
+        # frame.loc[rows, columns].
+        return getattr(self._indexer, name)
+
+    __setitem__ = _refuse
+
+
+class FrozenFrame(pd.DataFrame):
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+    __setitem__ = _refuse
+    __delitem__ = _refuse
+    insert = _refuse
+    pop = _refuse
+    update = _refuse
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_") and name in self.columns:
+            _refuse()
+        super().__setattr__(name, value)
+
+
+def _no_inplace(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if kwargs.get("inplace"):
+            _refuse()
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+for _name, _method in inspect.getmembers(pd.DataFrame, inspect.isfunction):
+    if not _name.startswith("_") and "inplace" in inspect.signature(_method).parameters:
+        setattr(FrozenFrame, _name, _no_inplace(_method))
+
+
+
+
+####################### FREEZE #############################
+
+def freeze(frame):
+    # Returns a FrozenFrame over the same buffers, now write-protected, so
+    # freezing costs no copy.
+    if not isinstance(frame, pd.DataFrame):
+        return frame
+    for block in frame._mgr.blocks:
+        _protect(block.values)
+    return FrozenFrame(frame)
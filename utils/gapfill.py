@@ -0,0 +1,35 @@
+# Group-wise gap filling for the OWID cases/deaths frame. Missing values are
+# rebuilt from the known values of the same key (location, year), scaled by a
+# per-continent coefficient of variation f. A gap after a known value v is
+# filled as v * f, v * f**2, ... ; a leading gap before the first known value
+# w starts from w / f and then chains forward the same way. Every step is a
+# groupby ffill/bfill/cumcount, so the cost is linear in the number of rows.
+
+def coefficient_of_variation(data, by, column):
+    grouped = data.groupby(by)[column]
+    mean = grouped.mean()
+    return grouped.std() / mean.where(mean != 0)
+
+
+def fill_with_evolution(data, factors, by, keys):
+    # `factors` maps each column to fill to a Series of factors indexed by
+    # the values of the `by` column (e.g. continent).
+    filled = data.copy()
+    groups = [filled[key] for key in keys]
+
+    for column, factor_by_group in factors.items():
+        values = filled[column]
+        factor = filled[by].map(factor_by_group)
+
+        # Rank of each row within its key and distance, in rows of the same
+        # key, to the last known value.
+        rank = values.groupby(groups).cumcount()
+        last_known = rank.where(values.notna()).groupby(groups).ffill()
+        steps = rank - last_known
+
+        forward = values.groupby(groups).ffill() * factor ** steps
+        leading = values.groupby(groups).bfill() / factor * factor ** rank
+
+        filled[column] = values.fillna(forward.where(last_known.notna(), leading))
+
+    return filled
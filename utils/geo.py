@@ -0,0 +1,387 @@
+import argparse
+import collections
+import json
+import math
+import os
+
+import dash
+from dash import dcc
+
+
+# Country geometry for the maps is served from assets/topojson/ instead of
+# plotly.js' default CDN (cdn.plot.ly), so maps render without internet
+# access and the browser gets it from the app like any other asset. Each
+# level is a directory holding world_110m.json in the layout plotly.js
+# expects, simplified to a different tolerance (in degrees):
+#   detailed  every vertex of the source geometry
+#   standard  for ordinary maps
+#   simple    for small and animated maps, where it is redrawn every frame
+# `python -m utils.geo` rebuilds them from a Natural Earth admin-0 countries
+# shapefile (data/naturalearth_lowres.shp by default).
+GEOMETRY_DIR = "assets/topojson"
+GEOMETRY_LEVELS = {"detailed": 0.0, "standard": 0.1, "simple": 0.35}
+DEFAULT_LEVEL = os.environ.get("MAP_GEOMETRY", "standard")
+SOURCE = "data/naturalearth_lowres.shp"
+
+# plotly.js loads world_<resolution>m.json; the figures keep the default 110.
+TOPOJSON_NAME = "world_110m.json"
+QUANTIZATION = 100_000
+
+# Layers plotly.js may draw that Natural Earth's countries do not provide.
+_EMPTY_LAYERS = ("lakes", "rivers", "subunits")
+
+
+
+
+####################### GRAPHS #############################
+
+def map_config(level=None, **config):
+    # dcc.Graph config pointing plotly.js at the app's own geometry.
+    level = level or DEFAULT_LEVEL
+    if level not in GEOMETRY_LEVELS:
+        raise ValueError(f"unknown map geometry level {level!r}")
+    return {"topojsonURL": dash.get_asset_url(f"topojson/{level}/"), **config}
+
+
+def map_graph(figure_id, level=None, **kwargs):
+    return dcc.Graph(id=figure_id, config=map_config(level), **kwargs)
+
+
+
+
+####################### SOURCE #############################
+
+def _iso3(attributes):
+    # Natural Earth marks countries without an official code with -99.
+    for field in ("iso_a3", "adm0_a3", "iso_a3_eh"):
+        code = attributes.get(field)
+        if code and code != "-99":
+            return code
+    return None
+
+
+def _signed_area(ring):
+    # Twice the planar area; negative for clockwise rings, which is how both
+    # shapefiles and d3 mark outer rings.
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:]))
+
+
+def read_countries(path=SOURCE):
+    # [(iso3, [[outer, hole, ...], ...])] with rings as closed lists of
+    # (lon, lat). Names without a code are resolved like the datasets' are.
+    import shapefile  # pyshp; only needed to rebuild the geometry
+
+    from utils import countries
+
+    with shapefile.Reader(path) as shp:
+        records = [
+            ({key.lower(): value for key, value in item.record.as_dict().items()}, item.shape)
+            for item in shp.iterShapeRecords()
+        ]
+
+    missing = [attributes["name"] for attributes, _ in records if not _iso3(attributes)]
+    resolved = dict(zip(missing, countries.iso3(missing, not_found=None))) if missing else {}
+
+    result = []
+    for attributes, shape in records:
+        bounds = list(shape.parts) + [len(shape.points)]
+        polygons = []
+        for start, end in zip(bounds, bounds[1:]):
+            ring = [tuple(point) for point in shape.points[start:end]]
+            if _signed_area(ring) < 0 or not polygons:
+                polygons.append([ring])
+            else:
+                polygons[-1].append(ring)
+        code = _iso3(attributes) or resolved.get(attributes["name"])
+        result.append((code if code != attributes["name"] else None, polygons))
+    return result
+
+
+
+
+####################### TOPOLOGY #############################
+
+class _Quantizer:
+    def __init__(self, points):
+        xs, ys = zip(*points)
+        self.x0, self.y0 = min(xs), min(ys)
+        self.kx = (max(xs) - self.x0) / (QUANTIZATION - 1) or 1
+        self.ky = (max(ys) - self.y0) / (QUANTIZATION - 1) or 1
+
+    def __call__(self, ring):
+        points = [(round((x - self.x0) / self.kx), round((y - self.y0) / self.ky)) for x, y in ring]
+        return [p for i, p in enumerate(points) if i == 0 or p != points[i - 1]]
+
+    def lonlat(self, point):
+        return point[0] * self.kx + self.x0, point[1] * self.ky + self.y0
+
+    def transform(self):
+        return {"scale": [self.kx, self.ky], "translate": [self.x0, self.y0]}
+
+
+def _junctions(rings):
+    # Points where a boundary shared by some rings stops being shared: every
+    # occurrence of a point but the junctions has the same two neighbours.
+    neighbours, junctions = {}, set()
+    for ring in rings:
+        points = ring[:-1]
+        for i, point in enumerate(points):
+            pair = frozenset((points[i - 1], points[(i + 1) % len(points)]))
+            if neighbours.setdefault(point, pair) != pair:
+                junctions.add(point)
+    return junctions
+
+
+def _cut(rings):
+    # Splits the rings into arcs at the junctions so that a shared boundary
+    # is stored once; rings become lists of arc indexes, ~i for arc i
+    # reversed. A ring without junctions is one closed arc, rotated to a
+    # canonical start so that an enclave and the hole around it share it.
+    junctions = _junctions(rings)
+    arcs, index = [], {}
+
+    def arc_id(points):
+        key = tuple(points)
+        if key in index:
+            return index[key]
+        if key[::-1] in index:
+            return ~index[key[::-1]]
+        index[key] = len(arcs)
+        arcs.append(list(points))
+        return index[key]
+
+    result = []
+    for ring in rings:
+        points = ring[:-1]
+        starts = [i for i, point in enumerate(points) if point in junctions]
+        start = starts[0] if starts else points.index(min(points))
+        points = points[start:] + points[:start] + [points[start]]
+        if not starts:
+            result.append([arc_id(points)])
+            continue
+        ids, first = [], 0
+        for i in range(1, len(points)):
+            if points[i] in junctions or i == len(points) - 1:
+                ids.append(arc_id(points[first:i + 1]))
+                first = i
+        result.append(ids)
+    return arcs, result
+
+
+def _ends(arcs, arc):
+    points = arcs[arc] if arc >= 0 else arcs[~arc][::-1]
+    return points[0], points[-1]
+
+
+def _merge(arcs, rings):
+    # Outlines of the union of all rings: the arcs only one ring uses,
+    # chained end to end. Returns the outer rings and the holes as arc index
+    # lists, and a function giving a ring's points.
+    uses = collections.Counter(arc if arc >= 0 else ~arc for ring in rings for arc in ring)
+    outline = [arc for ring in rings for arc in ring if uses[arc if arc >= 0 else ~arc] == 1]
+    starting = collections.defaultdict(list)
+    for arc in outline:
+        starting[_ends(arcs, arc)[0]].append(arc)
+
+    merged, done = [], set()
+    for arc in outline:
+        if arc in done:
+            continue
+        ring = [arc]
+        done.add(arc)
+        start, end = _ends(arcs, arc)
+        while end != start:
+            arc = next((a for a in starting[end] if a not in done), None)
+            if arc is None:
+                raise ValueError("the source geometry has an open outline")
+            ring.append(arc)
+            done.add(arc)
+            end = _ends(arcs, arc)[1]
+        merged.append(ring)
+
+    def points(ring):
+        result = []
+        for arc in ring:
+            result.extend(arcs[arc] if arc >= 0 else arcs[~arc][::-1])
+        return result
+
+    outer = [ring for ring in merged if _signed_area(points(ring)) < 0]
+    holes = [ring for ring in merged if _signed_area(points(ring)) >= 0]
+    return outer, holes, points
+
+
+def _contains(ring, point):
+    x, y = point
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return inside
+
+
+def _reverse(ring):
+    return [~arc for arc in reversed(ring)]
+
+
+
+
+####################### SIMPLIFICATION #############################
+
+def _distance(point, a, b, quantizer):
+    # Distance in degrees from `point` to the segment a-b.
+    (px, py), (ax, ay), (bx, by) = (quantizer.lonlat(p) for p in (point, a, b))
+    dx, dy = bx - ax, by - ay
+    if dx == dy == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def _simplify(points, tolerance, quantizer, keep=False):
+    # Douglas-Peucker keeping both ends (the junctions, so neighbouring
+    # countries stay joined). `keep` keeps the farthest point regardless, for
+    # arcs a ring cannot lose without collapsing.
+    if tolerance <= 0 or len(points) < 3:
+        return points
+    if points[0] == points[-1]:
+        far = max(range(1, len(points) - 1), key=lambda i: _distance(points[i], points[0], points[0], quantizer))
+        head = _simplify(points[:far + 1], tolerance, quantizer, True)
+        return head + _simplify(points[far:], tolerance, quantizer, True)[1:]
+
+    kept = [False] * len(points)
+    kept[0] = kept[-1] = True
+    stack = [(0, len(points) - 1, keep)]
+    while stack:
+        first, last, force = stack.pop()
+        if last - first < 2:
+            continue
+        distance, index = max((_distance(points[i], points[first], points[last], quantizer), i) for i in range(first + 1, last))
+        if force or distance > tolerance:
+            kept[index] = True
+            stack += [(first, index, False), (index, last, False)]
+    return [point for point, k in zip(points, kept) if k]
+
+
+def _encode(points):
+    # TopoJSON arcs are delta-encoded.
+    encoded = [list(points[0])]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        encoded.append([x1 - x0, y1 - y0])
+    return encoded
+
+
+def _coastline(points, quantizer):
+    # Drops the edges Natural Earth adds along the antimeridian and the south
+    # pole, which are not coast.
+    def artificial(a, b):
+        (ax, ay), (bx, by) = quantizer.lonlat(a), quantizer.lonlat(b)
+        return (abs(ax) > 179.99 and abs(bx) > 179.99) or (ay < -89.99 and by < -89.99)
+
+    pieces, piece = [], [points[0]]
+    for a, b in zip(points, points[1:]):
+        if artificial(a, b):
+            if len(piece) > 1:
+                pieces.append(piece)
+            piece = [b]
+        else:
+            piece.append(b)
+    if len(piece) > 1:
+        pieces.append(piece)
+    return pieces
+
+
+
+
+####################### BUILD #############################
+
+def topology(countries, tolerance=0.0):
+    # plotly.js' world topojson: countries keyed by ISO-3 (what both the
+    # "ISO-3" and "country names" location modes look up), their union as
+    # land, the sea around it as ocean and the outline as coastlines.
+    rings, shapes = [], []
+    quantizer = _Quantizer([point for _, polygons in countries for polygon in polygons for ring in polygon for point in ring])
+    for code, polygons in countries:
+        shape = []
+        for polygon in polygons:
+            quantized = [quantizer(ring) for ring in polygon]
+            quantized = [ring for ring in quantized if len(ring) >= 4]
+            if quantized:
+                shape.append(list(range(len(rings), len(rings) + len(quantized))))
+                rings.extend(quantized)
+        shapes.append((code, shape))
+
+    arcs, ring_arcs = _cut(rings)
+    outer, holes, outline_points = _merge(arcs, ring_arcs)
+
+    # Arcs of rings made of one or two arcs keep a point more, or the ring
+    # would collapse into a line.
+    fragile = {arc if arc >= 0 else ~arc for ring in ring_arcs if len(ring) <= 2 for arc in ring}
+    arcs = [_simplify(points, tolerance, quantizer, i in fragile) for i, points in enumerate(arcs)]
+
+    def geometry(code, polygons):
+        polygons = [[ring_arcs[ring] for ring in polygon] for polygon in polygons]
+        geometry = {"type": "MultiPolygon", "arcs": polygons} if len(polygons) > 1 else {"type": "Polygon", "arcs": polygons[0]}
+        if code:
+            geometry["id"] = code
+        return geometry
+
+    # Seas enclosed by land (the holes of the outline) go to the smallest
+    # outer ring containing them.
+    land = [[ring] for ring in outer]
+    for hole in holes:
+        point = outline_points(hole)[0]
+        containing = [polygon for polygon in land if _contains(outline_points(polygon[0]), point)]
+        if containing:
+            min(containing, key=lambda polygon: -_signed_area(outline_points(polygon[0]))).append(hole)
+
+    coastlines = []
+    used_once = sorted({arc if arc >= 0 else ~arc for ring in outer + holes for arc in ring})
+    for arc in used_once:
+        for piece in _coastline(arcs[arc], quantizer):
+            if piece == arcs[arc]:
+                coastlines.append([arc])
+            else:
+                arcs.append(piece)
+                coastlines.append([len(arcs) - 1])
+
+    objects = {
+        "countries": {"type": "GeometryCollection", "geometries": [geometry(code, shape) for code, shape in shapes if shape]},
+        "land": {"type": "GeometryCollection", "geometries": [{"type": "MultiPolygon", "arcs": land}]},
+        # The sphere minus the land, with enclosed seas as polygons of their own.
+        "ocean": {"type": "GeometryCollection", "geometries": [
+            {"type": "MultiPolygon", "arcs": [[_reverse(ring) for ring in outer]] + [[_reverse(hole)] for hole in holes]},
+        ]},
+        "coastlines": {"type": "GeometryCollection", "geometries": [{"type": "MultiLineString", "arcs": coastlines}]},
+    }
+    for layer in _EMPTY_LAYERS:
+        objects[layer] = {"type": "GeometryCollection", "geometries": []}
+
+    x1, y1 = quantizer.lonlat((QUANTIZATION - 1, QUANTIZATION - 1))
+    return {
+        "type": "Topology",
+        "bbox": [quantizer.x0, quantizer.y0, x1, y1],
+        "transform": quantizer.transform(),
+        "objects": objects,
+        "arcs": [_encode(points) for points in arcs],
+    }
+
+
+def build(source=SOURCE, directory=GEOMETRY_DIR, levels=GEOMETRY_LEVELS):
+    countries = read_countries(source)
+    written = []
+    for level, tolerance in levels.items():
+        path = os.path.join(directory, level, TOPOJSON_NAME)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(topology(countries, tolerance), f, separators=(",", ":"))
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?", default=SOURCE, help="Natural Earth admin-0 countries shapefile")
+    parser.add_argument("--out", default=GEOMETRY_DIR)
+    args = parser.parse_args()
+    for path in build(args.source, args.out):
+        print(f"Wrote {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
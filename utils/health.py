@@ -0,0 +1,27 @@
+import flask
+
+from utils import registry
+
+
+# /healthz answers as soon as the process serves requests; /readyz only once
+# every dataset scheduled to load up front (preload or prefetch) has been
+# loaded, so a load balancer can hold traffic back from a worker that would
+# still have to parse data/. Datasets left to load on demand do not hold it
+# back, nor do failed loads, which are listed with their error: waiting would
+# not fix them.
+
+def _healthz():
+    return flask.jsonify(status="ok")
+
+
+def _readyz():
+    states = registry.states()
+    pending = [name for name, state in states.items() if state == "scheduled"]
+    failed = {name: registry.error(name) for name, state in states.items() if state == "failed"}
+    status = 503 if pending else 200
+    return flask.jsonify(ready=not pending, pending=pending, failed=failed), status
+
+
+def init_app(server):
+    server.add_url_rule("/healthz", "healthz", _healthz)
+    server.add_url_rule("/readyz", "readyz", _readyz)
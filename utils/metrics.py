@@ -0,0 +1,144 @@
+import functools
+import os
+import time
+
+import dash._callback as dash_callback
+import flask
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+
+from utils import registry
+
+
+# Prometheus metrics for every Dash callback request, labelled by the ids of
+# the callback's outputs, and for every dataset load. A callback's wall time
+# is split into phases:
+#   data       time spent in registry.get() (including any dataset load)
+#   figure     the rest of the callback function, i.e. building its output
+#   serialize  Dash encoding the response as JSON (with utils.encoding)
+#   total      the whole request, before compression
+#   job        background callbacks (utils.background) only: the job's run
+#              time, recorded by the request that collects its result
+# Requests that start or poll a background job record only serialize and
+# total; data and figure would be the cost of enqueueing, not of the job.
+# Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory so that
+# /metrics adds up every worker (see gunicorn.conf.py).
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+
+_collectors = CollectorRegistry()
+
+CALLBACK_SECONDS = Histogram(
+    "dash_callback_seconds",
+    "Callback request wall time by phase",
+    ["output", "phase"],
+    registry=_collectors,
+)
+CALLBACK_RESPONSE_BYTES = Histogram(
+    "dash_callback_response_bytes",
+    "Uncompressed size of callback responses",
+    ["output"],
+    buckets=(1e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6, 1e7, 3e7),
+    registry=_collectors,
+)
+DATASET_LOAD_SECONDS = Histogram(
+    "dataset_load_seconds",
+    "Time to build or map a registered dataset",
+    ["dataset"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    registry=_collectors,
+)
+
+_PHASES = ("data", "callback", "serialize")
+
+
+
+
+####################### TIMING #############################
+
+def _timings():
+    if flask.has_request_context():
+        return flask.g.get("callback_timings")
+    return None
+
+
+def _timed(phase, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings = _timings()
+            if timings is not None:
+                timings[phase] += time.perf_counter() - start
+
+    return wrapper
+
+
+def _on_dataset(event, name, seconds):
+    if event == "load":
+        DATASET_LOAD_SECONDS.labels(name).observe(seconds)
+    else:
+        timings = _timings()
+        if timings is not None:
+            timings["data"] += seconds
+
+
+def _output_label(output):
+    # "..a.figure...b.children.." -> "a,b"
+    parts = output[2:-2].split("...") if output.startswith("..") else [output]
+    return ",".join(part.rsplit(".", 1)[0] for part in parts)
+
+
+def _before_request():
+    if flask.request.path.endswith("_dash-update-component"):
+        flask.g.callback_timings = dict.fromkeys(_PHASES, 0.0)
+        flask.g.callback_start = time.perf_counter()
+
+
+def _after_request(response):
+    timings = _timings()
+    if timings is None:
+        return response
+
+    body = flask.request.get_json(silent=True) or {}
+    output = _output_label(body.get("output", ""))
+    total = time.perf_counter() - flask.g.callback_start
+
+    CALLBACK_SECONDS.labels(output, "total").observe(total)
+    CALLBACK_SECONDS.labels(output, "serialize").observe(timings["serialize"])
+    if "background_seconds" in flask.g:
+        if flask.g.background_seconds is not None:
+            CALLBACK_SECONDS.labels(output, "job").observe(flask.g.background_seconds)
+    else:
+        CALLBACK_SECONDS.labels(output, "data").observe(timings["data"])
+        CALLBACK_SECONDS.labels(output, "figure").observe(max(timings["callback"] - timings["data"], 0.0))
+    if not response.direct_passthrough:
+        CALLBACK_RESPONSE_BYTES.labels(output).observe(response.calculate_content_length() or 0)
+    return response
+
+
+
+
+####################### ENDPOINT #############################
+
+def _metrics():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        collectors = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collectors)
+    else:
+        collectors = _collectors
+    return flask.Response(generate_latest(collectors), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(server):
+    # Dash offers no hook around a callback, so the two module-level helpers
+    # its dispatcher calls (the callback itself and the JSON encoder) are
+    # wrapped with timers. Register after utils.compression so the response
+    # is measured before it is compressed.
+    dash_callback._invoke_callback = _timed("callback", dash_callback._invoke_callback)
+    dash_callback.to_json = _timed("serialize", dash_callback.to_json)
+    registry.watch(_on_dataset)
+
+    server.before_request(_before_request)
+    server.after_request(_after_request)
+    server.add_url_rule(METRICS_PATH, "metrics", _metrics)
@@ -0,0 +1,64 @@
+import logging
+import os
+
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Only these columns of the (60+ column) Our World in Data COVID file are
+# parsed, with fixed dtypes so pandas never has to infer them per chunk.
+OWID_DTYPES = {
+    'continent': str,
+    'location': str,
+    'date': str,
+    'total_cases': 'float64',
+    'total_deaths': 'float64',
+    'population': 'float64',
+}
+OWID_CHUNKSIZE = 250_000
+
+LAST_PER_YEAR_COLUMNS = ['year', 'location', 'continent', 'total_cases', 'total_deaths', 'population']
+
+
+
+
+####################### INGEST #############################
+
+def _empty_last_per_year():
+    return pd.DataFrame({
+        'year': pd.Series(dtype='int64'),
+        'location': pd.Series(dtype=object),
+        'continent': pd.Series(dtype=object),
+        'total_cases': pd.Series(dtype='float64'),
+        'total_deaths': pd.Series(dtype='float64'),
+        'population': pd.Series(dtype='float64'),
+    })
+
+
+def read_last_per_year(path, chunksize=OWID_CHUNKSIZE):
+    # Streams the file and keeps, for every (year, location), the last
+    # non-null value of each column, like groupby(...).last() on the whole
+    # file. Peak memory is one chunk plus the reduced output. A missing file
+    # yields an empty frame with the same columns.
+    if not os.path.exists(path):
+        logger.warning("%s not found; COVID-19 case and death figures will be empty", path)
+        return _empty_last_per_year()
+
+    last = None
+    for chunk in pd.read_csv(path, usecols=list(OWID_DTYPES), dtype=OWID_DTYPES, chunksize=chunksize):
+        # OWID dates are ISO-8601, so the year is the first four characters.
+        chunk['year'] = chunk['date'].str.slice(0, 4).astype(int)
+        part = chunk.drop(columns=['date']).groupby(['year', 'location'], sort=False).last()
+
+        if last is None:
+            last = part
+        else:
+            # Later chunks win where they have a value; keys keep the order
+            # in which they first appeared in the file.
+            keys = last.index.union(part.index, sort=False)
+            last = part.combine_first(last).reindex(keys)
+
+    if last is None:
+        return _empty_last_per_year()
+    return last.reset_index()[LAST_PER_YEAR_COLUMNS]
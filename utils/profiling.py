@@ -0,0 +1,160 @@
+# Cold-start profiler: how long importing the app takes, split by package and
+# by page, and how long every dataset takes to load.
+#
+#   python -m utils.profiling [--cold] [--json PATH] [--budget-import S] [--budget-load S] [--budget-page S]
+#
+# Run it in a fresh interpreter (as above): only modules imported after it
+# starts are timed. --cold points the dataset caches at an empty directory so
+# every dataset is rebuilt from data/. With budgets it exits with status 1
+# when one is exceeded, so CI can hold the line on start-up time.
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from importlib.machinery import SourceFileLoader
+
+
+class ImportTimer:
+    # Times every module executed from source, including the pages Dash loads
+    # through exec_module (which `python -X importtime` does not see). "self"
+    # excludes the time spent importing other modules.
+
+    def __init__(self):
+        self.modules = {}
+        self._stack = []
+        self._exec_module = None
+
+    def install(self):
+        original = self._exec_module = SourceFileLoader.exec_module
+        timer = self
+
+        def exec_module(loader, module):
+            start = time.perf_counter()
+            timer._stack.append(0.0)
+            try:
+                return original(loader, module)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = timer._stack.pop()
+                if timer._stack:
+                    timer._stack[-1] += elapsed
+                timer.modules[module.__name__] = {"self": elapsed - nested, "cumulative": elapsed}
+
+        SourceFileLoader.exec_module = exec_module
+
+    def uninstall(self):
+        SourceFileLoader.exec_module = self._exec_module
+
+
+
+
+####################### PROFILE #############################
+
+def profile():
+    if "app" in sys.modules:
+        raise RuntimeError("the app is already imported; profile in a fresh interpreter")
+    os.environ.setdefault("PREFETCH_DATASETS", "0")
+
+    timer = ImportTimer()
+    timer.install()
+    start = time.perf_counter()
+    try:
+        import app  # noqa: F401
+    finally:
+        timer.uninstall()
+    import_total = time.perf_counter() - start
+
+    from utils import registry
+
+    loads = {}
+    registry.watch(lambda event, name, seconds: loads.__setitem__(name, seconds) if event == "load" else None)
+    start = time.perf_counter()
+    registry.load_all()
+    load_total = time.perf_counter() - start
+
+    packages = collections.Counter()
+    for name, timing in timer.modules.items():
+        packages[name.split(".")[0]] += timing["self"]
+    load_pages = collections.Counter()
+    for name, seconds in loads.items():
+        load_pages[name.rsplit(".", 1)[0]] += seconds
+
+    return {
+        "import": {
+            "total": import_total,
+            "packages": dict(packages.most_common()),
+            "pages": {name: timing for name, timing in timer.modules.items() if name.startswith("pages.")},
+        },
+        "load": {
+            "total": load_total,
+            "datasets": loads,
+            "pages": dict(load_pages.most_common()),
+        },
+    }
+
+
+def over_budget(report, budget_import=None, budget_load=None, budget_page=None):
+    failures = []
+    if budget_import is not None and report["import"]["total"] > budget_import:
+        failures.append(f"import took {report['import']['total']:.2f} s (budget {budget_import:.2f} s)")
+    if budget_load is not None and report["load"]["total"] > budget_load:
+        failures.append(f"dataset loading took {report['load']['total']:.2f} s (budget {budget_load:.2f} s)")
+    if budget_page is not None:
+        for name, timing in report["import"]["pages"].items():
+            if timing["self"] > budget_page:
+                failures.append(f"{name} took {timing['self']:.2f} s to import (budget {budget_page:.2f} s)")
+    return failures
+
+
+def print_report(report, top=15):
+    print(f"import app: {report['import']['total']:.3f} s")
+    for name, seconds in list(report["import"]["packages"].items())[:top]:
+        print(f"  {name:<40} {seconds:>8.3f}")
+    print("pages (self / cumulative):")
+    for name, timing in sorted(report["import"]["pages"].items(), key=lambda item: -item[1]["self"]):
+        print(f"  {name:<40} {timing['self']:>8.3f} {timing['cumulative']:>8.3f}")
+    print(f"load datasets: {report['load']['total']:.3f} s")
+    for name, seconds in report["load"]["pages"].items():
+        print(f"  {name:<40} {seconds:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cold", action="store_true", help="rebuild every dataset instead of reading the caches")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--budget-import", type=float, help="seconds allowed to import the app")
+    parser.add_argument("--budget-load", type=float, help="seconds allowed to load every dataset")
+    parser.add_argument("--budget-page", type=float, help="seconds allowed to import any one page (self time)")
+    args = parser.parse_args()
+
+    cache_dir = None
+    if args.cold:
+        cache_dir = tempfile.mkdtemp(prefix="profile-")
+        os.environ["DATASET_CACHE_DIR"] = os.path.join(cache_dir, "datasets")
+        os.environ["DATASET_STORE_DIR"] = os.path.join(cache_dir, "store")
+        os.environ["COUNTRY_TABLE"] = os.path.join(cache_dir, "countries.json")
+    try:
+        report = profile()
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print_report(report, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = over_budget(report, args.budget_import, args.budget_load, args.budget_page)
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import functools
+import logging
+import os
+import threading
+import time
+
+from utils import store
+from utils.cache import cache_key, cached_frame
+from utils.frozen import freeze
+
+
+# Process-wide registry of processed datasets. Each entry is loaded on first
+# access and the same frame is handed to every caller until one of its source
+# files changes on disk. Frames are shared between requests and threads and
+# are handed out frozen (utils.frozen): mutating one raises, deriving a new
+# frame from it does not.
+
+class _Entry:
+    def __init__(self, name, sources, loader, version=1):
+        self.name = name
+        self.sources = tuple(sources)
+        self.loader = loader
+        self.version = version
+        self.lock = threading.Lock()
+        self.state = (None, None)
+        self.error = None
+
+
+_entries = {}
+# Datasets that load_all() or prefetch() will load without being asked for.
+_scheduled = set()
+_prefetch_lock = threading.Lock()
+_prefetch_thread = None
+_watchers = []
+
+logger = logging.getLogger(__name__)
+
+
+def _after_fork():
+    # Background callback jobs are forked from a threaded server: a lock
+    # another thread held at that moment would never be released in the job.
+    global _prefetch_lock
+    _prefetch_lock = threading.Lock()
+    for entry in _entries.values():
+        entry.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+
+
+####################### REGISTRY #############################
+
+def _stamp(sources):
+    stamp = []
+    for path in sources:
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def register(name, sources, loader, version=1):
+    _entries[name] = _Entry(name, sources, loader, version)
+
+
+def watch(callback):
+    # callback(event, name, seconds) is called after every get() ("get") and
+    # every time a dataset is (re)loaded ("load"); see utils.metrics.
+    _watchers.append(callback)
+
+
+def _notify(event, name, start):
+    if _watchers:
+        seconds = time.perf_counter() - start
+        for callback in _watchers:
+            callback(event, name, seconds)
+
+
+def get(name):
+    start = time.perf_counter()
+    entry = _entries[name]
+    stamp = _stamp(entry.sources)
+
+    loaded_stamp, frame = entry.state
+    if loaded_stamp == stamp:
+        _notify("get", name, start)
+        return frame
+
+    with entry.lock:
+        loaded_stamp, frame = entry.state
+        if loaded_stamp != stamp:
+            load_start = time.perf_counter()
+            try:
+                frame = freeze(entry.loader())
+            except Exception as exc:
+                entry.error = f"{type(exc).__name__}: {exc}"
+                raise
+            entry.state = (stamp, frame)
+            entry.error = None
+            _notify("load", name, load_start)
+    _notify("get", name, start)
+    return frame
+
+
+def version(name):
+    # Changes whenever one of the dataset's source files does, which is also
+    # when get() would reload it.
+    return _stamp(_entries[name].sources)
+
+
+def fingerprint():
+    # One value covering every dataset's version, for caches that depend on
+    # whatever data a request happens to touch.
+    return repr(sorted((name, version(name)) for name in _entries))
+
+
+def content_key(name):
+    # Hash of the source files and transform version, stable across
+    # processes and machines (unlike the mtime stamp used by version()).
+    entry = _entries[name]
+    return cache_key(entry.sources, entry.version)
+
+
+def loaded(name):
+    return _entries[name].state[0] is not None
+
+
+def pending():
+    return sorted(name for name, entry in _entries.items() if entry.state[0] is None)
+
+
+def state(name):
+    # "failed" when its last load raised (see error()), else "loaded",
+    # "scheduled" when load_all() or prefetch() is going to load it, or
+    # "on demand" when it only loads on first use.
+    entry = _entries[name]
+    if entry.error is not None:
+        return "failed"
+    if entry.state[0] is not None:
+        return "loaded"
+    return "scheduled" if name in _scheduled else "on demand"
+
+
+def states():
+    return {name: state(name) for name in sorted(_entries)}
+
+
+def error(name):
+    return _entries[name].error
+
+
+def load_all():
+    _scheduled.update(_entries)
+    for name in list(_entries):
+        try:
+            get(name)
+        except Exception:
+            logger.exception("Failed to load dataset %s", name)
+
+
+def prefetch():
+    # Loads every registered dataset on a daemon thread so pages nobody has
+    # visited yet are warm by the time they are requested. Only the first
+    # call starts the thread.
+    global _prefetch_thread
+    with _prefetch_lock:
+        if _prefetch_thread is None:
+            _scheduled.update(_entries)
+            _prefetch_thread = threading.Thread(target=load_all, name="dataset-prefetch", daemon=True)
+            _prefetch_thread.start()
+    return _prefetch_thread
+
+
+def dataset(*sources, version=1):
+    # Turns a zero-argument loader into a registry-backed accessor. The
+    # processed frame is persisted through utils.cache and published to the
+    # memory-mapped utils.store, so other processes map it instead of
+    # rebuilding it from the CSVs.
+    def decorator(build):
+        name = f"{build.__module__}.{build.__name__}"
+        def load():
+            key = cache_key(sources, version)
+            return store.shared_frame(name, key, lambda: cached_frame(name, sources, build, version))
+
+        register(name, sources, load, version)
+
+        @functools.wraps(build)
+        def wrapper():
+            return get(name)
+
+        wrapper.dataset_name = name
+        return wrapper
+
+    return decorator
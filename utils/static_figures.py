@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+
+import dash
+import flask
+import plotly.io as pio
+from dash import ClientsideFunction, Input, Output, dcc
+
+from utils import encoding, registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+# Figures that only depend on their datasets are rendered once to compressed
+# JSON under FIGURE_DIR/<key>/<figure id>.json.gz (and .br when brotli is
+# installed). The key hashes the source files, so a URL never changes meaning
+# and can be cached forever by browsers and proxies. `python -m utils.build`
+# renders everything ahead of time; anything missing is rendered on its first
+# request. They are served by the FIGURE_URL route, not as Dash assets: a
+# file written under assets/ would make the debug server reload the page.
+# Layouts are built once, at import, so they hold the unversioned
+# FIGURE_URL/current/<figure id>.json, which redirects to the current key.
+FIGURE_DIR = os.environ.get("STATIC_FIGURE_DIR", ".cache/figures")
+FIGURE_URL = "/_figures"
+CURRENT = "current"
+
+_ENCODINGS = {"br": "br", "gzip": "gz"}
+
+_figures = {}
+_lock = threading.Lock()
+
+
+
+
+####################### REGISTRY #############################
+
+def static_figure(figure_id, *datasets, version=1):
+    # Registers a zero-argument figure builder for the dcc.Graph `figure_id`.
+    # The page places static_graph(figure_id) in its layout and the browser
+    # fetches the figure itself (assets/figures.js).
+    names = [accessor.dataset_name for accessor in datasets]
+
+    def decorator(build):
+        _figures[figure_id] = (build, names, version)
+        dash.clientside_callback(
+            ClientsideFunction(namespace="figures", function_name="load"),
+            Output(figure_id, "figure"),
+            Input(f"{figure_id}-src", "data"),
+        )
+        return build
+
+    return decorator
+
+
+def figure_key(figure_id):
+    _, names, version = _figures[figure_id]
+    digest = hashlib.sha256(f"{figure_id}:{version}:{encoding.FIGURE_PRECISION}".encode())
+    for name in names:
+        digest.update(f"{name}:{registry.content_key(name)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def figure_url(figure_id):
+    return f"{FIGURE_URL}/{figure_key(figure_id)}/{figure_id}.json"
+
+
+def static_graph(figure_id, **kwargs):
+    # Layout children for a static figure: the URL to load and the graph.
+    # Neither depends on the data, so pages can build them at import.
+    return [
+        dcc.Store(id=f"{figure_id}-src", data=f"{FIGURE_URL}/{CURRENT}/{figure_id}.json"),
+        dcc.Graph(id=figure_id, **kwargs),
+    ]
+
+
+
+
+####################### RENDERING #############################
+
+def _path(figure_id, key, suffix):
+    return os.path.join(FIGURE_DIR, key, f"{figure_id}.json.{suffix}")
+
+
+def _write(path, body):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def render(figure_id):
+    # Writes the compressed variants for the current key and returns it.
+    key = figure_key(figure_id)
+    with _lock:
+        if not os.path.exists(_path(figure_id, key, "gz")):
+            build, _, _ = _figures[figure_id]
+            body = pio.to_json(encoding.encode_figure(build()), validate=False).encode()
+
+            os.makedirs(os.path.join(FIGURE_DIR, key), exist_ok=True)
+            if brotli is not None:
+                _write(_path(figure_id, key, "br"), brotli.compress(body))
+            _write(_path(figure_id, key, "gz"), gzip.compress(body, compresslevel=9, mtime=0))
+    return key
+
+
+def build_all():
+    for figure_id in sorted(_figures):
+        key = render(figure_id)
+        logger.info("Rendered %s -> %s", figure_id, os.path.join(FIGURE_DIR, key))
+    return sorted(_figures)
+
+
+
+
+####################### SERVING #############################
+
+def _serve(key, figure_id):
+    if figure_id not in _figures:
+        flask.abort(404)
+    if key != figure_key(figure_id):
+        # The URL of static_graph, or one from before the data changed;
+        # point it at the current file.
+        response = flask.redirect(figure_url(figure_id))
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    render(figure_id)
+
+    accepted = flask.request.headers.get("Accept-Encoding", "")
+    for encoding, suffix in _ENCODINGS.items():
+        path = _path(figure_id, key, suffix)
+        if encoding in accepted and os.path.exists(path):
+            response = flask.send_file(os.path.abspath(path), mimetype="application/json")
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        with open(_path(figure_id, key, "gz"), "rb") as f:
+            response = flask.Response(gzip.decompress(f.read()), mimetype="application/json")
+
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+def init_app(server):
+    server.add_url_rule(f"{FIGURE_URL}/<key>/<figure_id>.json", "static_figure", _serve)
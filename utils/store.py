@@ -0,0 +1,118 @@
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+# Processed frames are published once as uncompressed Arrow IPC files and
+# memory-mapped read-only by every process that needs them. Numeric columns
+# become views of the mapping and strings are stored dictionary-encoded and
+# surface as pandas Categoricals, so no per-row Python objects exist and the
+# pages stay shared between workers instead of being copied by refcounting.
+# Point DATASET_STORE_DIR at a tmpfs such as /dev/shm to keep them in RAM.
+STORE_DIR = os.environ.get("DATASET_STORE_DIR", ".cache/store")
+
+
+
+
+####################### ENCODING #############################
+
+def _index_type(pa, size):
+    # Same widths pandas picks for Categorical codes, so they map zero-copy.
+    if size < 127:
+        return pa.int8()
+    if size < 32767:
+        return pa.int16()
+    return pa.int32()
+
+
+def _to_table(frame):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = pa.Table.from_pandas(frame)
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            # Sorted dictionaries give Categoricals whose order matches the
+            # plain strings, so sorting and groupby results are unchanged.
+            values = column.combine_chunks()
+            dictionary = pc.drop_null(pc.unique(values))
+            dictionary = pc.take(dictionary, pc.sort_indices(dictionary))
+            indices = pc.index_in(values, value_set=dictionary).cast(_index_type(pa, len(dictionary)))
+            column = pa.chunked_array([pa.DictionaryArray.from_arrays(indices, dictionary)])
+        elif pa.types.is_dictionary(field.type):
+            size = max((len(chunk.dictionary) for chunk in column.chunks), default=0)
+            column = column.cast(pa.dictionary(_index_type(pa, size), field.type.value_type))
+        elif pa.types.is_floating(field.type) and column.null_count:
+            # pandas NaN arrives as null; storing NaN again keeps the column
+            # free of a validity bitmap and therefore zero-copy.
+            column = pc.fill_null(column, float("nan"))
+        else:
+            continue
+        table = table.set_column(i, pa.field(field.name, column.type), column)
+    return table
+
+
+def _map(path):
+    import pyarrow as pa
+
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+
+
+####################### STORE #############################
+
+def _path(name, key):
+    return os.path.join(STORE_DIR, f"{name}-{key}.arrow")
+
+
+def _drop_stale(name, keep):
+    prefix = f"{name}-"
+    for file in os.listdir(STORE_DIR):
+        if file.startswith(prefix) and file.endswith(".arrow") and file != keep:
+            try:
+                os.remove(os.path.join(STORE_DIR, file))
+            except OSError:
+                pass
+
+
+def _publish(path, frame):
+    import pyarrow as pa
+
+    table = _to_table(frame)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def shared_frame(name, key, build):
+    # Returns the memory-mapped frame published under (name, key), building
+    # and publishing it first if needed. Anything Arrow cannot store is
+    # returned as built, unshared, with a warning.
+    path = _path(name, key)
+
+    if os.path.exists(path):
+        try:
+            return _map(path)
+        except Exception as exc:
+            logger.warning("Ignoring unreadable store entry %s: %s", path, exc)
+
+    data = build()
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        _publish(path, data)
+        _drop_stale(name, os.path.basename(path))
+        return _map(path)
+    except (ImportError, OSError, TypeError, ValueError) as exc:
+        logger.warning("Not sharing %s: %s", name, exc)
+        return data
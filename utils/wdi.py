@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+
+from utils.frozen import freeze
+
+
+# World Bank WDI downloads share one layout: four metadata lines, then a
+# header of "Country Name", "Country Code", "Indicator Name", "Indicator Code"
+# followed by one column per year since 1960.
+WDI_SKIPROWS = 4
+WDI_YEARS = (2018, 2019, 2020, 2021, 2022, 2023)
+
+# (path, years) -> (mtime_ns, parsed frame). A changed file replaces its
+# entry, so only the current parse of each file stays in memory.
+_parsed = {}
+
+
+
+
+####################### LOADER #############################
+
+def _read_wdi(path, years):
+    year_columns = [str(year) for year in years]
+
+    # Only the country name and the requested years are parsed; the other
+    # decades are never materialised.
+    wide = pd.read_csv(
+        path,
+        skiprows=WDI_SKIPROWS,
+        usecols=['Country Name', *year_columns],
+        dtype={'Country Name': str, **{col: 'float64' for col in year_columns}},
+    )
+
+    long = wide.melt(id_vars=['Country Name'], value_vars=year_columns, var_name='year', value_name='value')
+    long['year'] = long['year'].astype(int)
+    long = long.rename(columns={'Country Name': 'location'})
+    return freeze(long.sort_values(['location', 'year']).reset_index(drop=True))
+
+
+def read_wdi(path, value_name, years=WDI_YEARS):
+    # Returns a long frame with columns location, year, <value_name>, sorted
+    # by location then year. The parsed file is shared between callers and
+    # frozen; every call hands back its own, writable copy.
+    key = (path, tuple(years))
+    mtime_ns = os.stat(path).st_mtime_ns
+    entry = _parsed.get(key)
+    if entry is None or entry[0] != mtime_ns:
+        entry = _parsed[key] = (mtime_ns, _read_wdi(path, key[1]))
+    return entry[1].rename(columns={'value': value_name})
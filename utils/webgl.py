@@ -0,0 +1,57 @@
+import os
+
+import plotly.graph_objects as go
+
+
+# SVG scatter traces are drawn as DOM nodes, one group per trace plus a node
+# per marker, which gets slow in the browser past a few thousand points or a
+# few dozen traces. WebGL draws every trace of a plot in one canvas. Figures
+# above either threshold get their scatter traces drawn as scattergl, with
+# the same hover templates, legend entries and styling; smaller ones stay SVG.
+WEBGL_POINTS = int(os.environ.get("WEBGL_POINTS", "1000"))
+WEBGL_TRACES = int(os.environ.get("WEBGL_TRACES", "50"))
+
+_SCATTER = ("scatter", "scattergl")
+
+
+
+
+####################### SELECTION #############################
+
+def _size(trace):
+    for values in (trace.y, trace.x):
+        if values is not None:
+            return len(values)
+    return 0
+
+
+def use_webgl(fig, points=None, traces=None):
+    # Whether the scatter traces of `fig` are too many (or hold too many
+    # points) for SVG.
+    points = WEBGL_POINTS if points is None else points
+    traces = WEBGL_TRACES if traces is None else traces
+    scatter = [trace for trace in fig.data if trace.type in _SCATTER]
+    return len(scatter) > traces or sum(_size(trace) for trace in scatter) > points
+
+
+def auto_webgl(fig, points=None, traces=None):
+    # Returns `fig` with its scatter traces drawn with WebGL or SVG as
+    # use_webgl() decides. This overrides plotly.express' own choice, which
+    # only counts rows of the data frame.
+    webgl = use_webgl(fig, points, traces)
+    target = "scattergl" if webgl else "scatter"
+    if all(trace.type == target for trace in fig.data if trace.type in _SCATTER):
+        return fig
+
+    # Styling only the other renderer supports (e.g. SVG's stacking
+    # orientation) is dropped.
+    valid = (go.Scattergl if webgl else go.Scatter)._valid_props
+    spec = fig.to_dict()
+    for trace in spec["data"]:
+        if trace["type"] in _SCATTER:
+            for key in [key for key in trace if key not in valid]:
+                del trace[key]
+            trace["type"] = target
+    # Every value already passed plotly's validation; checking the data
+    # arrays again would take longer than building the figure did.
+    return go.Figure(spec, _validate=False)
@@ -0,0 +1,22 @@
+import gc
+import logging
+import os
+
+# The datasets are loaded right here, in the gunicorn master (preload_app),
+# so the background prefetch that app.py starts on first request is not needed.
+os.environ.setdefault("PREFETCH_DATASETS", "0")
+
+from app import app, server  # noqa: E402
+from utils import registry  # noqa: E402
+
+
+logger = logging.getLogger(__name__)
+
+if os.environ.get("PRELOAD_DATASETS", "1") != "0":
+    registry.load_all()
+    states = list(registry.states().values())
+    logger.info("Preloaded %d datasets, %d failed", states.count("loaded"), states.count("failed"))
+
+    # Move everything allocated so far out of the collector's reach, so the
+    # cyclic GC in forked workers does not write to (and copy) these pages.
+    gc.freeze()